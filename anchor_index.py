@@ -0,0 +1,147 @@
+"""Whitespace-tolerant fuzzy anchor lookup for codemod.py.
+
+TokenIndex tokenizes the target once, dropping whitespace entirely, and keeps
+a posting list of positions for every token. An anchor is found by seeding
+from its rarest tokens and verifying each candidate with a banded token-level
+edit distance, so indentation and line-wrapping never matter and up to
+`fuzz` tokens may differ (like `patch -F`, but counted in tokens, and never
+more than a quarter of the anchor).
+
+Tokens are runs of identifier-ish characters (including the `-`, `:`, `/`
+and `.` found in Tailwind classes and member chains) or single punctuation
+characters, so adding or removing one class in a className is one token edit.
+
+With fuzz F, any F+1 distinct anchor tokens include at least one that
+survived unedited, so looking up the F+1 rarest tokens finds every match
+without scanning the text.
+"""
+
+import re
+
+TOKEN = re.compile(r'[\w$.:/-]+|\S')
+
+
+def tokenize(text):
+    """Return (tokens, starts, ends) for text."""
+    tokens = []
+    starts = []
+    ends = []
+    for m in TOKEN.finditer(text):
+        tokens.append(m.group())
+        starts.append(m.start())
+        ends.append(m.end())
+    return tokens, starts, ends
+
+
+def banded_distance(anchor, window, fuzz):
+    """Best alignment of all of `anchor` against a substring of `window`.
+
+    The alignment may start anywhere in the first 2*fuzz+1 tokens of the
+    window. Returns (distance, start, end) in window token positions, or None
+    if no alignment is within `fuzz` edits. Ties go to substitutions and to
+    the longer span, so a drifted first or last token is covered by the
+    match rather than left next to it:
+
+    >>> banded_distance(['let', 'total', '=', 'n'], ['const', 'total', '=', 'm', ';'], 2)
+    (2, 0, 4)
+    """
+    inf = fuzz + 1
+    width = len(window)
+    # prev[j] = (distance, start) aligning anchor[:i] with window[start:j]
+    prev = [(0, j) if j <= 2 * fuzz else (inf, j) for j in range(width + 1)]
+    for i, token in enumerate(anchor, 1):
+        lo = max(i - fuzz, 0)
+        hi = min(i + 3 * fuzz, width)
+        cur = [(inf, 0)] * (width + 1)
+        for j in range(lo, hi + 1):
+            best = (prev[j][0] + 1, prev[j][1])
+            if j > 0:
+                diag = prev[j - 1]
+                cost = diag[0] + (token != window[j - 1])
+                if cost <= best[0]:
+                    best = (cost, diag[1])
+                left = cur[j - 1]
+                if left[0] + 1 < best[0]:
+                    best = (left[0] + 1, left[1])
+            cur[j] = best if best[0] < inf else (inf, 0)
+        prev = cur
+    distance, start, end = inf, 0, 0
+    for j, (d, s) in enumerate(prev):
+        if d <= distance and d < inf:
+            distance, start, end = d, s, j
+    if distance > fuzz:
+        return None
+    return distance, start, end
+
+
+class TokenIndex:
+    """Token positions of a text, built once and queried per anchor."""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens, self.starts, self.ends = tokenize(text)
+        postings = {}
+        for position, token in enumerate(self.tokens):
+            postings.setdefault(token, []).append(position)
+        self.postings = postings
+
+    def find(self, anchor, fuzz=0):
+        """Return [(char_start, char_end, distance)] for the best matches of anchor.
+
+        Only matches at the smallest distance found are returned, so a single
+        entry means the anchor was located unambiguously.
+
+        >>> index = TokenIndex('{\\n  const total = items.length\\n  return total\\n}\\n')
+        >>> [index.text[s:e] for s, e, _ in index.find('  let total = items.length\\n', 1)]
+        ['  const total = items.length\\n']
+        """
+        want = tokenize(anchor)[0]
+        if not want:
+            return []
+        # Never let more than a quarter of the anchor's tokens differ
+        fuzz = min(fuzz, len(want) // 4)
+        seeds = sorted(range(len(want)), key=lambda i: len(self.postings.get(want[i], ())))
+        diagonals = set()
+        for i in seeds[:fuzz + 1]:
+            for position in self.postings.get(want[i], ()):
+                diagonals.add(position - i)
+
+        found = {}
+        for diagonal in sorted(diagonals):
+            lo = max(diagonal - fuzz, 0)
+            window = self.tokens[lo:diagonal + len(want) + 2 * fuzz]
+            result = banded_distance(want, window, fuzz)
+            if result is None:
+                continue
+            distance, start, end = result
+            span = (lo + start, lo + end)
+            if span[1] > span[0] and (span not in found or distance < found[span]):
+                found[span] = distance
+        if not found:
+            return []
+
+        best = min(found.values())
+        matches = []
+        last_end = -1
+        for (first, last), distance in sorted(found.items()):
+            if distance != best or first < last_end:
+                continue
+            matches.append((*self._char_span(anchor, first, last), distance))
+            last_end = last
+        return matches
+
+    def _char_span(self, anchor, first, last):
+        """Character range for tokens [first, last), widened to mirror the
+        anchor's leading indentation and trailing newline."""
+        text = self.text
+        start = self.starts[first]
+        end = self.ends[last - 1]
+        if anchor[:1] in (' ', '\t'):
+            while start > 0 and text[start - 1] in ' \t':
+                start -= 1
+        if anchor.endswith('\n'):
+            while end < len(text) and text[end] in ' \t\r':
+                end += 1
+            if end < len(text) and text[end] == '\n':
+                end += 1
+        return start, end
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""Apply a stack of .patch files to the working tree, in order, without patch(1).
+
+Both formats found in the repo are understood: normal diffs
+(`archived_fix.patch`, `3869,3886c3869,3890`) and unified diffs
+(`consistency-update.patch`, `Addtl Files/voice_feature.patch`).
+
+Each target file is read once and indexed by line offsets. Hunks are placed
+in one forward pass: a hunk's old lines are looked up at the line the patch
+names, shifted by the offset the previous hunk landed at, and then searched
+for nearby (nearest occurrence wins) like `patch` does. If the full context
+does not match, up to --fuzz context lines are dropped from each end. The
+placed hunks become replacements in a PieceTable over the original text, so
+applying a patch never copies the file per hunk.
+
+Hunks that cannot be placed are skipped and written to FILE.rej in the
+patch's own format; the rest of the patch still applies. Normal diffs have
+no context, so their additions are placed purely by line number. Patched
+JS/JSX is checked with jsx_lexer.validate() first, and nothing is written
+if any of it no longer parses. A patch to `+++ /dev/null` deletes its file
+once every hunk applied and nothing is left, like `patch -E`.
+
+    python apply_patches.py archived_fix.patch consistency-update.patch
+    python apply_patches.py --dry-run 'Addtl Files/voice_feature.patch'
+"""
+
+import os
+import re
+import sys
+
+import chunk_cache
+import jsx_lexer
+from codemod import LineIndex
+from mapped_file import write_atomic
+from piece_table import PieceTable
+
+DEFAULT_FILE = 'src/components/KanbanBoard.jsx'
+DEFAULT_FUZZ = 2
+
+UNIFIED_HUNK = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+NORMAL_HUNK = re.compile(r'^(\d+)(?:,(\d+))?([acd])(\d+)(?:,(\d+))?\s*$')
+NO_NEWLINE = '\\'
+
+# place_hunks() outcomes
+APPLIED = 'applied'
+PRESENT = 'already applied'
+FAILED = 'FAILED'
+
+
+class PatchError(ValueError):
+    """Raised when a patch file cannot be parsed, or its result would not."""
+
+    def __init__(self, path, line, message):
+        self.path = path
+        self.line = line
+        super().__init__(f'{path}:{line}: {message}')
+
+
+class Hunk:
+    """One hunk: `old` lines (context and removals) become `new` lines.
+
+    `line` is the 0-based line of the target where `old` starts (or where
+    `new` is inserted when `old` is empty). `lead` and `trail` count the
+    context lines at each end that fuzz may drop.
+    """
+
+    __slots__ = ('line', 'old', 'new', 'lead', 'trail', 'raw')
+
+    def __init__(self, line, old, new, lead=0, trail=0, raw=()):
+        self.line = line
+        self.old = old
+        self.new = new
+        self.lead = lead
+        self.trail = trail
+        self.raw = list(raw)
+
+    def __repr__(self):
+        return f'Hunk(line={self.line + 1}, -{len(self.old)} +{len(self.new)})'
+
+
+class FilePatch:
+    """The hunks of one patch for one target file (path None for normal diffs).
+
+    creates and deletes are set for patches from and to /dev/null.
+    """
+
+    def __init__(self, path, header=(), creates=False, deletes=False):
+        self.path = path
+        self.header = list(header)
+        self.creates = creates
+        self.deletes = deletes
+        self.hunks = []
+
+
+def _strip_no_newline(lines):
+    if lines and lines[-1].endswith('\n'):
+        lines[-1] = lines[-1][:-1]
+        if lines[-1].endswith('\r'):
+            lines[-1] = lines[-1][:-1]
+
+
+def _no_newline(tag, old, new):
+    """Apply '\\ No newline at end of file' to the side(s) of the line tagged `tag`."""
+    if tag in ' -':
+        _strip_no_newline(old)
+    if tag in ' +':
+        _strip_no_newline(new)
+
+
+def _header_path(line):
+    path = line[4:].rstrip('\r\n').split('\t')[0].strip()
+    return None if path == '/dev/null' else path
+
+
+def _target(old_path, new_path, git=False):
+    """Pick the target path, dropping git's a/ and b/ prefixes.
+
+    git says the header follows `diff --git`, whose paths are always
+    prefixed, even when the other side is /dev/null.
+    """
+    if old_path and new_path and old_path[:2] == 'a/' and new_path[:2] == 'b/':
+        return new_path[2:]
+    if git and new_path is None and old_path[:2] == 'a/':
+        return old_path[2:]
+    if git and old_path is None and new_path[:2] == 'b/':
+        return new_path[2:]
+    return new_path or old_path
+
+
+def parse_patch(text, path='<patch>'):
+    """Split a normal or unified diff into FilePatches."""
+    lines = text.splitlines(keepends=True)
+    patches = []
+    current = None
+    header = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith('--- ') and i + 1 < len(lines) and lines[i + 1].startswith('+++ '):
+            old_path, new_path = _header_path(line), _header_path(lines[i + 1])
+            git = any(h.startswith('diff --git ') for h in header)
+            current = FilePatch(_target(old_path, new_path, git), header + [line, lines[i + 1]],
+                                creates=old_path is None and bool(new_path),
+                                deletes=bool(old_path) and new_path is None)
+            patches.append(current)
+            header = []
+            i += 2
+            continue
+        m = UNIFIED_HUNK.match(line)
+        if m:
+            if current is None:
+                raise PatchError(path, i + 1, 'hunk before the ---/+++ file header')
+            i = _parse_unified(lines, i, m, current, path)
+            continue
+        m = NORMAL_HUNK.match(line)
+        if m:
+            if current is None or current.path is not None:
+                current = FilePatch(None)
+                patches.append(current)
+            i = _parse_normal(lines, i, m, current, path)
+            continue
+        # diff --git, index, mode lines and commentary before a file header
+        header.append(line)
+        i += 1
+    if not patches:
+        raise PatchError(path, 1, 'no hunks found')
+    return patches
+
+
+def _parse_unified(lines, i, m, current, path):
+    old_start, old_count = int(m.group(1)), int(m.group(2) or 1)
+    new_count = int(m.group(4) or 1)
+    old, new, raw = [], [], [lines[i]]
+    lead = trail = 0
+    changed = False
+    i += 1
+    while (len(old) < old_count or len(new) < new_count) and i < len(lines):
+        line = lines[i]
+        tag, body = line[:1], line[1:]
+        if line in ('\n', '\r\n'):
+            # Some editors strip the space from empty context lines
+            tag, body = ' ', line
+        if tag == ' ':
+            old.append(body)
+            new.append(body)
+            if changed:
+                trail += 1
+            else:
+                lead += 1
+        elif tag == '-':
+            old.append(body)
+            changed, trail = True, 0
+        elif tag == '+':
+            new.append(body)
+            changed, trail = True, 0
+        elif tag == NO_NEWLINE:
+            _no_newline(raw[-1][:1], old, new)
+        else:
+            raise PatchError(path, i + 1, f'unexpected line in hunk: {line.rstrip()!r}')
+        raw.append(line)
+        i += 1
+    missing = old_count - len(old)
+    if missing != new_count - len(new) or (missing and (i < len(lines) or not changed)):
+        raise PatchError(path, i, f'hunk {raw[0].strip()} is truncated')
+    # A patch file cut short inside trailing context (as consistency-update.patch
+    # is) still applies; the hunk simply carries less context.
+    while i < len(lines) and lines[i][:1] == NO_NEWLINE:
+        _no_newline(raw[-1][:1], old, new)
+        raw.append(lines[i])
+        i += 1
+    # For an empty old side the header names the line after which to insert
+    line = old_start - 1 if old_count else old_start
+    current.hunks.append(Hunk(line, old, new, lead, trail, raw))
+    return i
+
+
+def _parse_normal(lines, i, m, current, path):
+    old_first, old_last, command = int(m.group(1)), int(m.group(2) or m.group(1)), m.group(3)
+    new_first, new_last = int(m.group(4)), int(m.group(5) or m.group(4))
+    old = []
+    new = []
+    raw = [lines[i]]
+    i += 1
+    if command in 'cd':
+        i = _read_prefixed(lines, i, '< ', old, old_last - old_first + 1, raw, path)
+    if command == 'c':
+        if i >= len(lines) or lines[i].rstrip('\r\n') != '---':
+            raise PatchError(path, i + 1, "expected '---' in change hunk")
+        raw.append(lines[i])
+        i += 1
+    if command in 'ca':
+        i = _read_prefixed(lines, i, '> ', new, new_last - new_first + 1, raw, path)
+    # 'a' inserts after old line old_first; 'c'/'d' start at it
+    line = old_first if command == 'a' else old_first - 1
+    current.hunks.append(Hunk(line, old, new, raw=raw))
+    return i
+
+
+def _read_prefixed(lines, i, prefix, out, count, raw, path):
+    for _ in range(count):
+        if i >= len(lines) or not lines[i].startswith(prefix):
+            raise PatchError(path, i + 1, f"expected {count} lines starting with '{prefix.strip()}'")
+        out.append(lines[i][2:])
+        raw.append(lines[i])
+        i += 1
+    if i < len(lines) and lines[i][:1] == NO_NEWLINE:
+        _strip_no_newline(out)
+        raw.append(lines[i])
+        i += 1
+    return i
+
+
+def _find_block(text, index, block, expected, floor):
+    """Line where `block` occurs whole-line, nearest to `expected` and not before `floor`."""
+    lo = index.line_start(floor)
+    pos = index.line_start(expected)
+    size = len(text)
+
+    def whole_lines(p):
+        return (p == 0 or text[p - 1] == '\n') and (block.endswith('\n') or p + len(block) == size)
+
+    after = text.find(block, pos)
+    while after != -1 and not whole_lines(after):
+        after = text.find(block, after + 1)
+    before = text.rfind(block, lo, pos + len(block) - 1)
+    while before != -1 and not whole_lines(before):
+        before = text.rfind(block, lo, before + len(block) - 1)
+
+    found = [index.line_of(p) for p in (after, before) if p != -1]
+    if not found:
+        return None
+    return min(found, key=lambda line: (abs(line - expected), line))
+
+
+def place_hunks(text, hunks, fuzz=DEFAULT_FUZZ):
+    """Locate every hunk in one forward pass.
+
+    Returns ([(start, end, replacement)], results) where results holds one
+    (hunk, status, line, offset, fuzz) per hunk. Before any fuzz is tried, a
+    hunk whose old lines are not in the text but whose new lines are is
+    PRESENT, like `patch -N`; when that happens to the first hunk the patch
+    is taken to be applied already (or reversed) and every hunk is PRESENT.
+    """
+    index = LineIndex(text)
+    total = len(index)
+    replacements = []
+    results = []
+    offset = 0
+    floor = 0
+    for number, hunk in enumerate(hunks):
+        placed = None
+        present = None
+        if not hunk.old:
+            line = min(max(hunk.line + offset, floor), total)
+            placed = (line, 0, 0, 0)
+        else:
+            for level in range(min(fuzz, max(hunk.lead, hunk.trail)) + 1):
+                lead = min(level, hunk.lead)
+                trail = min(level, hunk.trail)
+                old = hunk.old[lead:len(hunk.old) - trail]
+                if not old:
+                    break
+                expected = min(max(hunk.line + lead + offset, floor), total)
+                line = _find_block(text, index, ''.join(old), expected, floor)
+                if line is not None:
+                    placed = (line, lead, trail, level)
+                    break
+                if level == 0 and len(hunk.new) > hunk.lead + hunk.trail:
+                    # Fuzz must not place a hunk whose result is already there
+                    present = _find_block(text, index, ''.join(hunk.new), expected, floor)
+                    if present is not None:
+                        break
+        if present is not None and number == 0:
+            # Reversed (or previously applied) patch: skip all of it
+            results.append((hunk, PRESENT, present, present - hunk.line, 0))
+            results.extend((later, PRESENT, None, None, None) for later in hunks[1:])
+            return [], results
+        if placed is None:
+            if present is None:
+                results.append((hunk, FAILED, None, None, None))
+            else:
+                results.append((hunk, PRESENT, present, present - hunk.line, 0))
+            continue
+        line, lead, trail, level = placed
+        old_size = len(hunk.old) - lead - trail
+        start = index.line_start(line)
+        end = index.line_start(line + old_size)
+        replacements.append((start, end, ''.join(hunk.new[lead:len(hunk.new) - trail])))
+        offset = line - lead - hunk.line
+        floor = line + old_size
+        results.append((hunk, APPLIED, line - lead, offset, level))
+    return replacements, results
+
+
+def apply_patches(patch_paths, target=None, fuzz=DEFAULT_FUZZ, dry_run=False, root='.', validate=True):
+    """Apply patch files in order, writing each touched file once at the end.
+
+    Later patches see the output of earlier ones. Normal diffs apply to
+    `target` (default DEFAULT_FILE). Returns [(patch, path, results,
+    deleted)], with results as from place_hunks() and deleted None unless
+    the patch is to /dev/null: then True if the file is (or already was)
+    gone, False if it was kept because hunks failed or lines were left.
+    Failed hunks are written to path + '.rej'. With validate, PatchError is
+    raised and nothing written if a patched JS/JSX file would no longer parse.
+    """
+    docs = {}    # path -> PieceTable, or None once deleted
+    rejects = {}
+    report = []
+    for patch_path in patch_paths:
+        with open(patch_path, 'r', newline='', encoding='utf-8', errors='surrogateescape') as f:
+            file_patches = parse_patch(f.read(), patch_path)
+        for file_patch in file_patches:
+            path = os.path.join(root, file_patch.path or target or DEFAULT_FILE)
+            if path in docs:
+                doc = docs[path]
+            else:
+                try:
+                    with open(path, 'r', newline='', encoding='utf-8', errors='surrogateescape') as f:
+                        doc = f.read()
+                except FileNotFoundError:
+                    if file_patch.header and '/dev/null' not in ''.join(file_patch.header):
+                        raise
+                    doc = None
+            if doc is None and file_patch.deletes:
+                # Gone already, from the work tree or by an earlier patch
+                report.append((patch_path, path, [(hunk, PRESENT, None, None, None)
+                                                  for hunk in file_patch.hunks], True))
+                continue
+            text = '' if doc is None else doc if isinstance(doc, str) else str(doc)
+            if file_patch.creates and text:
+                # The file exists: fine if it is the patch's, a conflict otherwise
+                status = PRESENT if text == ''.join(''.join(h.new) for h in file_patch.hunks) else FAILED
+                replacements = []
+                results = [(hunk, status, None, None, None) for hunk in file_patch.hunks]
+            else:
+                replacements, results = place_hunks(text, file_patch.hunks, fuzz)
+            docs[path] = PieceTable.from_replacements(text, replacements)
+            failed = [r[0] for r in results if r[1] is FAILED]
+            if failed:
+                rejects.setdefault(path, []).append((patch_path, file_patch, failed))
+            deleted = None
+            if file_patch.deletes:
+                deleted = not failed and not len(docs[path])
+                if deleted:
+                    docs[path] = None
+            report.append((patch_path, path, results, deleted))
+
+    if validate:
+        for path, doc in docs.items():
+            if doc is not None and jsx_lexer.is_source(path):
+                try:
+                    jsx_lexer.validate(str(doc), chunk_cache.for_file(path))
+                except jsx_lexer.LexError as e:
+                    raise PatchError(path, e.line, f'patched file would not parse: {e.message}') from None
+    if not dry_run:
+        for path, doc in docs.items():
+            if doc is None:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            write_atomic(path, (chunk.encode('utf-8', 'surrogateescape') for chunk in doc.chunks()),
+                         prefix='.patch-')
+        for path, entries in rejects.items():
+            with open(path + '.rej', 'w', newline='', encoding='utf-8', errors='surrogateescape') as f:
+                for patch_path, file_patch, failed in entries:
+                    f.write(f'# {patch_path}\n')
+                    f.writelines(file_patch.header[-2:])
+                    for hunk in failed:
+                        f.writelines(hunk.raw)
+    return report
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Apply normal or unified .patch files in order.')
+    parser.add_argument('patches', nargs='+', help='patch files, applied in the order given')
+    parser.add_argument('--target', help=f'file that normal-format diffs apply to (default: {DEFAULT_FILE})')
+    parser.add_argument('-F', '--fuzz', type=int, default=DEFAULT_FUZZ,
+                        help=f'context lines a hunk may ignore at each end (default: {DEFAULT_FUZZ})')
+    parser.add_argument('-d', '--directory', default='.', help='directory patch paths are relative to')
+    parser.add_argument('--dry-run', action='store_true', help='report where hunks would go; write nothing')
+    parser.add_argument('--no-validate', dest='validate', action='store_false',
+                        help='write patched JS/JSX even if it no longer parses')
+    args = parser.parse_args(argv)
+
+    try:
+        report = apply_patches(args.patches, args.target, args.fuzz, args.dry_run, args.directory,
+                               args.validate)
+    except (PatchError, OSError) as e:
+        print(f"ERROR: {e}")
+        print("  Nothing was written")
+        return 2
+
+    counts = {APPLIED: 0, PRESENT: 0, FAILED: 0}
+    rejected = set()
+    for patch_path, path, results, deleted in report:
+        print(f"{patch_path} -> {path}: {len(results)} hunks")
+        if deleted and results and results[0][2] is None:
+            counts[PRESENT] += len(results)
+            print("  already deleted, skipped")
+            continue
+        if results and results[0][2] is None and results[0][1] is not FAILED:
+            counts[PRESENT] += len(results)
+            print("  already created, skipped")
+            continue
+        for number, (hunk, status, line, offset, level) in enumerate(results, 1):
+            counts[status] += 1
+            if status is FAILED:
+                rejected.add(path)
+                print(f"  hunk {number} (line {hunk.line + 1}): FAILED")
+                continue
+            if status is PRESENT:
+                if line is None:
+                    print(f"  hunk {number}: skipped with the rest of the patch")
+                elif number == 1 and len(results) > 1 and all(r[2] is None for r in results[1:]):
+                    print(f"  hunk {number}: reversed (or previously applied) patch detected "
+                          f"at line {line + 1}, skipping the patch")
+                else:
+                    print(f"  hunk {number}: already applied at line {line + 1}, skipped")
+                continue
+            notes = []
+            if offset:
+                notes.append(f"offset {offset:+d} lines")
+            if level:
+                notes.append(f"fuzz {level}")
+            print(f"  hunk {number}: line {line + 1}" + (f" ({', '.join(notes)})" if notes else ''))
+        if deleted:
+            print(f"  {path} {'would be deleted' if args.dry_run else 'deleted'}")
+        elif deleted is False and path not in rejected:
+            print(f"  WARNING: not deleting {path}: it has lines the patch does not remove")
+
+    print()
+    failed = counts[FAILED]
+    print(f"Patches: {len(args.patches)}; hunks applied: {counts[APPLIED]}, "
+          f"already applied: {counts[PRESENT]}, failed: {failed}")
+    if failed:
+        verb = 'would be saved' if args.dry_run else 'saved'
+        print(f"WARNING: Rejected hunks {verb} to " + ', '.join(p + '.rej' for p in sorted(rejected)))
+    elif args.dry_run:
+        print("✓ All hunks apply (dry run, nothing written)")
+    else:
+        print("✓ All patches applied")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""Benchmark the conflict resolver and the edit engines on synthetic JSX.
+
+Each case is KanbanBoard.jsx repeated 1x to 50x, with conflict hunks and
+codemod anchor lines spread evenly through it. Every engine runs on every
+case; wall time is the best of --repeat runs, throughput is input MB per
+second of that time, and peak memory is what tracemalloc sees during one
+extra run (Python allocations only, so an mmap'd input does not count).
+
+    python bench.py                      # all scales, compare with the baseline
+    python bench.py --scales 1,10 --save # record a new baseline
+    python bench.py --hunks 0 --unmatched  # worst case: a <<<<<<< that never closes
+
+Engines:
+    resolve        resolve_conflicts() on the decoded text, output streamed
+    resolve-bytes  resolve_buffer() on the raw bytes, as resolve_file() does
+    replace-chain  one content.replace() per anchor, as the feature scripts did
+    codemod        codemod.apply_edits(), output streamed
+
+Results are compared with the baseline in .git/trackli-bench.json; a time or
+peak more than --tolerance above it is flagged and the exit status is 1.
+Timings depend on the machine, so the baseline is per checkout and not
+committed.
+"""
+
+import json
+import os
+import sys
+import time
+
+from codemod import AnchorError, Edit, apply_edits
+from resolve_conflicts import DEFAULT_FILE, ConflictError, resolve_buffer, resolve_conflicts
+
+SCALES = (1, 2, 5, 10, 20, 50)
+BASELINE_NAME = 'trackli-bench.json'
+DEFAULT_HUNKS = 50
+DEFAULT_ANCHORS = 11
+DEFAULT_TOLERANCE = 0.25
+# Differences below this are timer noise whatever the ratio
+MIN_SLOWDOWN = 0.005
+
+# What a feature recipe typically puts in place of an anchor
+REPLACEMENT = '''  const [isListening, setIsListening] = useState(false)
+  const recognitionRef = useRef(null)
+
+  useEffect(() => {
+    const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition
+    setVoiceSupported(!!SpeechRecognition)
+  }, [])
+'''
+
+
+class Case:
+    """A generated file: its text, its bytes and the edits for its anchors."""
+
+    def __init__(self, scale, text, edits):
+        self.scale = scale
+        self.text = text
+        self.data = text.encode('utf-8', 'surrogateescape')
+        self.edits = edits
+
+    @property
+    def name(self):
+        return f'{self.scale}x'
+
+
+def _hunk(index):
+    """Conflict lines for the index-th hunk, cycling through the shapes git writes."""
+    ours = [f'  const value{index} = computeOurs({index})\n']
+    base = [f'  const value{index} = compute({index})\n']
+    theirs = [f'  const value{index} = computeTheirs({index})\n',
+              f'  logChange({index})\n']
+    kind = index % 3
+    if kind == 0:
+        # Only theirs changed: auto-merges to theirs
+        ours = base
+    lines = ['<<<<<<< HEAD\n', *ours]
+    if kind != 2:
+        # kind 2 is a two-way conflict without a diff3 base section
+        lines += ['||||||| base\n', *base]
+    return lines + ['=======\n', *theirs, '>>>>>>> develop\n']
+
+
+def _spread(count, total, phase=0.0):
+    """count line numbers evenly spaced over range(total)."""
+    return [min(total - 1, int((i + phase) * total / count)) for i in range(count)]
+
+
+def generate(seed, scale=1, hunks=DEFAULT_HUNKS, anchors=DEFAULT_ANCHORS, missing=0,
+             unmatched=False):
+    """Build a Case from seed text repeated scale times.
+
+    hunks conflicts and anchors anchor lines are inserted at evenly spaced
+    line boundaries (the anchors half a gap after the hunks). missing adds
+    edits whose anchors occur nowhere, so every engine scans the whole file
+    for them. unmatched adds a <<<<<<< that never closes after the last
+    hunk, so the resolver buffers the rest of the file before failing (all
+    of it with hunks=0).
+    """
+    lines = seed.splitlines(keepends=True) * scale
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    inserts = {}
+    hunk_lines = _spread(hunks, len(lines)) if hunks else []
+    for index, line in enumerate(hunk_lines):
+        inserts.setdefault(line, []).extend(_hunk(index))
+    if unmatched:
+        # After the last hunk, so the earlier ones still resolve
+        inserts.setdefault(hunk_lines[-1] + 1 if hunk_lines else 0, []).insert(0, '<<<<<<< HEAD\n')
+    edits = []
+    for index, line in enumerate(_spread(anchors, len(lines), 0.5) if anchors else ()):
+        anchor = f'  // bench-anchor-{index}\n'
+        inserts.setdefault(line, []).append(anchor)
+        edits.append(Edit(anchor, REPLACEMENT, f'anchor-{index}'))
+    for index in range(missing):
+        edits.append(Edit(f'// bench-missing-{index}\n', REPLACEMENT, f'missing-{index}', expect=None))
+
+    out = []
+    for number, line in enumerate(lines):
+        out.extend(inserts.get(number, ()))
+        out.append(line)
+    return Case(scale, ''.join(out), edits)
+
+
+def _drain(doc):
+    """Consume a PieceTable's chunks the way a write does, without the disk."""
+    return sum(len(chunk) for chunk in doc.chunks())
+
+
+def run_resolve(case):
+    return _drain(resolve_conflicts(case.text, case.name))
+
+
+def run_resolve_bytes(case):
+    doc = resolve_buffer(case.data, case.name)
+    return len(case.data) if doc is None else _drain(doc)
+
+
+def run_replace_chain(case):
+    content = case.text
+    for edit in case.edits:
+        content = content.replace(edit.anchor, edit.replacement)
+    return len(content)
+
+
+def run_codemod(case):
+    doc, _ = apply_edits(case.text, case.edits)
+    return _drain(doc)
+
+
+ENGINES = {
+    'resolve': run_resolve,
+    'resolve-bytes': run_resolve_bytes,
+    'replace-chain': run_replace_chain,
+    'codemod': run_codemod,
+}
+
+
+def measure(engine, case, repeat=5):
+    """{'seconds', 'mb_per_s', 'peak', 'error'} for one engine on one case."""
+    import gc
+    import tracemalloc
+
+    gc.collect()
+    error = None
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            engine(case)
+        except (ConflictError, AnchorError) as e:
+            error = str(e)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        engine(case)
+    except (ConflictError, AnchorError):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'seconds': best,
+        'mb_per_s': len(case.data) / (1 << 20) / best if best else 0.0,
+        'peak': peak,
+        'error': error,
+    }
+
+
+def default_baseline_path():
+    """.git/trackli-bench.json in the current repository, or None outside one."""
+    from mapped_file import git_dir
+
+    root = git_dir(os.getcwd())
+    return os.path.join(root, BASELINE_NAME) if root else None
+
+
+def load_baseline(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, params, results):
+    from mapped_file import write_atomic
+
+    write_atomic(path, [json.dumps({'params': params, 'results': results}, indent=2, sort_keys=True).encode()],
+                 prefix='.bench-')
+
+
+def regressions(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Messages for every time or peak more than tolerance above the baseline."""
+    found = []
+    for key, now in current.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if (now['seconds'] > before['seconds'] * (1 + tolerance)
+                and now['seconds'] - before['seconds'] > MIN_SLOWDOWN):
+            found.append(f"{key}: {now['seconds'] * 1000:.1f} ms, was {before['seconds'] * 1000:.1f} ms")
+        if now['peak'] > before['peak'] * (1 + tolerance):
+            found.append(f"{key}: peak {_mb(now['peak'])}, was {_mb(before['peak'])}")
+    return found
+
+
+def _mb(size):
+    return f'{size / (1 << 20):.1f} MB'
+
+
+def _scales(value):
+    try:
+        scales = tuple(int(s) for s in value.split(','))
+    except ValueError:
+        scales = ()
+    if not scales or min(scales) < 1:
+        import argparse
+        raise argparse.ArgumentTypeError(f'expected positive integers like 1,5,50, got {value!r}')
+    return scales
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the resolver and edit engines on synthetic JSX.')
+    parser.add_argument('--seed', default=DEFAULT_FILE, help=f'file to repeat (default: {DEFAULT_FILE})')
+    parser.add_argument('--scales', type=_scales, default=SCALES,
+                        help='comma-separated size multiples (default: %(default)s)')
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help='comma-separated engines to run (default: all)')
+    parser.add_argument('--hunks', type=int, default=DEFAULT_HUNKS, help='conflict hunks per file')
+    parser.add_argument('--anchors', type=int, default=DEFAULT_ANCHORS, help='codemod anchors per file')
+    parser.add_argument('--missing', type=int, default=0, help='extra anchors that never match')
+    parser.add_argument('--unmatched', action='store_true',
+                        help='open a conflict after the last hunk that is never closed')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per case (best is kept)')
+    parser.add_argument('--baseline', help=f'baseline file (default: .git/{BASELINE_NAME})')
+    parser.add_argument('--save', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown or memory growth as a fraction (default: %(default)s)')
+    parser.add_argument('--write', metavar='DIR', help='also write the generated files to DIR')
+    args = parser.parse_args(argv)
+
+    engines = args.engines.split(',')
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engine {unknown[0]!r}; choose from {', '.join(ENGINES)}")
+    try:
+        with open(args.seed, encoding='utf-8', errors='surrogateescape') as f:
+            seed = f.read()
+    except OSError as e:
+        print(f"ERROR: cannot read {args.seed}: {e.strerror}")
+        return 2
+
+    params = {'seed': os.path.basename(args.seed), 'hunks': args.hunks, 'anchors': args.anchors,
+              'missing': args.missing, 'unmatched': args.unmatched}
+    results = {}
+    print(f"{'case':>6} {'engine':<14} {'size':>9} {'time':>10} {'MB/s':>8} {'peak':>9}")
+    for scale in args.scales:
+        case = generate(seed, scale, args.hunks, args.anchors, args.missing, args.unmatched)
+        if args.write:
+            os.makedirs(args.write, exist_ok=True)
+            with open(os.path.join(args.write, f'bench-{case.name}.jsx'), 'wb') as f:
+                f.write(case.data)
+        for name in engines:
+            result = measure(ENGINES[name], case, args.repeat)
+            results[f'{name} {case.name}'] = result
+            note = '  (raised)' if result['error'] else ''
+            print(f"{case.name:>6} {name:<14} {_mb(len(case.data)):>9} {result['seconds'] * 1000:>7.1f} ms "
+                  f"{result['mb_per_s']:>8.1f} {_mb(result['peak']):>9}{note}")
+        del case
+
+    baseline_path = args.baseline or default_baseline_path()
+    baseline = load_baseline(baseline_path)
+    print()
+    status = 0
+    if args.save:
+        if not baseline_path:
+            print("ERROR: not in a git repository; pass --baseline PATH")
+            return 2
+        save_baseline(baseline_path, params, results)
+        print(f"✓ Baseline saved to {baseline_path}")
+    elif baseline is None:
+        print("No baseline yet; run with --save to record one")
+    elif baseline['params'] != params:
+        print(f"WARNING: baseline was recorded with {baseline['params']}; not comparing")
+    else:
+        found = regressions(results, baseline['results'], args.tolerance)
+        for message in found:
+            print(f"REGRESSION {message}")
+        if found:
+            print(f"WARNING: {len(found)} results more than {args.tolerance:.0%} worse than the baseline")
+            status = 1
+        else:
+            print("✓ No regressions against the baseline")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Content-defined chunk cache that lets validation skip unchanged text.
+
+jsx_lexer.validate() costs ~60 ms on KanbanBoard.jsx and every tool that
+writes the file runs it again, after every branch switch, from the first
+byte. This cache remembers what the lexer made of each piece of the file so
+that only the pieces that really differ get lexed again.
+
+Files are cut into chunks at line starts picked by a gear rolling hash over
+the lines (each line's CRC is shifted into the hash and a cut falls where
+its low CUT_BITS bits are zero, subject to MIN_CHUNK and MAX_CHUNK). A cut
+depends only on the few lines before it, so an edit moves at most the cuts
+next to it. Every other chunk keeps its exact text and hash, even when the
+text around it has moved.
+
+For each chunk the cache stores the lexer state it ends in (bracket, tag
+and template stack, JSX tag names and the operand flag), keyed by the
+chunk's text and the state it starts in. A run replays stored states and
+lexes only the chunks it has not seen in that state. A chunk that fails to
+lex is merged with the next one, because a literal can run over a cut. If
+the text does not lex at all, the plain jsx_lexer.validate() runs instead,
+so the error and its line numbers are exactly the ones a full scan reports.
+
+The entries live in one marshal file in the git dir, in least recently used
+order, and the oldest are dropped beyond max_entries when it is saved.
+
+    python chunk_cache.py check src/components/KanbanBoard.jsx
+    python chunk_cache.py stats
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+import zlib
+from bisect import bisect_left
+from collections import deque
+from itertools import accumulate
+
+CACHE_NAME = 'trackli-chunk-cache.bin'
+FORMAT_VERSION = 1
+DEFAULT_MAX_ENTRIES = 8192
+
+# Chunk sizes in characters; cuts fall on average every 2**CUT_BITS lines
+MIN_CHUNK = 1024
+MAX_CHUNK = 32768
+CUT_BITS = 7
+CUT_MASK = (1 << CUT_BITS) - 1
+
+
+def _gear(h, line_hash):
+    return ((h << 1) + line_hash) & 0xffffffff
+
+
+def chunk_bounds(text):
+    """Offsets of the chunks text is cut into, starting with 0; all line starts."""
+    lines = text.encode('utf-8', 'surrogateescape').split(b'\n')
+    # Hash, cut candidates and line ends are all computed by C loops; only
+    # the ~1 in 2**CUT_BITS candidate lines are looked at one by one
+    rolling = accumulate(map(zlib.crc32, lines), _gear)
+    candidates = [i for i, h in enumerate(rolling) if not h & CUT_MASK]
+    if not text.isascii():
+        lines = text.split('\n')
+    ends = list(accumulate(map((1).__add__, map(len, lines))))
+    last = len(text)
+    bounds = [0]
+    start = 0
+    for i in candidates + [len(ends) - 1]:
+        while ends[i] - start > MAX_CHUNK:
+            # No cut for too long: force one at the first line past MAX_CHUNK
+            start = ends[bisect_left(ends, start + MAX_CHUNK)]
+            if start >= last:
+                return bounds
+            bounds.append(start)
+        if ends[i] - start >= MIN_CHUNK and ends[i] < last:
+            start = ends[i]
+            bounds.append(start)
+    return bounds
+
+
+def _state_key(lexer):
+    return f"{int(lexer.operand)}{''.join(lexer.stack)}\0{chr(1).join(lexer.names)}".encode()
+
+
+class ChunkCache:
+    """Lexer end states per (chunk, start state), evicted least recently used."""
+
+    __slots__ = ('path', 'max_entries', 'entries', 'dirty', 'hits', 'misses')
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.dirty = False
+        self.hits = self.misses = 0
+        try:
+            with open(path, 'rb') as f:
+                stored = marshal.loads(f.read())
+        except (FileNotFoundError, EOFError, ValueError, TypeError):
+            stored = None
+        if isinstance(stored, tuple) and len(stored) == 2 and stored[0] == FORMAT_VERSION:
+            self.entries = stored[1]
+        else:
+            self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        value = self.entries.pop(key, None)
+        if value is not None:
+            # Re-inserting moves the entry to the most recently used end
+            self.entries[key] = value
+            self.dirty = True
+        return value
+
+    def put(self, key, value):
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        self.dirty = True
+
+    def save(self):
+        """Write the entries back, dropping the least recently used beyond max_entries."""
+        if not self.dirty:
+            return
+        from mapped_file import write_atomic
+
+        excess = len(self.entries) - self.max_entries
+        if excess > 0:
+            stale = list(self.entries)[:excess]
+            for key in stale:
+                del self.entries[key]
+        try:
+            write_atomic(self.path, [marshal.dumps((FORMAT_VERSION, self.entries))], prefix='.chunk-cache-')
+        except OSError:
+            # A cache that cannot be written only costs time
+            return
+        self.dirty = False
+
+    def clear(self):
+        self.entries = {}
+        self.dirty = True
+
+    def validate(self, text):
+        """jsx_lexer.validate(text), lexing only the chunks not seen before."""
+        from jsx_lexer import LexError, Lexer, validate
+
+        lexer = Lexer(text)
+        bounds = chunk_bounds(text)
+        bounds.append(len(text))
+        data = text.encode('utf-8', 'surrogateescape') if text.isascii() else None
+        try:
+            k = 0
+            while k < len(bounds) - 1:
+                start = bounds[k]
+                stack, names, opened, operand = (list(lexer.stack), list(lexer.names),
+                                                 list(lexer.opened), lexer.operand)
+                state = _state_key(lexer)
+                # Grow the chunk over the next cut until it lexes on its own
+                for j in range(k + 1, len(bounds)):
+                    end = bounds[j]
+                    chunk = data[start:end] if data is not None else \
+                        text[start:end].encode('utf-8', 'surrogateescape')
+                    key = hashlib.blake2b(state + b'\0' + chunk, digest_size=16).digest()
+                    value = self.get(key)
+                    if value is not None:
+                        self.hits += 1
+                        self._restore(lexer, value, start)
+                        break
+                    try:
+                        deque(lexer.events(start, end), maxlen=0)
+                    except LexError:
+                        if end == len(text):
+                            raise
+                        lexer.stack, lexer.names, lexer.opened, lexer.operand = (
+                            list(stack), list(names), list(opened), operand)
+                        continue
+                    self.misses += 1
+                    self.put(key, (lexer.operand, ''.join(lexer.stack), tuple(lexer.names)))
+                    break
+                k = j
+            lexer.finish()
+        except LexError:
+            # Report exactly what a full scan reports
+            validate(text)
+        finally:
+            self.save()
+
+    @staticmethod
+    def _restore(lexer, value, start):
+        operand, kinds, names = value
+        # Openers still on the stack keep their positions, new ones are
+        # placed at the chunk start (positions only appear in error messages,
+        # which always come from a full scan)
+        keep = 0
+        for keep, (kind, name, old_kind, old_name) in enumerate(
+                zip(kinds, names, lexer.stack, lexer.names)):
+            if kind != old_kind or name != old_name:
+                break
+        else:
+            keep = min(len(kinds), len(lexer.stack))
+        lexer.stack = list(kinds)
+        lexer.names = list(names)
+        lexer.opened = lexer.opened[:keep] + [start] * (len(kinds) - keep)
+        lexer.operand = operand
+
+
+def cache_path(cwd):
+    """The cache file in the git dir of the repository at cwd, or None outside git."""
+    from mapped_file import git_dir
+
+    root = git_dir(cwd)
+    return os.path.join(root, CACHE_NAME) if root else None
+
+
+_caches = {}
+
+
+def for_file(file_path):
+    """The shared cache for the repository holding file_path, or None outside git."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    if directory not in _caches:
+        path = cache_path(directory)
+        cache = None
+        if path is not None:
+            # One ChunkCache per cache file, however many directories lead to it
+            cache = next((c for c in _caches.values() if c is not None and c.path == path), None)
+            cache = cache or ChunkCache(path)
+        _caches[directory] = cache
+    return _caches[directory]
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Inspect the chunk cache behind cached validation.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    check_cmd = sub.add_parser('check', help='validate files through the cache and show what was re-lexed')
+    check_cmd.add_argument('files', nargs='+')
+    sub.add_parser('stats', help='show the size of the cache')
+    sub.add_parser('clear', help='drop every entry')
+    args = parser.parse_args(argv)
+
+    path = cache_path(os.getcwd())
+    if path is None:
+        print("ERROR: not inside a git repository")
+        return 2
+    cache = ChunkCache(path)
+    if args.command == 'stats':
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        print(f"{path}: {len(cache)} entries (limit {cache.max_entries}), {size // 1024} KB")
+        return 0
+    if args.command == 'clear':
+        cache.clear()
+        cache.save()
+        print(f"✓ Cleared {path}")
+        return 0
+
+    from jsx_lexer import LexError
+
+    failed = 0
+    for file_path in args.files:
+        with open(file_path, 'r', newline='', encoding='utf-8', errors='surrogateescape') as f:
+            text = f.read()
+        hits, misses = cache.hits, cache.misses
+        started = time.perf_counter()
+        try:
+            cache.validate(text)
+        except LexError as e:
+            print(f"ERROR: {file_path}: {e}")
+            failed += 1
+            continue
+        print(f"✓ {file_path}: {cache.hits - hits} chunks reused, {cache.misses - misses} lexed "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,551 @@
+"""Apply a batch of anchor/replacement edits to a file in one pass.
+
+Feature scripts such as `Addtl Files/add_voice_feature.py` describe their
+changes as (anchor, replacement) pairs. Chaining `content.replace()` for each
+pair rescans the whole file and allocates a full-size copy per edit; here
+every anchor is located in the original text first, the matches are merged
+into one ordered list, and the result is a PieceTable of spans over the
+original that is streamed to disk once. Files are memory-mapped and edited
+as bytes (anchors are encoded to UTF-8), so untouched spans, CRLF endings
+included, are copied through unchanged, and the file is replaced atomically.
+
+Anchors are matched against the original text, not against the output of
+earlier edits, so a recipe whose later anchors depend on earlier
+replacements must be split into separate passes. Overlapping matches are
+rejected rather than silently resolved.
+
+By default every anchor must match exactly once; a drifted anchor stops the
+run before anything is written, and so does JS/JSX output whose brackets,
+tags or literals no longer balance (see jsx_lexer.validate). Run a recipe
+with --dry-run to check its anchors and preview the unified diff without
+touching the file.
+
+Applied recipes are fingerprinted (recipe hash, input hash, output hash) in
+.git/trackli-recipes.json, so re-running a recipe on the file it produced is
+a no-op, and --revert applies the inverse edits.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from bisect import bisect_right
+
+import chunk_cache
+import jsx_lexer
+from mapped_file import git_dir, map_file, write_atomic
+from piece_table import PieceTable
+
+
+class AnchorError(ValueError):
+    """Raised when edits overlap or cannot be applied as written."""
+
+
+class Edit:
+    """Replace every occurrence of `anchor` with `replacement`.
+
+    `expect` is the number of matches the edit must have (None for any).
+    """
+
+    __slots__ = ('anchor', 'replacement', 'name', 'expect')
+
+    def __init__(self, anchor, replacement, name=None, expect=1):
+        if not anchor:
+            raise AnchorError(f'edit {name or "?"} has an empty anchor')
+        self.anchor = anchor
+        self.replacement = replacement
+        self.name = name
+        self.expect = expect
+
+    def __repr__(self):
+        return f'<Edit {self.name or self.anchor[:30]!r}>'
+
+
+class LineIndex:
+    """Offsets of every line start in a text, for offset -> line number lookups."""
+
+    def __init__(self, text):
+        starts = [0]
+        find = text.find
+        pos = find('\n')
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find('\n', pos + 1)
+        self.starts = starts
+        self.size = len(text)
+
+    def __len__(self):
+        """Number of lines; a trailing newline does not start a new one."""
+        if self.starts[-1] == self.size and len(self.starts) > 1:
+            return len(self.starts) - 1
+        return len(self.starts)
+
+    def line_of(self, offset):
+        """0-based line containing the character at offset."""
+        return bisect_right(self.starts, offset) - 1
+
+    def line_start(self, line):
+        return self.starts[line] if line < len(self.starts) else self.size
+
+    def line_end(self, line):
+        """Offset just past line's newline (or the end of the text)."""
+        return self.starts[line + 1] if line + 1 < len(self.starts) else self.size
+
+
+def find_all(text, anchor):
+    """Yield the start offset of every non-overlapping occurrence, like str.replace."""
+    step = len(anchor)
+    pos = text.find(anchor)
+    while pos != -1:
+        yield pos
+        pos = text.find(anchor, pos + step)
+
+
+def locate(text, edits, fuzz=None, profile=None):
+    """Return (start, end, edit_index) for every match, ordered by position.
+
+    Each anchor is searched with str.find, which scans in C without copying
+    the text; only the match offsets are kept. When `fuzz` is set, anchors
+    with no exact match fall back to anchor_index.TokenIndex, built once per
+    text, which ignores whitespace and tolerates up to `fuzz` changed tokens.
+
+    text may also be a bytes buffer such as an mmap; anchors are then
+    searched as UTF-8 and the offsets are byte offsets. With a
+    profiling.Profile, each anchor's search is recorded as one lap.
+    """
+    binary = not isinstance(text, str)
+    matches = []
+    token_index = None
+    if profile is not None:
+        profile.mark()
+    for index, edit in enumerate(edits):
+        anchor = edit.anchor.encode('utf-8', 'surrogateescape') if binary else edit.anchor
+        size = len(anchor)
+        found = [(start, start + size) for start in find_all(text, anchor)]
+        how = 'exact' if found else None
+        if not found and fuzz is not None:
+            if token_index is None:
+                from anchor_index import TokenIndex
+                token_index = TokenIndex(str(text, 'utf-8', 'surrogateescape') if binary else text)
+            found = [(start, end) for start, end, _ in token_index.find(edit.anchor, fuzz)]
+            if binary:
+                found = [(_byte_offset(token_index.text, start), _byte_offset(token_index.text, end))
+                         for start, end in found]
+            how = 'fuzzy' if found else None
+        matches.extend((start, end, index) for start, end in found)
+        if profile is not None:
+            profile.lap('edit', _label(edits, index), scanned=len(text),
+                        copied=len(edit.replacement) * len(found), matches=len(found), detail=how)
+    matches.sort()
+
+    for (start, end, a), (next_start, _, b) in zip(matches, matches[1:]):
+        if next_start < end:
+            raise AnchorError(
+                f'anchors of {_label(edits, a)} and {_label(edits, b)} overlap at offset {next_start}'
+            )
+    return matches
+
+
+def _byte_offset(text, offset):
+    return len(text[:offset].encode('utf-8', 'surrogateescape'))
+
+
+def _label(edits, index):
+    return edits[index].name or f'edit #{index + 1}'
+
+
+def verify(text, edits, fuzz=None, profile=None):
+    """Locate all anchors and check each matched as often as it expects.
+
+    Returns (matches, counts, problems) where problems is a list of messages.
+    """
+    matches = locate(text, edits, fuzz, profile)
+    counts = [0] * len(edits)
+    for _, _, index in matches:
+        counts[index] += 1
+    problems = []
+    for index, (edit, count) in enumerate(zip(edits, counts)):
+        if edit.expect is not None and count != edit.expect:
+            problems.append(f'{_label(edits, index)}: expected {edit.expect} '
+                            f'match{"es" if edit.expect != 1 else ""}, found {count}')
+    return matches, counts, problems
+
+
+def unified_diff(text, matches, edits, path, context=3, index=None):
+    """Render the effect of the matched edits as a unified diff.
+
+    Hunks are built straight from the match offsets and the line index, so
+    the cost depends on the edits rather than on diffing the whole file.
+    """
+    index = index or LineIndex(text)
+    total = len(index)
+
+    # Expand matches to whole lines, folding matches that share a line into
+    # one change: [first_line, last_line_exclusive, new_text_pieces, cursor]
+    changes = []
+    for start, end, edit_index in matches:
+        first = index.line_of(start)
+        last = index.line_of(max(end - 1, start)) + 1
+        replacement = edits[edit_index].replacement
+        if changes and first < changes[-1][1]:
+            change = changes[-1]
+            change[2] += [text[change[3]:start], replacement]
+            change[1] = max(change[1], last)
+            change[3] = end
+        else:
+            changes.append([first, last, [text[index.line_start(first):start], replacement], end])
+    changes = [
+        (first, last, ''.join(pieces) + text[cursor:index.line_end(last - 1)])
+        for first, last, pieces, cursor in changes
+    ]
+
+    out = [f'--- a/{path}\n', f'+++ b/{path}\n']
+    group = []
+    for change in changes:
+        if group and change[0] - group[-1][1] > 2 * context:
+            out.extend(_diff_hunk(text, index, group, context, total))
+            group = []
+        group.append(change)
+    if group:
+        out.extend(_diff_hunk(text, index, group, context, total))
+    return out if len(out) > 2 else []
+
+
+def _diff_hunk(text, index, group, context, total):
+    def line(n):
+        content = text[index.line_start(n):index.line_end(n)]
+        return content if content.endswith('\n') else content + '\n\\ No newline at end of file\n'
+
+    first = max(group[0][0] - context, 0)
+    last = min(group[-1][1] + context, total)
+    body = []
+    old_count = new_count = 0
+    pos = first
+    for change_first, change_last, new in group:
+        for n in range(pos, change_first):
+            body.append(' ' + line(n))
+        for n in range(change_first, change_last):
+            body.append('-' + line(n))
+        new_lines = new.splitlines(keepends=True)
+        for new_line in new_lines:
+            body.append('+' + (new_line if new_line.endswith('\n') else new_line + '\n\\ No newline at end of file\n'))
+        old_count += change_first - pos + change_last - change_first
+        new_count += change_first - pos + len(new_lines)
+        pos = change_last
+    for n in range(pos, last):
+        body.append(' ' + line(n))
+    old_count += last - pos
+    new_count += last - pos
+    old_start = first + 1 if old_count else first
+    new_start = first + 1 if new_count else first
+    return [f'@@ -{old_start},{old_count} +{new_start},{new_count} @@\n'] + body
+
+
+def recipe_hash(edits):
+    """Stable hash of a recipe's edits, used to recognise it across runs."""
+    h = hashlib.sha256()
+    for edit in edits:
+        for part in (edit.name or '', edit.anchor, edit.replacement, str(edit.expect)):
+            h.update(part.encode('utf-8', 'surrogateescape'))
+            h.update(b'\0')
+    return h.hexdigest()
+
+
+def invert(edits):
+    """Edits that undo `edits` on the text they produced.
+
+    The replacements become anchors, so each must be non-empty and, like any
+    anchor, is checked for the expected match count when applied.
+    """
+    inverse = []
+    for index, edit in enumerate(edits):
+        if not edit.replacement:
+            raise AnchorError(f'{_label(edits, index)} deletes its anchor and cannot be reverted')
+        inverse.append(Edit(edit.replacement, edit.anchor, edit.name, edit.expect))
+    return inverse
+
+
+def _digest(text):
+    """sha256 of a str (as UTF-8) or of a bytes buffer."""
+    if isinstance(text, str):
+        text = text.encode('utf-8', 'surrogateescape')
+    return hashlib.sha256(text).hexdigest()
+
+
+class RecipeState:
+    """Fingerprints of applied recipes, stored as JSON in the git directory."""
+
+    FILE_NAME = 'trackli-recipes.json'
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.records = json.load(f)
+        except FileNotFoundError:
+            self.records = {}
+
+    @classmethod
+    def for_file(cls, file_path):
+        """State for the repository containing file_path, or None outside git."""
+        root = git_dir(os.path.dirname(os.path.abspath(file_path)))
+        return cls(os.path.join(root, cls.FILE_NAME)) if root else None
+
+    @staticmethod
+    def key(recipe, file_path):
+        return f'{recipe}:{os.path.realpath(file_path)}'
+
+    def get(self, recipe, file_path):
+        return self.records.get(self.key(recipe, file_path))
+
+    def is_applied(self, recipe, file_path, content=None):
+        """True if file_path still holds the output of this recipe.
+
+        A matching size and mtime answer without reading the file; otherwise
+        the content hash is compared.
+        """
+        record = self.get(recipe, file_path)
+        if record is None:
+            return False
+        st = os.stat(file_path)
+        if (st.st_size, st.st_mtime_ns) == (record['size'], record['mtime_ns']):
+            return True
+        return content is not None and _digest(content) == record['output']
+
+    def record(self, recipe, file_path, input_hash, output_hash):
+        st = os.stat(file_path)
+        self.records[self.key(recipe, file_path)] = {
+            'input': input_hash,
+            'output': output_hash,
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+        }
+        self.save()
+
+    def forget(self, recipe, file_path):
+        if self.records.pop(self.key(recipe, file_path), None) is not None:
+            self.save()
+
+    def save(self):
+        write_atomic(self.path, [json.dumps(self.records, indent=2, sort_keys=True).encode()],
+                     prefix='.recipes-')
+
+
+def apply_edits(text, edits, fuzz=None, profile=None):
+    """Apply all edits to text at once; return (PieceTable, match counts per edit)."""
+    matches = locate(text, edits, fuzz, profile)
+    counts = [0] * len(edits)
+    for _, _, index in matches:
+        counts[index] += 1
+    replacements = [(start, end, edits[index].replacement) for start, end, index in matches]
+    return PieceTable.from_replacements(text, replacements), counts
+
+
+def render(content, edits, file_path, fuzz=None, validate=True, profile=None):
+    """Apply edits to a file's bytes; return (PieceTable over them, match counts).
+
+    Raises AnchorError if any anchor does not match the expected number of
+    times and (with validate, for JS/JSX judged by file_path) LexError if the
+    result would no longer parse.
+    """
+    matches, counts, problems = verify(content, edits, fuzz, profile)
+    if problems:
+        raise AnchorError('; '.join(problems))
+    replacements = [(start, end, edits[index].replacement.encode('utf-8', 'surrogateescape'))
+                    for start, end, index in matches]
+    doc = PieceTable.from_replacements(memoryview(content), replacements)
+    if profile is not None:
+        profile.mark()
+    if validate and jsx_lexer.is_source(file_path):
+        try:
+            jsx_lexer.validate(bytes(doc).decode('utf-8', 'surrogateescape'), chunk_cache.for_file(file_path))
+        except BaseException:
+            doc.release()
+            raise
+        if profile is not None:
+            profile.lap('validate', file_path, scanned=len(doc))
+    return doc, counts
+
+
+def apply_to_file(file_path, edits, state=None, fuzz=None, validate=True, profile=None):
+    """Apply edits to a file in place and return the per-edit match counts.
+
+    Raises AnchorError, leaving the file untouched, if any anchor does not
+    match the expected number of times, and (with validate) LexError if the
+    edited JS/JSX would no longer parse. With a RecipeState, a file that
+    already holds this recipe's output is left alone and None is returned.
+    """
+    recipe = recipe_hash(edits) if state is not None else None
+    if state is not None and state.is_applied(recipe, file_path):
+        return None
+    with map_file(file_path) as content:
+        if state is not None and state.is_applied(recipe, file_path, content):
+            return None
+
+        doc, counts = render(content, edits, file_path, fuzz, validate, profile)
+        output = hashlib.sha256()
+
+        def hashed(chunks):
+            for chunk in chunks:
+                output.update(chunk)
+                yield chunk
+
+        try:
+            write_atomic(file_path, hashed(doc.chunks()), prefix='.codemod-')
+            if profile is not None:
+                profile.lap('write', file_path, copied=len(doc))
+        finally:
+            doc.release()
+        if state is not None:
+            state.record(recipe, file_path, _digest(content), output.hexdigest())
+    return counts
+
+
+def revert_file(file_path, edits, state=None, fuzz=None, validate=True, profile=None):
+    """Undo a recipe by applying its inverse edits; return the match counts."""
+    counts = apply_to_file(file_path, invert(edits), fuzz=fuzz, validate=validate, profile=profile)
+    if state is not None:
+        state.forget(recipe_hash(edits), file_path)
+    return counts
+
+
+def report(edits, counts, out=sys.stdout, lines=None):
+    """Print one line per edit with its match count (and line numbers if given)."""
+    for index, (edit, count) in enumerate(zip(edits, counts)):
+        ok = count == edit.expect if edit.expect is not None else count > 0
+        where = ''
+        if lines and lines.get(index):
+            where = ' at line ' + ', '.join(str(n) for n in lines[index])
+        out.write(f"  {'✓' if ok else '✗'} {_label(edits, index)}: "
+                  f"{count} match{'es' if count != 1 else ''}{where}\n")
+
+
+def dry_run(file_path, edits, out=sys.stdout, fuzz=None, profile=None):
+    """Check anchors and print match counts plus a unified diff; write nothing.
+
+    Returns the list of problems found.
+    """
+    with open(file_path, 'r', newline='', encoding='utf-8', errors='surrogateescape') as f:
+        content = f.read()
+    index = LineIndex(content)
+    matches, counts, problems = verify(content, edits, fuzz, profile)
+    lines = {}
+    for start, _, edit_index in matches:
+        lines.setdefault(edit_index, []).append(index.line_of(start) + 1)
+    report(edits, counts, out, lines)
+    if not problems:
+        out.writelines(unified_diff(content, matches, edits, file_path, index=index))
+        if jsx_lexer.is_source(file_path):
+            replacements = [(start, end, edits[i].replacement) for start, end, i in matches]
+            try:
+                jsx_lexer.validate(str(PieceTable.from_replacements(content, replacements)),
+                                   chunk_cache.for_file(file_path))
+            except jsx_lexer.LexError as e:
+                problems.append(f'the edited file would not parse: {e}')
+    return problems
+
+
+def run(file_path, edits, message=None, argv=None):
+    """Command-line entry point for recipe scripts.
+
+    Applies the recipe unless it is already applied; --dry-run previews it,
+    --revert undoes it, --force ignores the recorded fingerprints,
+    --fuzz N lets drifted anchors match with up to N changed tokens,
+    --no-validate writes JS/JSX output even if it no longer parses and
+    --profile REPORT.json records per-anchor timings (see profiling.py).
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]) or None,
+                                     description=message or f'Apply a recipe to {file_path}.')
+    parser.add_argument('--dry-run', action='store_true', help='check anchors and show a diff; write nothing')
+    parser.add_argument('--revert', action='store_true', help='undo the recipe instead of applying it')
+    parser.add_argument('--force', action='store_true', help='ignore the recorded fingerprints')
+    parser.add_argument('--fuzz', type=int, metavar='N', default=None,
+                        help='let drifted anchors match with up to N changed tokens')
+    parser.add_argument('--no-validate', dest='validate', action='store_false',
+                        help='write JS/JSX output even if it no longer parses')
+    parser.add_argument('--profile', metavar='REPORT', help='record per-anchor timings to a JSON report')
+    args = parser.parse_args(argv)
+
+    if args.profile is None:
+        return _run(file_path, edits, message, args)
+    from profiling import Profile
+
+    profile = Profile(os.path.basename(sys.argv[0]) or 'codemod')
+    try:
+        return _run(file_path, edits, message, args, profile)
+    finally:
+        profile.save(args.profile)
+
+
+def _run(file_path, edits, message, args, profile=None):
+    if args.dry_run:
+        try:
+            problems = dry_run(file_path, invert(edits) if args.revert else edits, fuzz=args.fuzz,
+                               profile=profile)
+        except OSError as e:
+            print(f"ERROR: {e}")
+            return 1
+        for problem in problems:
+            print(f"ERROR: {problem}")
+        print("Dry run: no files written")
+        return 1 if problems else 0
+
+    state = None if args.force else RecipeState.for_file(file_path)
+    try:
+        if args.revert:
+            counts = revert_file(file_path, edits, state, args.fuzz, args.validate, profile)
+        else:
+            counts = apply_to_file(file_path, edits, state, args.fuzz, args.validate, profile)
+    except OSError as e:
+        print(f"ERROR: {e}")
+        return 1
+    except AnchorError as e:
+        print(f"ERROR: {e}")
+        print(f"File left unchanged: {file_path}")
+        return 1
+    except jsx_lexer.LexError as e:
+        print(f"ERROR: the edited file would not parse: {e}")
+        print(f"File left unchanged: {file_path}")
+        return 1
+    if counts is None:
+        print(f"✓ Already applied, nothing to do: {file_path}")
+        return 0
+    report(edits, counts)
+    if args.revert:
+        print(f"Reverted: {file_path}")
+        return 0
+    if message:
+        print(message)
+    print(f"File updated: {file_path}")
+    return 0
+
+
+def load_recipe(script_path):
+    """Run a recipe script without applying it; return its (file_path, edits).
+
+    Recipe scripts end with `sys.exit(run(file_path, edits, ...))`, so run()
+    is swapped for a function that only records its arguments while the
+    script executes.
+    """
+    import runpy
+
+    captured = []
+
+    def capture(file_path, edits, message=None, argv=None):
+        captured.append((file_path, edits))
+        return 0
+
+    module = sys.modules[__name__]
+    original = module.run
+    module.run = capture
+    try:
+        runpy.run_path(script_path, run_name='__recipe__')
+    except SystemExit:
+        pass
+    finally:
+        module.run = original
+    if not captured:
+        raise AnchorError(f'{script_path} does not call codemod.run()')
+    return captured[0]
@@ -0,0 +1,427 @@
+"""Read-only access to a repository's objects without running git.
+
+Loose objects are inflated with zlib. Packed objects are located through the
+pack's .idx (fan-out table plus binary search over the sorted object names)
+and read from an mmap of the .pack. OFS_DELTA/REF_DELTA chains are resolved
+by walking down to the base and applying the deltas back up. Every object
+produced on the way is kept in a byte-bounded LRU cache, so neighbouring
+revisions of the same file, which delta against each other, share most of
+the work.
+
+Only what the history tools need is supported: refs (loose and packed,
+annotated tags peeled), commits, trees and blobs. Shallow clones, alternates
+and the commit-graph file are ignored.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+from collections import OrderedDict
+
+import mapped_file
+
+OBJ_COMMIT, OBJ_TREE, OBJ_BLOB, OBJ_TAG = 1, 2, 3, 4
+OBJ_OFS_DELTA, OBJ_REF_DELTA = 6, 7
+TYPE_NAMES = {OBJ_COMMIT: b'commit', OBJ_TREE: b'tree', OBJ_BLOB: b'blob', OBJ_TAG: b'tag'}
+TYPE_CODES = {name: code for code, name in TYPE_NAMES.items()}
+
+DEFAULT_CACHE_BYTES = 64 << 20
+INFLATE_CHUNK = 1 << 16
+
+
+class GitObjectError(ValueError):
+    """Raised for missing or corrupt objects and unresolvable revisions."""
+
+
+def _varint(data, pos):
+    """Little-endian base-128 size as used in delta headers; returns (value, pos)."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def apply_delta(base, delta):
+    """Rebuild an object from its base and a git delta."""
+    source_size, pos = _varint(delta, 0)
+    target_size, pos = _varint(delta, pos)
+    if source_size != len(base):
+        raise GitObjectError(f'delta expects a {source_size}-byte base, got {len(base)}')
+    base = memoryview(base)
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise GitObjectError('delta contains the reserved opcode 0')
+    if len(out) != target_size:
+        raise GitObjectError(f'delta produced {len(out)} bytes, expected {target_size}')
+    return bytes(out)
+
+
+class ObjectCache:
+    """LRU of resolved objects, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def put(self, key, item):
+        if key in self._items or len(item[1]) > self.max_bytes:
+            return
+        self._items[key] = item
+        self.size += len(item[1])
+        while self.size > self.max_bytes:
+            _, (_, data) = self._items.popitem(last=False)
+            self.size -= len(data)
+
+
+class Pack:
+    """One .pack file and its version 2 .idx."""
+
+    def __init__(self, idx_path):
+        self.idx_path = idx_path
+        self.pack_path = idx_path[:-4] + '.pack'
+        with open(idx_path, 'rb') as f:
+            idx = f.read()
+        if idx[:4] != b'\377tOc' or struct.unpack('>I', idx[4:8])[0] != 2:
+            raise GitObjectError(f'{idx_path}: only version 2 pack indexes are supported')
+        self.fanout = struct.unpack('>256I', idx[8:8 + 1024])
+        count = self.fanout[-1]
+        names = 8 + 1024
+        offsets = names + 24 * count
+        self.count = count
+        self._idx = idx
+        self._names = names
+        self._offsets = offsets
+        self._large = offsets + 4 * count
+        with open(self.pack_path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def name(self, i):
+        start = self._names + 20 * i
+        return self._idx[start:start + 20]
+
+    def find(self, binsha):
+        """Offset of the object in the pack, or None."""
+        lo = self.fanout[binsha[0] - 1] if binsha[0] else 0
+        hi = self.fanout[binsha[0]]
+        idx = self._idx
+        base = self._names
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + 20 * mid
+            name = idx[start:start + 20]
+            if name < binsha:
+                lo = mid + 1
+            elif name > binsha:
+                hi = mid
+            else:
+                return self._offset(mid)
+        return None
+
+    def _offset(self, i):
+        (offset,) = struct.unpack_from('>I', self._idx, self._offsets + 4 * i)
+        if offset & 0x80000000:
+            (offset,) = struct.unpack_from('>Q', self._idx, self._large + 8 * (offset & 0x7fffffff))
+        return offset
+
+    def names_with_prefix(self, prefix):
+        """Full names starting with a binary prefix (for short hex ids)."""
+        first = prefix[0]
+        lo = self.fanout[first - 1] if first else 0
+        return [self.name(i) for i in range(lo, self.fanout[first]) if self.name(i).startswith(prefix)]
+
+    def entry(self, offset):
+        """(type, size, data_offset, base) for the entry at offset.
+
+        base is the base entry's pack offset for OFS_DELTA and its binary
+        name for REF_DELTA, else None.
+        """
+        m = self.map
+        byte = m[offset]
+        kind = (byte >> 4) & 7
+        size = byte & 0x0f
+        shift = 4
+        pos = offset + 1
+        while byte & 0x80:
+            byte = m[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+        base = None
+        if kind == OBJ_OFS_DELTA:
+            byte = m[pos]
+            pos += 1
+            distance = byte & 0x7f
+            while byte & 0x80:
+                byte = m[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            base = offset - distance
+        elif kind == OBJ_REF_DELTA:
+            base = m[pos:pos + 20]
+            pos += 20
+        return kind, size, pos, base
+
+    def inflate(self, pos, size):
+        d = zlib.decompressobj()
+        # Compressed data is almost always smaller than the result, so one
+        # slice usually suffices
+        chunk = size + 64
+        parts = []
+        while not d.eof:
+            data = self.map[pos:pos + chunk]
+            if not data:
+                raise GitObjectError(f'{self.pack_path}: truncated object at {pos}')
+            parts.append(d.decompress(data))
+            pos += chunk
+            chunk = INFLATE_CHUNK
+        out = b''.join(parts)
+        if len(out) != size:
+            raise GitObjectError(f'{self.pack_path}: object inflated to {len(out)} bytes, expected {size}')
+        return out
+
+    def close(self):
+        self.map.close()
+
+
+class Repository:
+    """Objects and refs of one repository, read straight from its git directory."""
+
+    def __init__(self, git_dir=None, cache_bytes=DEFAULT_CACHE_BYTES):
+        # The worktree's own git dir: HEAD lives there, objects in its commondir
+        git_dir = git_dir or mapped_file.git_dir(common=False)
+        if git_dir is None:
+            raise GitObjectError('not inside a git repository')
+        self.git_dir = git_dir
+        common = os.path.join(git_dir, 'commondir')
+        if os.path.isfile(common):
+            with open(common) as f:
+                self.common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+        else:
+            self.common_dir = git_dir
+        self.objects_dir = os.path.join(self.common_dir, 'objects')
+        self.cache = ObjectCache(cache_bytes)
+        self._packs = None
+        self._trees = {}
+
+    @property
+    def packs(self):
+        if self._packs is None:
+            pack_dir = os.path.join(self.objects_dir, 'pack')
+            try:
+                names = [n for n in os.listdir(pack_dir) if n.endswith('.idx')]
+            except FileNotFoundError:
+                names = []
+            paths = [os.path.join(pack_dir, n) for n in names]
+            # Newest packs first: recent objects are the ones asked for most
+            paths.sort(key=lambda p: os.stat(p).st_mtime, reverse=True)
+            self._packs = [Pack(p) for p in paths]
+        return self._packs
+
+    def locate(self, sha):
+        """(pack number, offset) of a packed object, or None if loose or missing."""
+        binsha = bytes.fromhex(sha)
+        for number, pack in enumerate(self.packs):
+            offset = pack.find(binsha)
+            if offset is not None:
+                return number, offset
+        return None
+
+    def read(self, sha):
+        """(type name, data) of the object with hex name sha."""
+        item = self.cache.get(sha)
+        if item is not None:
+            return item
+        path = os.path.join(self.objects_dir, sha[:2], sha[2:])
+        try:
+            with open(path, 'rb') as f:
+                raw = zlib.decompress(f.read())
+        except FileNotFoundError:
+            where = self.locate(sha)
+            if where is None:
+                raise GitObjectError(f'object {sha} not found') from None
+            kind, data = self._read_packed(self.packs[where[0]], where[1])
+            item = (TYPE_NAMES[kind], data)
+        else:
+            header, _, data = raw.partition(b'\0')
+            item = (header.split(b' ', 1)[0], data)
+        self.cache.put(sha, item)
+        return item
+
+    def _read_packed(self, pack, offset):
+        """Resolve the entry at offset, applying its delta chain bottom-up."""
+        chain = []
+        while True:
+            key = (pack.pack_path, offset)
+            cached = self.cache.get(key)
+            if cached is not None:
+                kind, data = cached
+                break
+            kind, size, pos, base = pack.entry(offset)
+            if kind == OBJ_OFS_DELTA:
+                chain.append((key, pack.inflate(pos, size)))
+                offset = base
+            elif kind == OBJ_REF_DELTA:
+                delta = pack.inflate(pos, size)
+                base_type, data = self.read(base.hex())
+                kind = TYPE_CODES[base_type]
+                chain.append((key, delta))
+                break
+            else:
+                data = pack.inflate(pos, size)
+                self.cache.put(key, (kind, data))
+                break
+        for key, delta in reversed(chain):
+            data = apply_delta(data, delta)
+            self.cache.put(key, (kind, data))
+        return kind, data
+
+    # Refs and revisions
+
+    def _ref(self, name):
+        for directory in (self.git_dir, self.common_dir):
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    return f.read().strip()
+            except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+                continue
+        try:
+            with open(os.path.join(self.common_dir, 'packed-refs')) as f:
+                for line in f:
+                    if line[:1] in '#^':
+                        continue
+                    sha, _, ref = line.rstrip('\n').partition(' ')
+                    if ref == name:
+                        return sha
+        except FileNotFoundError:
+            pass
+        return None
+
+    def _expand(self, prefix):
+        """Full names of objects whose hex name starts with prefix."""
+        found = set()
+        loose = os.path.join(self.objects_dir, prefix[:2])
+        if os.path.isdir(loose):
+            found.update(prefix[:2] + n for n in os.listdir(loose) if (prefix[:2] + n).startswith(prefix))
+        even = bytes.fromhex(prefix[:len(prefix) & ~1])
+        if even:
+            for pack in self.packs:
+                found.update(n.hex() for n in pack.names_with_prefix(even) if n.hex().startswith(prefix))
+        return found
+
+    def resolve(self, rev):
+        """Commit name for a ref, full or short hex id, optionally with ~N / ^ suffixes."""
+        steps = 0
+        while rev and rev[-1] in '^~0123456789' and ('~' in rev or rev.endswith('^')):
+            if rev.endswith('^'):
+                rev, steps = rev[:-1], steps + 1
+                continue
+            head, _, count = rev.rpartition('~')
+            rev, steps = head, steps + (int(count) if count else 1)
+        sha = None
+        for name in (rev, f'refs/{rev}', f'refs/tags/{rev}', f'refs/heads/{rev}', f'refs/remotes/{rev}'):
+            value = self._ref(name)
+            while value and value.startswith('ref: '):
+                value = self._ref(value[5:])
+            if value:
+                sha = value
+                break
+        if sha is None and 4 <= len(rev) <= 40 and all(c in '0123456789abcdef' for c in rev.lower()):
+            matches = self._expand(rev.lower())
+            if len(matches) > 1:
+                raise GitObjectError(f'short object id {rev} is ambiguous')
+            sha = matches.pop() if matches else None
+        if sha is None:
+            raise GitObjectError(f'unknown revision {rev!r}')
+        kind, data = self.read(sha)
+        while kind == b'tag':
+            sha = data.split(b'\n', 1)[0].split(b' ')[1].decode()
+            kind, data = self.read(sha)
+        for _ in range(steps):
+            parents = self.commit(sha)['parents']
+            if not parents:
+                raise GitObjectError(f'{rev} has no parent')
+            sha = parents[0]
+        return sha
+
+    # Commits and trees
+
+    def commit(self, sha):
+        """Parsed commit: tree, parents, author, committer time and message."""
+        kind, data = self.read(sha)
+        if kind != b'commit':
+            raise GitObjectError(f'{sha} is a {kind.decode()}, not a commit')
+        header, _, message = data.partition(b'\n\n')
+        info = {'sha': sha, 'tree': None, 'parents': [], 'author': '', 'time': 0,
+                'message': message.decode('utf-8', 'replace')}
+        for line in header.split(b'\n'):
+            key, _, value = line.partition(b' ')
+            if key == b'tree':
+                info['tree'] = value.decode()
+            elif key == b'parent':
+                info['parents'].append(value.decode())
+            elif key == b'author':
+                info['author'] = value.rsplit(b' ', 2)[0].decode('utf-8', 'replace')
+            elif key == b'committer':
+                info['time'] = int(value.rsplit(b' ', 2)[1])
+        return info
+
+    def tree_entries(self, sha):
+        """{name: (mode, sha)} for a tree, cached by tree name."""
+        entries = self._trees.get(sha)
+        if entries is None:
+            kind, data = self.read(sha)
+            if kind != b'tree':
+                raise GitObjectError(f'{sha} is a {kind.decode()}, not a tree')
+            entries = {}
+            pos = 0
+            while pos < len(data):
+                space = data.index(b' ', pos)
+                nul = data.index(b'\0', space)
+                entries[data[space + 1:nul].decode('utf-8', 'surrogateescape')] = (
+                    data[pos:space].decode(), data[nul + 1:nul + 21].hex())
+                pos = nul + 21
+            self._trees[sha] = entries
+        return entries
+
+    def path_at(self, tree, path):
+        """Name of the object at a /-separated path inside a tree, or None."""
+        sha = tree
+        mode = '40000'
+        for part in path.strip('/').split('/'):
+            if mode != '40000':
+                return None
+            entry = self.tree_entries(sha).get(part)
+            if entry is None:
+                return None
+            mode, sha = entry
+        return sha
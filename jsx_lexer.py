@@ -0,0 +1,319 @@
+"""Linear-time structural lexer for the JSX in src/components.
+
+The lexer does not build an AST. It walks the text once, jumping between the
+characters that can change lexical context (brackets, quotes, comment and
+regex slashes, JSX angle brackets) with compiled regexes, and reports:
+
+    ('code', start, end)     a run of plain code with no brackets in it
+    ('open', pos, char)      (, [ or { in code or a JSX expression container
+    ('close', pos, char)     the matching ), ] or }
+    ('tag', pos, name)       start of a JSX opening tag (name '' for <>)
+    ('tag_end', pos, text)   '>' ending an opening tag, or '/>' self-closing it
+    ('close_tag', pos, name) a JSX closing tag </name>
+
+String, template, comment and regex literals and JSX text never produce
+'code' events, so anything found inside a 'code' span really is code.
+
+Context lives on a stack whose kinds (`Lexer.state()`) fully describe where
+the lexer is, so a scan can be resumed from a recorded state; the symbol
+index relies on this to re-lex only the region that changed.
+
+validate() runs the lexer over a whole file and raises LexError, with the
+line and the line of the unmatched opener, at the first unbalanced bracket,
+tag or unterminated literal. resolve_conflicts.py, merge_driver.py and
+codemod.py call it on their output before writing, so a broken merge or
+recipe is caught in ~0.1 s on KanbanBoard.jsx instead of by `vite build`.
+Given a chunk_cache.ChunkCache it only lexes the parts of the file that
+changed since it last saw them.
+"""
+
+import re
+from collections import deque
+
+CODE_SPECIAL = re.compile(r"[(){}\[\]'\"`/<]")
+TAG_SPECIAL = re.compile(r"[{}\"'/<>]")
+CHILD_SPECIAL = re.compile(r'[{}<>]')
+STRINGS = {
+    "'": re.compile(r"'(?:[^'\\\n]|\\.)*'", re.S),
+    '"': re.compile(r'"(?:[^"\\\n]|\\.)*"', re.S),
+}
+TEMPLATE_BODY = re.compile(r'(?:[^`\\$]|\\.|\$(?!\{))*', re.S)
+REGEX_LITERAL = re.compile(r'/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*')
+TAG_NAME = re.compile(r'[A-Za-z_$][\w$.:-]*')
+CLOSE_TAG = re.compile(r'</\s*([A-Za-z_$][\w$.:-]*)?\s*>')
+PREV_WORD = re.compile(r'[\w$]+$')
+
+# Files validate() applies to
+SOURCE_EXTENSIONS = ('.js', '.jsx', '.mjs', '.cjs')
+
+OPENERS = {'(': ')', '[': ']', '{': '}'}
+CLOSERS = {')': '(', ']': '[', '}': '{'}
+
+# After these words an expression starts, so / begins a regex and < a tag
+EXPRESSION_KEYWORDS = frozenset((
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+))
+
+
+class LexError(ValueError):
+    """Raised on unbalanced or unterminated constructs."""
+
+    def __init__(self, text, offset, message, opened=None):
+        self.offset = offset
+        self.line = line_of(text, offset)
+        self.opened_line = line_of(text, opened) if opened is not None else None
+        if self.opened_line is not None:
+            message += f' (opened at line {self.opened_line})'
+        self.message = message
+        super().__init__(f'line {self.line}: {message}')
+
+
+def line_of(text, offset):
+    """1-based line number of offset."""
+    return text.count('\n', 0, offset) + 1
+
+
+def _ends_with_operand(text, start, end):
+    """For a code span: True/False if its last token is an operand/operator, None if blank."""
+    j = end - 1
+    while j >= start and text[j] in ' \t\r\n':
+        j -= 1
+    if j < start:
+        return None
+    ch = text[j]
+    if ch.isalnum() or ch in '_$':
+        word = PREV_WORD.search(text, start, j + 1)
+        return word.group() not in EXPRESSION_KEYWORDS
+    return False
+
+
+class Lexer:
+    """Structural scanner over one text; see the module docstring for events."""
+
+    def __init__(self, text, state=()):
+        self.text = text
+        # Stack kinds: '(' '[' '{' code, '`' template, '<' tag attrs, '>' JSX children
+        self.stack = list(state)
+        self.opened = [None] * len(self.stack)
+        self.names = [''] * len(self.stack)
+        # Whether the last code token was an operand; decides whether / starts
+        # a regex and < a JSX tag
+        self.operand = False
+
+    def state(self):
+        return tuple(self.stack)
+
+    def _push(self, kind, pos, name=''):
+        self.stack.append(kind)
+        self.opened.append(pos)
+        self.names.append(name)
+
+    def _pop(self):
+        self.stack.pop()
+        self.names.pop()
+        return self.opened.pop()
+
+    def events(self, pos=0, end=None):
+        """Yield events for text[pos:end], carrying the context stack across calls."""
+        text = self.text
+        end = len(text) if end is None else end
+        while pos < end:
+            mode = self.stack[-1] if self.stack else '{'
+            if mode == '`':
+                pos = yield from self._template(pos, end)
+            elif mode == '<':
+                pos = yield from self._tag(pos, end)
+            elif mode == '>':
+                pos = yield from self._children(pos, end)
+            else:
+                pos = yield from self._code(pos, end)
+
+    def finish(self):
+        """Raise LexError if anything is still open at the end of the text."""
+        if self.stack:
+            kind = self.stack[-1]
+            what = {'`': 'template literal', '<': 'JSX tag', '>': f'<{self.names[-1]}> element'}.get(
+                kind, f"'{kind}'")
+            raise LexError(self.text, len(self.text), f'unclosed {what}', self.opened[-1])
+
+    def _code(self, pos, end):
+        text = self.text
+        m = CODE_SPECIAL.search(text, pos, end)
+        i = end if m is None else m.start()
+        if i > pos:
+            operand = _ends_with_operand(text, pos, i)
+            if operand is not None:
+                self.operand = operand
+            yield 'code', pos, i
+        if m is None:
+            return end
+        ch = text[i]
+        if ch in OPENERS:
+            self._push(ch, i)
+            self.operand = False
+            yield 'open', i, ch
+            return i + 1
+        if ch in CLOSERS:
+            if not self.stack or self.stack[-1] != CLOSERS[ch]:
+                self._unexpected_close(i, ch)
+            self._pop()
+            self.operand = ch != '}'
+            yield 'close', i, ch
+            return i + 1
+        if ch in STRINGS:
+            s = STRINGS[ch].match(text, i, end)
+            if s is None:
+                raise LexError(text, i, 'unterminated string')
+            self.operand = True
+            return s.end()
+        if ch == '`':
+            self._push('`', i)
+            self.operand = True
+            return i + 1
+        if ch == '/':
+            nxt = text[i + 1:i + 2]
+            if nxt == '/':
+                nl = text.find('\n', i, end)
+                return end if nl == -1 else nl
+            if nxt == '*':
+                close = text.find('*/', i + 2, end)
+                if close == -1:
+                    raise LexError(text, i, 'unterminated comment')
+                return close + 2
+            if not self.operand:
+                r = REGEX_LITERAL.match(text, i, end)
+                if r is not None:
+                    self.operand = True
+                    return r.end()
+            self.operand = False
+            return i + 1
+        # '<': a JSX tag only where an operand is expected
+        nxt = text[i + 1:i + 2]
+        if (nxt == '>' or nxt.isalpha() or nxt in '_$') and not self.operand:
+            return (yield from self._open_tag(i))
+        self.operand = False
+        return i + 1
+
+    def _open_tag(self, i):
+        text = self.text
+        if text[i + 1:i + 2] == '>':
+            yield 'tag', i, ''
+            self._push('>', i, '')
+            yield 'tag_end', i + 1, '>'
+            return i + 2
+        name = TAG_NAME.match(text, i + 1)
+        self._push('<', i, name.group())
+        yield 'tag', i, name.group()
+        return name.end()
+
+    def _template(self, pos, end):
+        text = self.text
+        m = TEMPLATE_BODY.match(text, pos, end)
+        i = m.end()
+        if i >= end:
+            if end == len(text):
+                raise LexError(text, self.opened[-1], 'unterminated template literal')
+            return end
+        if text[i] == '`':
+            self._pop()
+            return i + 1
+        # '${' opens an expression; its '}' returns to the template
+        self._push('{', i + 1)
+        yield 'open', i + 1, '{'
+        return i + 2
+
+    def _tag(self, pos, end):
+        text = self.text
+        m = TAG_SPECIAL.search(text, pos, end)
+        if m is None:
+            return end
+        i = m.start()
+        ch = text[i]
+        if ch == '{':
+            self._push('{', i)
+            yield 'open', i, '{'
+            return i + 1
+        if ch in '}<':
+            raise LexError(text, i, f"unexpected '{ch}' in <{self.names[-1]}> tag", self.opened[-1])
+        if ch in '"\'':
+            close = text.find(ch, i + 1, end)
+            if close == -1:
+                raise LexError(text, i, 'unterminated attribute string')
+            return close + 1
+        if ch == '/':
+            if text[i + 1:i + 2] == '>':
+                self._pop()
+                self.operand = True
+                yield 'tag_end', i, '/>'
+                return i + 2
+            return i + 1
+        # '>' ends the opening tag: switch to the element's children
+        self.stack[-1] = '>'
+        yield 'tag_end', i, '>'
+        return i + 1
+
+    def _children(self, pos, end):
+        text = self.text
+        m = CHILD_SPECIAL.search(text, pos, end)
+        if m is None:
+            return end
+        i = m.start()
+        if text[i] == '{':
+            self._push('{', i)
+            yield 'open', i, '{'
+            return i + 1
+        if text[i] in '}>':
+            # Babel rejects both in JSX text; they must be written {'}'} / &gt;
+            raise LexError(text, i, f"unexpected '{text[i]}' in <{self.names[-1]}> text", self.opened[-1])
+        if text[i + 1:i + 2] == '/':
+            c = CLOSE_TAG.match(text, i, end)
+            if c is None:
+                raise LexError(text, i, 'malformed closing tag')
+            name = c.group(1) or ''
+            if name != self.names[-1]:
+                opened = self.opened[-1]
+                raise LexError(text, i, f'</{name}> does not close <{self.names[-1]}>', opened)
+            self._pop()
+            self.operand = True
+            yield 'close_tag', i, name
+            return c.end()
+        nxt = text[i + 1:i + 2]
+        if nxt == '>' or nxt.isalpha() or nxt in '_$':
+            return (yield from self._open_tag(i))
+        raise LexError(text, i, f"unexpected '<' in <{self.names[-1]}> text", self.opened[-1])
+
+    def _unexpected_close(self, i, ch):
+        if not self.stack:
+            raise LexError(self.text, i, f"unmatched '{ch}'")
+        kind = self.stack[-1]
+        expected = OPENERS.get(kind)
+        if expected:
+            raise LexError(self.text, i, f"'{ch}' does not match '{kind}'", self.opened[-1])
+        raise LexError(self.text, i, f"'{ch}' inside unclosed JSX", self.opened[-1])
+
+
+def lex(text):
+    """All events for text, raising LexError if anything is left unbalanced."""
+    lexer = Lexer(text)
+    yield from lexer.events()
+    lexer.finish()
+
+
+def is_source(path):
+    """Whether validate() understands the file at path."""
+    return path.endswith(SOURCE_EXTENSIONS)
+
+
+def validate(text, chunks=None):
+    """Raise LexError if anything in text is unbalanced or unterminated.
+
+    chunks, a chunk_cache.ChunkCache, skips the parts of text it has already
+    seen lex cleanly.
+    """
+    if chunks is not None:
+        chunks.validate(text)
+        return
+    lexer = Lexer(text)
+    deque(lexer.events(), maxlen=0)
+    lexer.finish()
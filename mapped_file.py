@@ -0,0 +1,173 @@
+"""Memory-mapped input and atomic output for the scripts that rewrite files.
+
+map_file() exposes a file's bytes through mmap, so callers search it with
+mmap.find and slice it through memoryview without reading or decoding the
+whole file. Line endings and encodings are therefore kept byte for byte.
+
+write_atomic() streams bytes-like chunks (memoryview slices of the mapping
+and any new bytes) into a temporary file in the target's directory and
+renames it over the target. Readers never see a half-written file, and a run
+killed partway leaves the original untouched.
+
+find_line(), common_prefix() and common_suffix() work on mappings, bytes
+and strings alike; count_lines() on mappings and bytes. git_dir() locates the git dir where the
+scripts keep their trackli-* state.
+"""
+
+import mmap
+import os
+from contextlib import contextmanager
+
+COUNT_CHUNK = 1 << 16
+
+# mkstemp() creates files as 0600; new files should get the umask's mode.
+# Read once here, as os.umask() can only be read by setting it.
+UMASK = os.umask(0o022)
+os.umask(UMASK)
+
+
+@contextmanager
+def map_file(path):
+    """Yield a read-only mmap of path (b'' for an empty file).
+
+    Every memoryview of the mapping must be released before the block ends.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapping
+        finally:
+            # Callers release their memoryviews first (PieceTable.release())
+            mapping.close()
+
+
+def write_atomic(path, chunks, prefix='.tmp-'):
+    """Write bytes-like chunks to path via a temporary file and os.replace()."""
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=prefix, dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as dst:
+            # writelines() keeps no reference to the last chunk, so views of
+            # a mapping are gone once it returns
+            dst.writelines(chunks)
+        copy_mode(tmp_path, path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        if hasattr(chunks, 'close'):
+            # A generator stopped partway still holds the chunk it yielded
+            chunks.close()
+        raise
+
+
+def git_dir(cwd=None, common=True):
+    """The git dir of the repository holding cwd (by default the current
+    directory), or None outside git.
+
+    With common, the directory shared by all worktrees, where trackli-*
+    state lives; otherwise the worktree's own, which holds HEAD and
+    MERGE_MSG. .git is found by walking up from cwd, following `gitdir:`
+    files and `commondir`, so git itself only runs for what the walk does not
+    cover (GIT_DIR pointing elsewhere, a bare repository).
+    """
+    env = os.environ.get('GIT_DIR')
+    if env and cwd is None and os.path.isdir(env):
+        found = os.path.abspath(env)
+    else:
+        found = None if env else _find_dot_git(os.path.abspath(cwd or os.curdir))
+    if found is None:
+        return _rev_parse_git_dir(cwd, common)
+    if common:
+        try:
+            with open(os.path.join(found, 'commondir')) as f:
+                found = os.path.normpath(os.path.join(found, f.read().strip()))
+        except FileNotFoundError:
+            pass
+    return found
+
+
+def _find_dot_git(path):
+    while True:
+        candidate = os.path.join(path, '.git')
+        if os.path.isdir(candidate):
+            return candidate
+        if os.path.isfile(candidate):
+            with open(candidate) as f:
+                line = f.readline().strip()
+            if line.startswith('gitdir:'):
+                return os.path.normpath(os.path.join(path, line[7:].strip()))
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _rev_parse_git_dir(cwd, common):
+    import subprocess
+
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--path-format=absolute',
+             '--git-common-dir' if common else '--absolute-git-dir'],
+            cwd=cwd, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def copy_mode(tmp_path, path):
+    """Give a temporary file path's mode, or a new file's mode if path is missing."""
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~UMASK
+    os.chmod(tmp_path, mode)
+
+
+def count_lines(buf, end=None, start=0):
+    """Number of newlines in buf[start:end], counted in bounded chunks."""
+    end = len(buf) if end is None else end
+    count = 0
+    with memoryview(buf) as view:
+        for pos in range(start, end, COUNT_CHUNK):
+            count += bytes(view[pos:min(pos + COUNT_CHUNK, end)]).count(b'\n')
+    return count
+
+
+def find_line(buf, prefix, start=0):
+    """Offset of the first line starting with prefix at or after start, or -1."""
+    # Indexing bytes and mmaps gives ints, indexing a str gives a str
+    newline = '\n' if isinstance(buf, str) else 0x0a
+    pos = buf.find(prefix, start)
+    while pos > 0 and buf[pos - 1] != newline:
+        pos = buf.find(prefix, pos + 1)
+    return pos
+
+
+def common_prefix(a, b):
+    """Length of the common prefix of two strings or buffers, compared block-wise in C."""
+    size = min(len(a), len(b))
+    pos = 0
+    block = 1 << 14
+    while block:
+        while pos + block <= size and a[pos:pos + block] == b[pos:pos + block]:
+            pos += block
+        block >>= 1
+    return pos
+
+
+def common_suffix(a, b, limit):
+    """Length of the common suffix, at most `limit`."""
+    size = min(len(a), len(b), limit)
+    pos = 0
+    block = 1 << 14
+    while block:
+        while pos + block <= size and a[len(a) - pos - block:len(a) - pos] == b[len(b) - pos - block:len(b) - pos]:
+            pos += block
+        block >>= 1
+    return pos
@@ -0,0 +1,353 @@
+"""Three-way line merge on a histogram (or patience) diff.
+
+`git merge-file` aligns each side with the base using Myers' diff, which is
+happy to match a side's new lines against lines that merely look alike:
+blank lines, `}, [])`, `</div>`. In KanbanBoard.jsx, where both branches
+tend to add useState hooks and effects next to each other, the two sides'
+changes then appear to overlap and git reports conflicts that are not real.
+The histogram diff (as in `git diff --histogram`) anchors the alignment on
+the rarest lines shared by both texts, then recurses on either side of them.
+Only long runs of common lines are matched, and a side's insertions stay
+separate from the other side's changes.
+
+Lines are interned to small integers first, so the diffs compare ints, not
+strings. Both diffs go from the base to a side. Base lines matched in both
+are stable. Between them, a region where only one side differs from the
+base takes that side, and a region where both sides agree takes either.
+Everything else is a conflict. A conflict is narrowed to what the sides do
+not have in common at its start and end. Two insertions at the same point
+are merged when one of them can slide past a neighbouring unchanged line
+(a block ending in the blank line above it, say), as a diff's slider
+heuristics would place it. What remains is written in the same diff3 layout
+as `git merge-file --diff3`, so resolve_conflicts.py handles the rest.
+
+    from merge3 import merge
+    data, conflicts = merge(base, ours, theirs, labels=('HEAD', 'base', 'develop'))
+"""
+
+HISTOGRAM = 'histogram'
+PATIENCE = 'patience'
+# Lines occurring more often than this in a region are never used as anchors
+MAX_CHAIN = 64
+# Regions with no usable anchor are diffed with difflib only up to this many
+# line pairs; a bigger one (thousands of `}` lines, say) is reported as changed
+# outright rather than taking seconds
+FALLBACK_PAIRS = 1 << 18
+
+
+def split_lines(data):
+    """The lines of a bytes object, endings kept, split on \\n only as git does."""
+    lines = data.split(b'\n')
+    last = lines.pop()
+    lines = [line + b'\n' for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def intern_lines(*texts):
+    """Each list of lines as a list of ints, equal lines getting equal ints."""
+    table = {}
+    return [[table.setdefault(line, len(table)) for line in lines] for lines in texts]
+
+
+def _histogram_split(a, b, a_lo, a_hi, b_lo, b_hi):
+    """The run of common lines around the rarest shared line, as [(i, j, length)].
+
+    Among candidate runs the one whose rarest line occurs least often in a
+    wins, then the longest. None if no line of b occurs in a at most
+    MAX_CHAIN times.
+    """
+    occurrences = {}
+    for i in range(a_lo, a_hi):
+        occurrences.setdefault(a[i], []).append(i)
+    best = None
+    best_count = MAX_CHAIN + 1
+    j = b_lo
+    while j < b_hi:
+        positions = occurrences.get(b[j])
+        next_j = j + 1
+        if positions is not None and len(positions) <= best_count:
+            for i in positions:
+                start_a, start_b = i, j
+                while start_a > a_lo and start_b > b_lo and a[start_a - 1] == b[start_b - 1]:
+                    start_a -= 1
+                    start_b -= 1
+                end_a, end_b = i + 1, j + 1
+                while end_a < a_hi and end_b < b_hi and a[end_a] == b[end_b]:
+                    end_a += 1
+                    end_b += 1
+                count = min(len(occurrences[a[k]]) for k in range(start_a, end_a))
+                length = end_a - start_a
+                if best is None or count < best_count or (count == best_count and length > best[2]):
+                    best = (start_a, start_b, length)
+                    best_count = count
+                next_j = max(next_j, end_b)
+        j = next_j
+    return None if best is None else [best]
+
+
+def _patience_split(a, b, a_lo, a_hi, b_lo, b_hi):
+    """Lines unique to both regions, longest increasing subsequence of them."""
+    counts = {}
+    for i in range(a_lo, a_hi):
+        entry = counts.get(a[i])
+        counts[a[i]] = [i, None] if entry is None else [-1, None]
+    for j in range(b_lo, b_hi):
+        entry = counts.get(b[j])
+        if entry is not None and entry[0] >= 0:
+            entry[1] = j if entry[1] is None else -1
+    unique = sorted((i, j) for i, j in counts.values() if i >= 0 and j is not None and j >= 0)
+    if not unique:
+        return None
+    # Patience sorting on the b positions, in a order
+    import bisect
+
+    tops = []
+    top_js = []
+    links = []
+    for i, j in unique:
+        pile = bisect.bisect_left(top_js, j)
+        links.append((i, j, tops[pile - 1] if pile else None))
+        if pile == len(tops):
+            tops.append(len(links) - 1)
+            top_js.append(j)
+        else:
+            tops[pile] = len(links) - 1
+            top_js[pile] = j
+    chain = []
+    node = tops[-1]
+    while node is not None:
+        i, j, node = links[node]
+        chain.append((i, j, 1))
+    chain.reverse()
+    return chain
+
+
+SPLITTERS = {HISTOGRAM: _histogram_split, PATIENCE: _patience_split}
+
+
+def _fallback(a, b, a_lo, a_hi, b_lo, b_hi):
+    """Matches for a region with no usable anchor (only very common lines)."""
+    if (a_hi - a_lo) * (b_hi - b_lo) > FALLBACK_PAIRS:
+        return []
+    from difflib import SequenceMatcher
+
+    matcher = SequenceMatcher(None, a[a_lo:a_hi], b[b_lo:b_hi], autojunk=False)
+    return [(a_lo + i, b_lo + j, n) for i, j, n in matcher.get_matching_blocks() if n]
+
+
+def diff(a, b, algorithm=HISTOGRAM, blank=None):
+    """Matched line pairs [(i, j), ...] of two int sequences, in increasing order.
+
+    blank is the set of ints standing for blank lines; lines inserted into b
+    that could equally sit a few lines higher or lower are then moved to end
+    on a blank line where possible, as git's slider heuristics do.
+    """
+    split = SPLITTERS[algorithm]
+    pairs = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        a_lo, a_hi, b_lo, b_hi = stack.pop()
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            pairs.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            pairs.append((a_hi, b_hi))
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+        runs = split(a, b, a_lo, a_hi, b_lo, b_hi)
+        if runs is None:
+            for i, j, n in _fallback(a, b, a_lo, a_hi, b_lo, b_hi):
+                pairs.extend((i + k, j + k) for k in range(n))
+            continue
+        prev_a, prev_b = a_lo, b_lo
+        for i, j, n in runs:
+            stack.append((prev_a, i, prev_b, j))
+            pairs.extend((i + k, j + k) for k in range(n))
+            prev_a, prev_b = i + n, j + n
+        stack.append((prev_a, a_hi, prev_b, b_hi))
+    pairs.sort()
+    if blank:
+        _slide_insertions(b, pairs, blank)
+    return pairs
+
+
+def _slide_insertions(b, pairs, blank):
+    """Move each ambiguous run of inserted lines of b to end on a blank line.
+
+    A run between matched pairs can shift down while its first line equals
+    the matched line after it, and up while its last line equals the one
+    before it; the lowest position that ends on a blank line is taken.
+    """
+    for k in range(len(pairs) - 1):
+        (i1, j1), (i2, j2) = pairs[k], pairs[k + 1]
+        if i2 != i1 + 1 or j2 == j1 + 1:
+            continue
+        start, end = j1 + 1, j2
+        down = 0
+        while (k + 1 + down < len(pairs) and pairs[k + 1 + down] == (i2 + down, end + down)
+               and b[start + down] == b[end + down]):
+            down += 1
+        up = 0
+        while k - up >= 0 and pairs[k - up] == (i1 - up, j1 - up) and b[start - 1 - up] == b[end - 1 - up]:
+            up += 1
+        shift = next((n for n in range(down, -up - 1, -1) if b[end - 1 + n] in blank), 0)
+        for n in range(shift):
+            pairs[k + 1 + n] = (i2 + n, start + n)
+        for n in range(-shift):
+            pairs[k - n] = (i1 - n, end - 1 - n)
+
+
+def regions(base, ours, theirs, algorithm=HISTOGRAM, blank=None):
+    """Yield ('same', lo, hi) runs of base and ('change', base, ours, theirs)
+    ranges, each a (lo, hi) pair, covering all three int sequences in order."""
+    to_ours = [None] * len(base)
+    to_theirs = [None] * len(base)
+    for i, j in diff(base, ours, algorithm, blank):
+        to_ours[i] = j
+    for i, j in diff(base, theirs, algorithm, blank):
+        to_theirs[i] = j
+    b = o = t = 0
+    stable = None
+    for i in range(len(base) + 1):
+        if i == len(base):
+            next_o, next_t = len(ours), len(theirs)
+        elif to_ours[i] is None or to_theirs[i] is None:
+            continue
+        else:
+            next_o, next_t = to_ours[i], to_theirs[i]
+        if b < i or o < next_o or t < next_t:
+            if stable is not None:
+                yield ('same', *stable)
+                stable = None
+            yield ('change', (b, i), (o, next_o), (t, next_t))
+        if i < len(base):
+            stable = (stable[0], i + 1) if stable is not None else (i, i + 1)
+            b, o, t = i + 1, next_o + 1, next_t + 1
+    if stable is not None:
+        yield ('same', *stable)
+
+
+def merge(base, ours, theirs, labels=('ours', 'base', 'theirs'), algorithm=HISTOGRAM):
+    """Merge three versions of a file given as bytes.
+
+    Returns (merged bytes, number of conflicts). Conflicts are written with
+    diff3 markers carrying labels (ours, base, theirs).
+    """
+    lines = [split_lines(text) for text in (base, ours, theirs)]
+    base_ids, ours_ids, theirs_ids = intern_lines(*lines)
+    base_lines, ours_lines, theirs_lines = lines
+    # Leading whitespace of each distinct line, None for blank ones
+    indents = {}
+    for text, ids in zip(lines, (base_ids, ours_ids, theirs_ids)):
+        for line, n in zip(text, ids):
+            if n not in indents:
+                stripped = line.lstrip()
+                indents[n] = len(line) - len(stripped) if stripped.strip() else None
+    blank = {n for n, indent in indents.items() if indent is None}
+    eol = b'\r\n' if ours_lines and ours_lines[0].endswith(b'\r\n') else b'\n'
+    markers = [b'<<<<<<< ' + labels[0].encode() + eol, b'||||||| ' + labels[1].encode() + eol,
+               b'=======' + eol, b'>>>>>>> ' + labels[2].encode() + eol]
+    out = []
+    conflicts = 0
+    found = list(regions(base_ids, ours_ids, theirs_ids, algorithm, blank))
+    for number, region in enumerate(found):
+        if region[0] == 'same':
+            out.extend(base_lines[region[1]:region[2]])
+            continue
+        (b_lo, b_hi), (o_lo, o_hi), (t_lo, t_hi) = region[1:]
+        if ours_ids[o_lo:o_hi] == base_ids[b_lo:b_hi]:
+            out.extend(theirs_lines[t_lo:t_hi])
+            continue
+        if theirs_ids[t_lo:t_hi] == base_ids[b_lo:b_hi] or ours_ids[o_lo:o_hi] == theirs_ids[t_lo:t_hi]:
+            out.extend(ours_lines[o_lo:o_hi])
+            continue
+        # Stable lines an insertion could slide past, up to the next change
+        above = below = ()
+        if number and found[number - 1][0] == 'same':
+            above = base_ids[found[number - 1][1]:found[number - 1][2]]
+        if number + 1 < len(found) and found[number + 1][0] == 'same':
+            below = base_ids[found[number + 1][1]:found[number + 1][2]]
+        # Narrow the conflict to where the sides differ; the base loses the
+        # same lines only where it has them too.
+        while o_lo < o_hi and t_lo < t_hi and ours_ids[o_lo] == theirs_ids[t_lo]:
+            out.append(ours_lines[o_lo])
+            if b_lo < b_hi and base_ids[b_lo] == ours_ids[o_lo]:
+                b_lo += 1
+            o_lo += 1
+            t_lo += 1
+            above = ()
+        tail = []
+        while o_lo < o_hi and t_lo < t_hi and ours_ids[o_hi - 1] == theirs_ids[t_hi - 1]:
+            tail.append(ours_lines[o_hi - 1])
+            if b_lo < b_hi and base_ids[b_hi - 1] == ours_ids[o_hi - 1]:
+                b_hi -= 1
+            o_hi -= 1
+            t_hi -= 1
+            below = ()
+        ours_part, theirs_part = ours_lines[o_lo:o_hi], theirs_lines[t_lo:t_hi]
+        if ours_ids[o_lo:o_hi] == base_ids[b_lo:b_hi]:
+            out.extend(theirs_part)
+        elif theirs_ids[t_lo:t_hi] == base_ids[b_lo:b_hi]:
+            out.extend(ours_part)
+        elif b_lo == b_hi and (order := _insertion_order(
+                ours_ids[o_lo:o_hi], theirs_ids[t_lo:t_hi], above, below, indents)) is not None:
+            out.extend(ours_part + theirs_part if order == 'ours' else theirs_part + ours_part)
+        else:
+            conflicts += 1
+            out.append(markers[0])
+            out.extend(_terminated(ours_part, eol))
+            out.append(markers[1])
+            out.extend(_terminated(base_lines[b_lo:b_hi], eol))
+            out.append(markers[2])
+            out.extend(_terminated(theirs_part, eol))
+            out.append(markers[3])
+        out.extend(reversed(tail))
+    return b''.join(out), conflicts
+
+
+def _slides(inserted, above, below, indents):
+    """(up, down): whether inserted lines can move past some of the stable
+    lines above or below them, keeping at least one in place as a separator.
+
+    A move that would start the block deeper than the line before it (in the
+    middle of a function body, say) is not counted.
+    """
+    def fits(first, previous):
+        return indents[first] is None or indents[previous] is None or indents[first] <= indents[previous]
+
+    up = any(inserted[-m:] == above[-m:] and fits(above[-m], above[-m - 1])
+             for m in range(1, min(len(inserted), len(above) - 1) + 1))
+    down = any(inserted[:m] == below[:m] and fits((inserted[m:] + below[:m])[0], below[m - 1])
+               for m in range(1, min(len(inserted), len(below) - 1) + 1))
+    return up, down
+
+
+def _insertion_order(ours, theirs, above, below, indents):
+    """'ours' or 'theirs' for the side that comes first when two insertions at
+    the same point can be told apart, else None.
+
+    Ending with the stable line above the insertion point means an insertion
+    can equally be read as made before that line (and starting with the line
+    below, after it), which separates it from the other side's. The merge is
+    clean when every such reading puts the sides in the same order.
+    """
+    ours_up, ours_down = _slides(ours, above, below, indents)
+    theirs_up, theirs_down = _slides(theirs, above, below, indents)
+    orders = set()
+    if ours_up or theirs_down:
+        orders.add('ours')
+    if theirs_up or ours_down:
+        orders.add('theirs')
+    return orders.pop() if len(orders) == 1 else None
+
+
+def _terminated(lines, eol):
+    """lines, with a line ending added to a final line that lacks one."""
+    if lines and not lines[-1].endswith(b'\n'):
+        lines[-1] += eol
+    return lines
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Git merge driver that resolves conflicts while the merge is running.
+
+Register it once per clone:
+
+    git config merge.trackli.name "Trackli conflict resolver"
+    git config merge.trackli.driver "python3 -S -E merge_driver.py %O %A %B %P"
+
+and route files to it in .git/info/attributes (or .gitattributes):
+
+    src/components/KanbanBoard.jsx merge=trackli
+
+Extra options go before %O: --strategy ours|theirs|union, --diff
+histogram|patience, --no-cache and --no-validate. The driver runs `git
+merge-file --diff3` on the three versions (with --diff, merge3.py merges
+them in-process instead, leaving fewer conflicts), resolves the resulting
+hunks with resolve_conflicts.py (cache, diff3 auto-merge, then the
+strategy) and writes the result to %A. If the
+resolved JS/JSX (judged by %P, the real path) no longer parses, the conflict
+markers are written instead. It exits non-zero when hunks remain, which
+tells git to leave the path conflicted.
+
+Git starts the driver once per file, so startup is kept lean: only sys and os
+are imported up front and `--measure` checks cold-start time against
+STARTUP_BUDGET_MS.
+"""
+
+import os
+import sys
+
+STARTUP_BUDGET_MS = 60
+LABELS = ('ours', 'base', 'theirs')
+
+USAGE = ('usage: merge_driver.py [--strategy NAME] [--diff histogram|patience] [--no-cache] [--no-validate]'
+         ' BASE OURS THEIRS [PATH]'
+         ' | --measure [RUNS]')
+
+
+def _cache_dir():
+    # Git runs drivers from the top of the work tree, so mapped_file.git_dir()
+    # finds .git right here without starting git
+    from resolution_cache import default_cache_dir
+    return default_cache_dir()
+
+
+def merge(base_path, ours_path, theirs_path, strategy='theirs', use_cache=True, path=None,
+          validate=True, algorithm=None):
+    """Merge into ours_path and return the number of hunks left unresolved.
+
+    path is the file's name in the work tree; with validate, a JS/JSX result
+    that does not parse is rejected and the conflicts are left in place.
+    algorithm ('histogram' or 'patience') merges with merge3.py in-process
+    instead of running `git merge-file`.
+    """
+    from resolve_conflicts import ConflictError, check_resolved, resolve_buffer
+
+    if algorithm is None:
+        import subprocess
+
+        result = subprocess.run(
+            ['git', 'merge-file', '-p', '--diff3',
+             '-L', LABELS[0], '-L', LABELS[1], '-L', LABELS[2],
+             ours_path, base_path, theirs_path],
+            capture_output=True,
+        )
+        # merge-file exits with the number of conflicts, or a negative value on error
+        if result.returncode < 0 or result.returncode > 127:
+            sys.stderr.write(result.stderr.decode(errors='replace'))
+            return -1
+        merged, conflicts = result.stdout, result.returncode
+    else:
+        from merge3 import merge as merge3
+
+        versions = []
+        for version_path in (base_path, ours_path, theirs_path):
+            with open(version_path, 'rb') as f:
+                versions.append(f.read())
+        merged, conflicts = merge3(*versions, LABELS, algorithm)
+    if conflicts == 0:
+        with open(ours_path, 'wb') as f:
+            f.write(merged)
+        return 0
+
+    cache = validated = None
+    if use_cache:
+        cache_dir = _cache_dir()
+        if cache_dir:
+            from resolution_cache import ResolutionCache
+            cache = ResolutionCache(cache_dir)
+            if validate:
+                from chunk_cache import CACHE_NAME, ChunkCache
+                validated = ChunkCache(os.path.join(os.path.dirname(cache_dir), CACHE_NAME))
+
+    hunks = []
+    resolved = resolve_buffer(merged, ours_path, hunks, strategy=strategy, cache=cache)
+    if resolved is None:
+        # Markers of a non-default conflict-marker-size: leave them to the user
+        chunks, remaining = [merged], conflicts
+    else:
+        chunks, remaining = resolved.chunks(), sum(1 for h in hunks if h.resolution is None)
+    if validate and resolved is not None:
+        try:
+            check_resolved(resolved, path or ours_path, hunks, cache, validated)
+        except ConflictError as e:
+            sys.stderr.write(f'{e}; leaving the conflicts in place\n')
+            chunks, remaining = [merged], len(hunks)
+    with open(ours_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    if cache is not None and cache.added:
+        # Keep the cache bounded even when merges only run through the driver
+        cache.prune()
+    return remaining
+
+
+def measure(runs=10):
+    """Time cold starts of the driver (interpreter plus module imports)."""
+    import statistics
+    import subprocess
+    import time
+
+    cmd = [sys.executable, '-S', '-E', os.path.abspath(__file__), '--noop']
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(samples)
+    print(f"cold start: median {median:.1f} ms, min {min(samples):.1f} ms, "
+          f"max {max(samples):.1f} ms over {runs} runs (budget {STARTUP_BUDGET_MS} ms)")
+    if median > STARTUP_BUDGET_MS:
+        print("WARNING: over the startup budget")
+        return 1
+    print("✓ Within the startup budget")
+    return 0
+
+
+def main(argv):
+    strategy = 'theirs'
+    use_cache = True
+    validate = True
+    algorithm = None
+    args = []
+    it = iter(argv)
+    for arg in it:
+        if arg == '--noop':
+            # Used by --measure: pay for the imports a real merge would do
+            import subprocess  # noqa: F401
+
+            import chunk_cache  # noqa: F401
+            import resolve_conflicts  # noqa: F401
+            import resolution_cache  # noqa: F401
+            return 0
+        if arg == '--measure':
+            return measure(int(next(it, 10)))
+        if arg in ('-s', '--strategy'):
+            strategy = next(it, '')
+        elif arg == '--no-cache':
+            use_cache = False
+        elif arg == '--no-validate':
+            validate = False
+        elif arg == '--diff':
+            algorithm = next(it, '')
+        else:
+            args.append(arg)
+
+    from resolve_conflicts import STRATEGIES
+
+    if len(args) < 3 or strategy not in STRATEGIES or algorithm not in (None, 'histogram', 'patience'):
+        print(USAGE, file=sys.stderr)
+        return 2
+
+    path = args[3] if len(args) > 3 else None
+    remaining = merge(args[0], args[1], args[2], strategy, use_cache, path, validate, algorithm)
+    if remaining < 0:
+        return 2
+    return 1 if remaining else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
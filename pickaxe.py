@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Find the commits that added or removed a string in a file's history.
+
+Like `git log -S STRING -- FILE` (or `-S REGEX --pickaxe-regex` with -E),
+but the objects are read directly by git_objects.py. The history walk runs
+in this process and only needs commits and trees. The expensive part, which
+is inflating and delta-resolving every distinct revision of the file and
+counting matches in it, is spread over a process pool. Each worker keeps its
+own cache of resolved objects, and blobs are handed out in pack order so
+delta chains are resolved once per worker rather than once per revision.
+
+A commit is listed when the number of matches differs from its parent's, so
+the oldest line printed is the commit that introduced the string:
+
+    python pickaxe.py 'handleVoiceInput'
+    python pickaxe.py -E 'v2\\.1\\.\\d' --path package.json v2.2.1
+"""
+
+import os
+import re
+import sys
+from functools import partial
+
+from git_objects import GitObjectError, Repository
+
+DEFAULT_FILE = 'src/components/KanbanBoard.jsx'
+
+# Below this many distinct blobs a pool costs more to start than it saves
+POOL_MIN_BLOBS = 16
+
+_worker_repo = None
+
+
+def history(repo, start, path, first_parent=False):
+    """Commits reachable from start, newest first, as (commit, blob) pairs.
+
+    blob is the name of the object at path in that commit, or None.
+    """
+    import heapq
+
+    seen = {start}
+    first = repo.commit(start)
+    heap = [(-first['time'], 0, first)]
+    order = 1
+    while heap:
+        _, _, commit = heapq.heappop(heap)
+        yield commit, repo.path_at(commit['tree'], path)
+        parents = commit['parents'][:1] if first_parent else commit['parents']
+        for parent in parents:
+            if parent not in seen:
+                seen.add(parent)
+                info = repo.commit(parent)
+                heapq.heappush(heap, (-info['time'], order, info))
+                order += 1
+
+
+def compile_pattern(text, regex=False, ignore_case=False):
+    """A bytes pattern for counting matches, or the plain bytes for -S."""
+    if not regex and not ignore_case:
+        return text.encode()
+    return re.compile(text.encode() if regex else re.escape(text.encode()),
+                      re.IGNORECASE if ignore_case else 0)
+
+
+def count_matches(data, pattern):
+    if isinstance(pattern, bytes):
+        return data.count(pattern)
+    return sum(1 for _ in pattern.finditer(data))
+
+
+def _init_worker(git_dir):
+    global _worker_repo
+    _worker_repo = Repository(git_dir)
+
+
+def _count_job(pattern, sha):
+    return sha, count_matches(_worker_repo.read(sha)[1], pattern)
+
+
+def count_blobs(repo, blobs, pattern, jobs=None):
+    """{blob: match count}, resolving and searching blobs in parallel."""
+    # Pack order keeps each worker's slice of a delta chain together
+    blobs = sorted(blobs, key=lambda sha: repo.locate(sha) or (-1, 0))
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(blobs) < POOL_MIN_BLOBS:
+        return {sha: count_matches(repo.read(sha)[1], pattern) for sha in blobs}
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunk = max(1, -(-len(blobs) // (jobs * 4)))
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(repo.git_dir,)) as pool:
+        return dict(pool.map(partial(_count_job, pattern), blobs, chunksize=chunk))
+
+
+def pickaxe(repo, start, path, pattern, jobs=None, first_parent=False):
+    """(commit, parent_count, count) for every commit that changed the match count.
+
+    Merge commits are skipped unless first_parent is set, as in git log -S.
+    """
+    commits = list(history(repo, start, path, first_parent))
+    blob_of = {commit['sha']: blob for commit, blob in commits}
+    counts = count_blobs(repo, {blob for blob in blob_of.values() if blob}, pattern, jobs)
+    counts[None] = 0
+
+    changes = []
+    for commit, blob in commits:
+        parents = commit['parents'][:1] if first_parent else commit['parents']
+        if len(parents) > 1:
+            continue
+        before = counts[blob_of.get(parents[0])] if parents else 0
+        after = counts[blob]
+        if before != after:
+            changes.append((commit, before, after))
+    return changes, len(commits), len(counts) - 1
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Find the commits that added or removed a string.')
+    parser.add_argument('string', help='text to look for (a regex with -E)')
+    parser.add_argument('rev', nargs='?', default='HEAD', help='where to start walking (default: HEAD)')
+    parser.add_argument('--path', default=DEFAULT_FILE, help=f'file to search (default: {DEFAULT_FILE})')
+    parser.add_argument('-E', '--regex', action='store_true', help='treat STRING as a regular expression')
+    parser.add_argument('-i', '--ignore-case', action='store_true')
+    parser.add_argument('--first-parent', action='store_true', help='follow only first parents')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        repo = Repository()
+        pattern = compile_pattern(args.string, args.regex, args.ignore_case)
+        changes, revisions, blobs = pickaxe(
+            repo, repo.resolve(args.rev), args.path, pattern, args.jobs, args.first_parent)
+    except (GitObjectError, re.error) as e:
+        print(f"ERROR: {e}")
+        return 2
+
+    for commit, before, after in changes:
+        subject = commit['message'].split('\n', 1)[0]
+        print(f"{commit['sha'][:7]} {subject}  ({before} -> {after})")
+    print(f"{len(changes)} commits changed the match count; searched {revisions} revisions "
+          f"({blobs} distinct) in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return 0 if changes else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Piece-table document buffer shared by resolve_conflicts.py and codemod.py.
+
+The document is a list of pieces, each a (buffer, start, end) span. The
+original file text is kept as one immutable buffer and every inserted string
+becomes its own buffer, so an edit only splits the piece list: nothing is
+copied however many edits a run applies. The result is streamed to disk in
+bounded chunks, so peak memory stays close to one copy of the input.
+
+The original may also be a memoryview over bytes (an mmap, see
+mapped_file.py) with bytes insertions; chunks() then yields zero-copy
+slices of the mapping and bytes(doc) replaces str(doc).
+"""
+
+WRITE_CHUNK = 1 << 16
+
+
+class PieceTable:
+    """An editable view over an immutable original string."""
+
+    def __init__(self, original):
+        self.original = original
+        self._pieces = [(original, 0, len(original))] if original else []
+        self._length = len(original)
+
+    @classmethod
+    def from_replacements(cls, original, replacements):
+        """Build a document from (start, end, text) replacements in original coordinates.
+
+        Replacements must be sorted and non-overlapping; the piece list is
+        built in one pass instead of being split once per edit.
+        """
+        doc = cls(original)
+        pieces = []
+        pos = 0
+        for start, end, text in replacements:
+            if start < pos:
+                raise ValueError(f'replacement at {start} overlaps the previous one ending at {pos}')
+            if start > pos:
+                pieces.append((original, pos, start))
+            if text:
+                pieces.append((text, 0, len(text)))
+            doc._length += len(text) - (end - start)
+            pos = end
+        if pos < len(original):
+            pieces.append((original, pos, len(original)))
+        doc._pieces = pieces
+        return doc
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        return ''.join(buf[start:end] for buf, start, end in self._pieces)
+
+    def __bytes__(self):
+        return b''.join(buf[start:end] for buf, start, end in self._pieces)
+
+    def spans(self):
+        """Yield (buffer, start, end) for each piece in document order."""
+        return iter(self._pieces)
+
+    def _split(self, offset):
+        """Ensure a piece boundary at offset and return the index of the piece starting there."""
+        pos = 0
+        for index, (buf, start, end) in enumerate(self._pieces):
+            size = end - start
+            if offset == pos:
+                return index
+            if offset < pos + size:
+                cut = start + offset - pos
+                self._pieces[index:index + 1] = [(buf, start, cut), (buf, cut, end)]
+                return index + 1
+            pos += size
+        if offset == pos:
+            return len(self._pieces)
+        raise IndexError(f'offset {offset} outside document of length {self._length}')
+
+    def replace(self, start, end, text):
+        """Replace document[start:end] with text (offsets in current document coordinates)."""
+        if not 0 <= start <= end <= self._length:
+            raise IndexError(f'range {start}:{end} outside document of length {self._length}')
+        first = self._split(start)
+        last = self._split(end)
+        self._pieces[first:last] = [(text, 0, len(text))] if text else []
+        self._length += len(text) - (end - start)
+
+    def insert(self, offset, text):
+        self.replace(offset, offset, text)
+
+    def delete(self, start, end):
+        self.replace(start, end, '')
+
+    def chunks(self, size=WRITE_CHUNK):
+        """Yield the document as strings of at most `size` characters."""
+        for buf, start, end in self._pieces:
+            while end - start > size:
+                yield buf[start:start + size]
+                start += size
+            if end > start:
+                yield buf[start:end]
+
+    def write_to(self, f):
+        """Stream the document into an open text file."""
+        for chunk in self.chunks():
+            f.write(chunk)
+
+    def release(self):
+        """Drop the pieces and release a memoryview original, so the mmap
+        under it can be closed; the document is empty afterwards."""
+        self._pieces = []
+        self._length = 0
+        if isinstance(self.original, memoryview):
+            self.original.release()
+
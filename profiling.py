@@ -0,0 +1,112 @@
+"""Opt-in per-edit and per-hunk profiling for codemod.py and resolve_conflicts.py.
+
+Pass --profile REPORT.json to a recipe script or to resolve_conflicts.py and
+every anchor and every conflict hunk gets one record:
+
+    seconds  time spent on it (for a hunk, including the scan of the plain
+             lines since the previous hunk)
+    scanned  characters searched for it (bytes when the input is a buffer)
+    copied   characters of new text it puts into the output
+    matches  anchor matches, or 1 for a hunk
+    peak     bytes allocated at its high point on top of what was already in
+             use when it started (tracemalloc; only Python allocations
+             count, not an mmap'd input)
+    detail   how the anchor matched ('exact', 'fuzzy') or how the hunk was
+             resolved
+
+A final 'write' record covers streaming the result to disk. The report is
+written as JSON and the slowest and hungriest records are printed.
+tracemalloc slows the run down, so the absolute times are inflated; compare
+records with each other, and use bench.py for real throughput.
+"""
+
+import sys
+import time
+
+SUMMARY_TOP = 5
+
+
+class Profile:
+    """Collects one record per lap; a lap runs from the previous mark() or lap()."""
+
+    def __init__(self, command, memory=True):
+        self.command = command
+        self.records = []
+        self.memory = memory
+        if memory:
+            import tracemalloc
+
+            tracemalloc.start()
+        self._base = self._top = 0
+        self._started = self._mark = time.perf_counter()
+
+    def mark(self):
+        """Start the next lap now, dropping whatever ran since the last one."""
+        if self.memory:
+            import tracemalloc
+
+            # reset_peak() would lose the run's overall high point
+            self._top = max(self._top, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._base = tracemalloc.get_traced_memory()[0]
+        self._mark = time.perf_counter()
+
+    def lap(self, kind, name, scanned=0, copied=0, matches=0, detail=None):
+        now = time.perf_counter()
+        peak = 0
+        if self.memory:
+            import tracemalloc
+
+            peak = tracemalloc.get_traced_memory()[1] - self._base
+        self.records.append({
+            'kind': kind, 'name': name, 'seconds': now - self._mark, 'scanned': scanned,
+            'copied': copied, 'matches': matches, 'peak': peak, 'detail': detail,
+        })
+        self.mark()
+
+    def stop(self):
+        """Stop tracing and return the report as a dict."""
+        total = time.perf_counter() - self._started
+        peak = 0
+        if self.memory:
+            import tracemalloc
+
+            peak = max(self._top, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            self.memory = False
+        return {'command': self.command, 'seconds': total, 'peak': peak, 'records': self.records}
+
+    def save(self, path, out=sys.stdout):
+        """Stop, write the JSON report to path and print the summary."""
+        import json
+
+        from mapped_file import write_atomic
+
+        report = self.stop()
+        write_atomic(path, [json.dumps(report, indent=2).encode()], prefix='.profile-')
+        summary(report, out)
+        out.write(f"Profile written to {path}\n")
+
+
+def _kb(size):
+    return f'{size / 1024:.0f} KB'
+
+
+def summary(report, out=sys.stdout, top=SUMMARY_TOP):
+    """Print totals plus the records that took the most time and memory."""
+    records = report['records']
+    scanned = sum(r['scanned'] for r in records)
+    copied = sum(r['copied'] for r in records)
+    out.write(f"Profile: {len(records)} records in {report['seconds'] * 1000:.1f} ms, "
+              f"scanned {scanned}, copied {copied}, peak {_kb(report['peak'])}\n")
+    if not records:
+        return
+    total = sum(r['seconds'] for r in records) or 1
+    out.write("  slowest:\n")
+    for r in sorted(records, key=lambda r: r['seconds'], reverse=True)[:top]:
+        detail = f" ({r['detail']})" if r['detail'] else ''
+        out.write(f"    {r['seconds'] * 1000:8.2f} ms {r['seconds'] / total:4.0%}  "
+                  f"{r['kind']} {r['name']}{detail}\n")
+    out.write("  highest peak:\n")
+    for r in sorted(records, key=lambda r: r['peak'], reverse=True)[:top]:
+        out.write(f"    {_kb(r['peak']):>11}       {r['kind']} {r['name']}\n")
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""Declarative recipes: codemod edits in a TOML file instead of a script.
+
+    [recipe]
+    name = "voice_feature"
+    version = "2.3.18"
+    description = "Add Voice-to-Tasks feature to Trackli"
+    target = "src/components/KanbanBoard.jsx"   # relative to the repository
+    message = "Voice input feature added successfully!"
+
+    [[edit]]
+    name = "voice_state"
+    anchor = '''
+      const [showExtractedTasks, setShowExtractedTasks] = useState(false)'''
+    replacement = '''
+    ...'''
+    expect = 1                                   # optional, default 1
+    target = "src/components/kanban/constants.js"  # optional, default [recipe] target
+
+Edits are applied in one pass per file, as codemod.apply_to_file does, so
+anchors are matched against the file's original text. A relative target is
+resolved against the top of the git checkout holding the recipe, so recipes
+work from any clone. JSON files with the same structure are accepted too.
+
+Parsing is done once. The compiled form (target, metadata, edits with their
+anchor lengths and hashes, and the recipe fingerprint codemod records) is
+marshalled into .git/trackli-recipe-cache/ and reused while the source file's
+size, mtime and hash are unchanged, so a batch loads without re-parsing:
+
+    python recipes.py apply recipes/*.toml        # --dry-run, --revert, --force
+    python recipes.py compile recipes/*.toml
+    python recipes.py convert "Addtl Files/some_feature.py" -o some_feature.toml \\
+        --target src/components/KanbanBoard.jsx
+
+A batch runs in one process. Recipes that are already applied are skipped
+using the stored fingerprint. Two recipes with the same anchor on the same
+file are rejected before anything is written. The batch is one transaction
+(see transaction.py). Every file's output is computed in memory first, each
+recipe seeing the output of the ones before it. Only if all of them succeed
+are the files written together; an interrupted write is rolled back from the
+journal in .git/trackli-journal.json on the next apply.
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+
+from codemod import AnchorError, Edit, recipe_hash
+
+CACHE_NAME = 'trackli-recipe-cache'
+# Bump when the compiled layout changes; older cache files are recompiled
+FORMAT_VERSION = 2
+RECIPE_EXTENSIONS = ('.toml', '.json')
+META_KEYS = ('name', 'version', 'description', 'target', 'message')
+
+
+class RecipeError(ValueError):
+    """Raised for a recipe file that cannot be read or is malformed."""
+
+    def __init__(self, path, message):
+        self.path = path
+        super().__init__(f'{path}: {message}')
+
+
+class Recipe:
+    """A compiled recipe.
+
+    targets holds each edit's own target (None for the recipe's), anchors
+    (length in UTF-8 bytes, sha1) per edit. groups lists (target, edits,
+    fingerprint) per file in first-use order, the fingerprint being the
+    codemod.recipe_hash() of those edits under which applications are
+    recorded; fingerprint is the one of all edits.
+    """
+
+    __slots__ = ('path', 'name', 'version', 'description', 'target', 'message',
+                 'edits', 'targets', 'anchors', 'fingerprint', 'groups')
+
+    def __init__(self, path, meta, edits, targets=None, anchors=None, fingerprints=None):
+        self.path = path
+        self.name = meta.get('name') or os.path.splitext(os.path.basename(path))[0]
+        self.version = meta.get('version')
+        self.description = meta.get('description')
+        self.target = meta['target']
+        self.message = meta.get('message')
+        self.edits = edits
+        self.targets = targets or [None] * len(edits)
+        self.anchors = anchors or [_anchor_key(edit.anchor) for edit in edits]
+        by_target = {}
+        for edit, target in zip(edits, self.targets):
+            by_target.setdefault(target or self.target, []).append(edit)
+        if fingerprints is None:
+            fingerprints = [recipe_hash(group) for group in by_target.values()]
+            fingerprints.append(fingerprints[0] if len(by_target) == 1 else recipe_hash(edits))
+        self.groups = [(target, group, fp) for (target, group), fp in zip(by_target.items(), fingerprints)]
+        self.fingerprint = fingerprints[-1]
+
+    def __repr__(self):
+        return f'<Recipe {self.name} {self.version or ""}>'
+
+    @property
+    def label(self):
+        return f'{self.name} {self.version}' if self.version else self.name
+
+    def target_path(self, target=None):
+        """A target (by default the recipe's) as an absolute path."""
+        target = target or self.target
+        if os.path.isabs(target):
+            return target
+        return os.path.join(_checkout_root(os.path.dirname(os.path.abspath(self.path))), target)
+
+
+def _anchor_key(anchor):
+    data = anchor.encode('utf-8', 'surrogateescape')
+    return len(data), hashlib.sha1(data).hexdigest()
+
+
+_roots = {}
+
+
+def _checkout_root(directory):
+    """Top of the git checkout containing directory (directory itself outside git)."""
+    if directory not in _roots:
+        import subprocess
+
+        try:
+            _roots[directory] = subprocess.run(
+                ['git', 'rev-parse', '--show-toplevel'],
+                cwd=directory, check=True, capture_output=True, text=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            _roots[directory] = directory
+    return _roots[directory]
+
+
+def parse(path, data=None):
+    """Read and check a TOML or JSON recipe file; returns a Recipe."""
+    if data is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+    try:
+        if path.endswith('.json'):
+            import json
+
+            doc = json.loads(data)
+        else:
+            import tomllib
+
+            doc = tomllib.loads(data.decode('utf-8'))
+    except ValueError as e:
+        raise RecipeError(path, f'cannot parse: {e}') from None
+
+    meta = doc.get('recipe')
+    if not isinstance(meta, dict):
+        raise RecipeError(path, 'missing [recipe] table')
+    unknown = sorted(set(meta) - set(META_KEYS))
+    if unknown:
+        raise RecipeError(path, f"unknown [recipe] key {unknown[0]!r}")
+    if not isinstance(meta.get('target'), str) or not meta['target']:
+        raise RecipeError(path, '[recipe] needs a target path')
+    for key in META_KEYS:
+        if key in meta and not isinstance(meta[key], str):
+            raise RecipeError(path, f'[recipe] {key} must be a string')
+
+    entries = doc.get('edit')
+    if not isinstance(entries, list) or not entries:
+        raise RecipeError(path, 'no [[edit]] entries')
+    edits = []
+    targets = []
+    for number, entry in enumerate(entries, 1):
+        anchor = entry.get('anchor')
+        replacement = entry.get('replacement')
+        expect = entry.get('expect', 1)
+        target = entry.get('target')
+        if not isinstance(anchor, str) or not isinstance(replacement, str):
+            raise RecipeError(path, f'edit #{number} needs string anchor and replacement')
+        if expect is not None and not (isinstance(expect, int) and expect >= 0):
+            raise RecipeError(path, f'edit #{number}: expect must be a non-negative integer')
+        if target is not None and not (isinstance(target, str) and target):
+            raise RecipeError(path, f'edit #{number}: target must be a path')
+        try:
+            edits.append(Edit(anchor, replacement, entry.get('name'), expect))
+        except AnchorError as e:
+            raise RecipeError(path, str(e)) from None
+        targets.append(target)
+    return Recipe(path, meta, edits, targets)
+
+
+def _cache_path(path, cache_dir):
+    key = hashlib.sha1(os.path.realpath(path).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f'{os.path.basename(path)}-{key}.bin')
+
+
+def default_cache_dir(path):
+    """The cache directory in the git dir holding path, or None outside git."""
+    from mapped_file import git_dir
+
+    root = git_dir(os.path.dirname(os.path.abspath(path)))
+    return os.path.join(root, CACHE_NAME) if root else None
+
+
+def load(path, cache_dir=False):
+    """Load a recipe, from its compiled form when that is still fresh.
+
+    cache_dir=False uses the repository's cache, None disables caching.
+    Returns (recipe, status) with status 'cached' or 'compiled'.
+    """
+    st = os.stat(path)
+    if cache_dir is False:
+        cache_dir = default_cache_dir(path)
+    cache_path = _cache_path(path, cache_dir) if cache_dir else None
+    compiled = None
+    if cache_path:
+        try:
+            with open(cache_path, 'rb') as f:
+                compiled = marshal.load(f)
+        except (FileNotFoundError, EOFError, ValueError, TypeError):
+            compiled = None
+        if not (isinstance(compiled, tuple) and compiled[0] == FORMAT_VERSION):
+            compiled = None
+    if compiled and compiled[1:3] == (st.st_size, st.st_mtime_ns):
+        return _from_compiled(path, compiled), 'cached'
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if compiled and compiled[3] == digest:
+        # Touched but unchanged
+        recipe = _from_compiled(path, compiled)
+    else:
+        recipe = parse(path, data)
+    if cache_path:
+        from mapped_file import write_atomic
+
+        os.makedirs(cache_dir, exist_ok=True)
+        payload = (
+            FORMAT_VERSION, st.st_size, st.st_mtime_ns, digest,
+            {key: getattr(recipe, key) for key in META_KEYS if getattr(recipe, key) is not None},
+            [(e.name, e.anchor, e.replacement, e.expect) for e in recipe.edits],
+            recipe.targets, recipe.anchors,
+            [fingerprint for _, _, fingerprint in recipe.groups] + [recipe.fingerprint],
+        )
+        write_atomic(cache_path, [marshal.dumps(payload)], prefix='.recipe-cache-')
+    return recipe, 'compiled'
+
+
+def _from_compiled(path, compiled):
+    _, _, _, _, meta, edits, targets, anchors, fingerprints = compiled
+    edits = [Edit(anchor, replacement, name, expect) for name, anchor, replacement, expect in edits]
+    return Recipe(path, meta, edits, targets, [tuple(a) for a in anchors], fingerprints)
+
+
+def check_batch(recipes):
+    """Messages for recipes that share an anchor on the same target."""
+    seen = {}
+    problems = []
+    for recipe in recipes:
+        for number, (edit, target, key) in enumerate(zip(recipe.edits, recipe.targets, recipe.anchors), 1):
+            other = seen.setdefault((os.path.realpath(recipe.target_path(target)), key), recipe)
+            if other is not recipe:
+                problems.append(f'{recipe.label} and {other.label} both replace the anchor of '
+                                f'{edit.name or f"edit #{number}"} in {target or recipe.target}')
+    return problems
+
+
+def _toml_string(text):
+    """text as a TOML string, a multi-line literal where that can hold it."""
+    if "'''" not in text and not text.endswith("'") and all(
+            ch in '\n\t' or ord(ch) >= 0x20 and ch != '\x7f' for ch in text):
+        return f"'''\n{text}'''"
+    import json
+
+    return json.dumps(text, ensure_ascii=False)
+
+
+def to_toml(meta, edits):
+    """A recipe file's text for meta (a dict of META_KEYS) and edits."""
+    lines = ['[recipe]\n']
+    for key in META_KEYS:
+        if meta.get(key) is not None:
+            lines.append(f'{key} = {_toml_string(meta[key]) if chr(10) in meta[key] else _quote(meta[key])}\n')
+    for edit in edits:
+        lines.append('\n[[edit]]\n')
+        if edit.name:
+            lines.append(f'name = {_quote(edit.name)}\n')
+        if edit.expect != 1:
+            lines.append(f'expect = {edit.expect}\n' if edit.expect is not None else '')
+        lines.append(f'anchor = {_toml_string(edit.anchor)}\n')
+        lines.append(f'replacement = {_toml_string(edit.replacement)}\n')
+    return ''.join(lines)
+
+
+def _quote(value):
+    import json
+
+    return json.dumps(value, ensure_ascii=False)
+
+
+def convert(script_path, out_path, target=None, name=None, version=None):
+    """Write the edits of a codemod recipe script as a declarative recipe."""
+    from codemod import load_recipe
+
+    file_path, edits = load_recipe(script_path)
+    if any(edit.expect is None for edit in edits):
+        raise RecipeError(script_path, 'edits with expect=None cannot be written as TOML; set a count')
+    meta = {
+        'name': name or os.path.splitext(os.path.basename(script_path))[0],
+        'version': version,
+        'target': target or file_path,
+    }
+    text = to_toml(meta, edits)
+    parsed = parse(out_path, text.encode('utf-8'))
+    if [(e.anchor, e.replacement, e.name, e.expect) for e in parsed.edits] != \
+            [(e.anchor, e.replacement, e.name, e.expect) for e in edits]:
+        raise RecipeError(out_path, 'the edits did not survive a round trip through TOML')
+    with open(out_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return parsed
+
+
+def _in_place(content, edits):
+    """True if every edit's replacement is already in content as often as expected.
+
+    The fingerprints in RecipeState only describe a file's latest output, so a
+    recipe applied before another one edited the same file is recognised this
+    way instead.
+    """
+    from codemod import find_all
+
+    text = bytes(content).decode('utf-8', 'surrogateescape')
+    for edit in edits:
+        if not edit.replacement:
+            if edit.anchor in text:
+                return False
+        elif sum(1 for _ in find_all(text, edit.replacement)) < (edit.expect or 1):
+            return False
+    return True
+
+
+def journal_path(file_path):
+    """.git/trackli-journal.json for the repository holding file_path, or a
+    hidden file next to it outside git."""
+    from mapped_file import git_dir
+    from transaction import JOURNAL_NAME
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    root = git_dir(directory)
+    return os.path.join(root, JOURNAL_NAME) if root else os.path.join(directory, '.' + JOURNAL_NAME)
+
+
+def apply_batch(recipes, dry_run=False, revert=False, force=False, fuzz=None, validate=True,
+                journal=None, out=sys.stdout):
+    """Apply (or revert, or preview) recipes in order; returns the number that failed.
+
+    Outputs are staged in memory and written as one transaction.Transaction,
+    journalled at journal (by default next to the first target's repository),
+    only when no recipe failed.
+    """
+    import codemod
+    import jsx_lexer
+    from transaction import Transaction
+
+    failed = 0
+    states = {}
+    shared = {}
+    staged = {}
+    applied = []
+    done = []
+    for recipe in recipes:
+        targets = []
+        for target, edits, fingerprint in recipe.groups:
+            path = recipe.target_path(target)
+            target = target or recipe.target
+            if dry_run:
+                out.write(f"{recipe.label} -> {target}\n")
+                problems = codemod.dry_run(path, codemod.invert(edits) if revert else edits, out, fuzz)
+                for problem in problems:
+                    out.write(f"ERROR: {problem}\n")
+                failed += bool(problems)
+                continue
+            state = None
+            if not force:
+                directory = os.path.dirname(os.path.abspath(path))
+                if directory not in states:
+                    # One RecipeState per repository, so records are not overwritten
+                    state = codemod.RecipeState.for_file(path)
+                    if state is not None:
+                        state = shared.setdefault(state.path, state)
+                    states[directory] = state
+                state = states[directory]
+            if (state is not None and not revert and path not in staged
+                    and state.is_applied(fingerprint, path)):
+                out.write(f"✓ {recipe.label}: already applied to {target}\n")
+                continue
+            try:
+                content = staged.get(path)
+                if content is None:
+                    with open(path, 'rb') as f:
+                        content = f.read()
+                doc, counts = codemod.render(content, codemod.invert(edits) if revert else edits,
+                                             path, fuzz, validate)
+            except AnchorError as e:
+                if not revert and _in_place(content, edits):
+                    out.write(f"✓ {recipe.label}: already applied to {target}\n")
+                else:
+                    out.write(f"ERROR: {recipe.label}: {target}: {e}\n")
+                    failed += 1
+                continue
+            except OSError as e:
+                out.write(f"ERROR: {recipe.label}: {e}\n")
+                failed += 1
+                continue
+            except jsx_lexer.LexError as e:
+                out.write(f"ERROR: {recipe.label}: {target} would not parse: {e}\n")
+                failed += 1
+                continue
+            codemod.report(edits, counts, out)
+            staged[path] = bytes(doc)
+            targets.append(target)
+            applied.append((state, fingerprint, path, hashlib.sha256(content).hexdigest(),
+                            hashlib.sha256(staged[path]).hexdigest()))
+        if targets:
+            done.append(f"{recipe.label}: {'reverted' if revert else recipe.message or 'applied'} "
+                        f"({', '.join(targets)})\n")
+
+    if dry_run or not staged:
+        return failed
+    if failed:
+        out.write(f"Nothing written: {failed} failed\n")
+        return failed
+    txn = Transaction(journal or journal_path(next(iter(staged))))
+    for path, data in staged.items():
+        txn.stage(path, [data])
+    try:
+        written = txn.commit()
+    except OSError as e:
+        out.write(f"ERROR: writing failed, every file rolled back: {e}\n")
+        return 1
+    for state, fingerprint, path, input_hash, output_hash in applied:
+        if state is None:
+            continue
+        if revert:
+            state.forget(fingerprint, path)
+        else:
+            state.record(fingerprint, path, input_hash, output_hash)
+    out.writelines(done)
+    out.write(f"✓ Wrote {len(written)} file{'s' if len(written) != 1 else ''}\n")
+    return 0
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compile and apply declarative recipes.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    apply_cmd = sub.add_parser('apply', help='apply recipes as one transaction')
+    apply_cmd.add_argument('recipes', nargs='+')
+    apply_cmd.add_argument('--dry-run', action='store_true', help='check anchors and show diffs only')
+    apply_cmd.add_argument('--revert', action='store_true', help='undo the recipes instead')
+    apply_cmd.add_argument('--force', action='store_true', help='ignore the recorded fingerprints')
+    apply_cmd.add_argument('--fuzz', type=int, default=None, help='let drifted anchors match (see codemod)')
+    apply_cmd.add_argument('--no-validate', dest='validate', action='store_false',
+                           help='write JS/JSX output even if it no longer parses')
+    compile_cmd = sub.add_parser('compile', help='refresh the compiled cache')
+    compile_cmd.add_argument('recipes', nargs='+')
+    convert_cmd = sub.add_parser('convert', help='turn a recipe script into a TOML recipe')
+    convert_cmd.add_argument('script')
+    convert_cmd.add_argument('-o', '--output', required=True)
+    convert_cmd.add_argument('--target', help='target path to record, relative to the repository')
+    convert_cmd.add_argument('--name')
+    convert_cmd.add_argument('--version')
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        try:
+            recipe = convert(args.script, args.output, args.target, args.name, args.version)
+        except (RecipeError, AnchorError, OSError) as e:
+            print(f"ERROR: {e}")
+            return 1
+        print(f"✓ Wrote {args.output}: {len(recipe.edits)} edits for {recipe.target}")
+        return 0
+
+    recipes = []
+    for path in args.recipes:
+        try:
+            recipe, status = load(path)
+        except (RecipeError, OSError) as e:
+            print(f"ERROR: {e}")
+            return 1
+        recipes.append(recipe)
+        if args.command == 'compile':
+            print(f"{path}: {status} ({len(recipe.edits)} edits, {recipe.fingerprint[:12]})")
+    if args.command == 'compile':
+        return 0
+
+    problems = check_batch(recipes)
+    for problem in problems:
+        print(f"ERROR: {problem}")
+    if problems:
+        print("Nothing written")
+        return 1
+    journal = journal_path(recipes[0].target_path())
+    if not args.dry_run:
+        from transaction import COMMITTED, recover
+
+        state, paths = recover(journal)
+        if state is not None:
+            print(f"Finished an interrupted apply: {len(paths)} files "
+                  f"{'kept' if state == COMMITTED else 'rolled back'}")
+    failed = apply_batch(recipes, args.dry_run, args.revert, args.force, args.fuzz, args.validate, journal)
+    if args.dry_run:
+        print("Dry run: no files written")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
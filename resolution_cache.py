@@ -0,0 +1,106 @@
+"""On-disk memory of resolved conflict hunks, in the spirit of `git rerere`.
+
+Each resolution is stored as its own file, named by a hash of the hunk's
+ours/base/theirs text, so concurrent resolver processes never contend for a
+shared index. Hits refresh the entry's mtime and prune() evicts the least
+recently used entries beyond the configured limit.
+"""
+
+import hashlib
+import os
+
+CACHE_NAME = 'trackli-rr-cache'
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def default_cache_dir(cwd=None):
+    """The cache directory inside the repository's git dir, or None outside a repo."""
+    from mapped_file import git_dir
+
+    root = git_dir(cwd)
+    return os.path.join(root, CACHE_NAME) if root else None
+
+
+def hunk_key(ours, base, theirs, rule=''):
+    """Hash the three sides of a hunk and the rule it is resolved under.
+
+    Marker labels are deliberately ignored. The rule (see
+    resolve_conflicts.resolve_hunk) keeps a resolution made under one
+    --strategy or --keep from being replayed under another.
+    """
+    h = hashlib.sha256(rule.encode('utf-8', 'surrogateescape') + b'\x00')
+    for side in (ours, base, theirs):
+        if side is None:
+            h.update(b'\x01')
+            continue
+        h.update(b'\x00')
+        for line in side:
+            h.update(line.encode('utf-8', 'surrogateescape'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+class ResolutionCache:
+    """Content-addressed store of hunk resolutions with LRU eviction."""
+
+    def __init__(self, directory, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        # Resolutions recorded by put(), so callers know when to prune()
+        self.added = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, hunk, rule=''):
+        """Return the recorded lines for a hunk, or None if it hasn't been seen."""
+        path = self._path(hunk_key(hunk.ours, hunk.base, hunk.theirs, rule))
+        try:
+            with open(path, 'r', newline='', encoding='utf-8', errors='surrogateescape') as f:
+                lines = f.read().splitlines(keepends=True)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return lines
+
+    def put(self, hunk, lines, rule=''):
+        """Record the lines a hunk was resolved to."""
+        from mapped_file import write_atomic
+
+        path = self._path(hunk_key(hunk.ours, hunk.base, hunk.theirs, rule))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, [''.join(lines).encode('utf-8', 'surrogateescape')], prefix='.tmp-')
+        self.added += 1
+
+    def forget(self, hunk, rule=''):
+        """Drop a hunk's recorded resolution, e.g. one whose result did not parse."""
+        try:
+            os.unlink(self._path(hunk_key(hunk.ours, hunk.base, hunk.theirs, rule)))
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        """Yield (mtime, path) for every stored resolution."""
+        try:
+            shards = os.scandir(self.directory)
+        except FileNotFoundError:
+            return
+        with shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as files:
+                    for entry in files:
+                        if entry.is_file() and not entry.name.startswith('.tmp-'):
+                            yield entry.stat().st_mtime, entry.path
+
+    def prune(self):
+        """Evict least recently used entries beyond max_entries; return how many went."""
+        entries = sorted(self.entries(), reverse=True)
+        stale = entries[self.max_entries:]
+        for _, path in stale:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        return len(stale)
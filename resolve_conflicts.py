@@ -1,34 +1,600 @@
 #!/usr/bin/env python3
-"""Resolve merge conflicts by keeping develop version (which has new features)"""
+"""Resolve merge conflicts by keeping develop version (which has new features)
 
-import re
+Other strategies are available with --strategy / --keep; hunks that only one
+side changed relative to the diff3 base are re-merged automatically.
+Every resolution is remembered (see resolution_cache.py) and replayed the
+next time the same hunk conflicts. With --remerge, unmerged paths are first
+merged again from git's index stages with the histogram diff of merge3.py,
+which leaves fewer conflicts than git's default merge. A resolved JS/JSX file is checked with
+jsx_lexer.validate() and left untouched if it no longer parses.
 
-file_path = 'src/components/KanbanBoard.jsx'
+Files are memory-mapped and handled as bytes: only the lines between the
+first and last conflict markers are decoded, the rest is copied through
+unchanged, so CRLF endings and non-UTF-8 bytes survive, and the result
+replaces the file atomically.
+"""
 
-with open(file_path, 'r') as f:
-    content = f.read()
+import os
+import sys
+from collections import deque
+from functools import partial
 
-# Find and resolve all merge conflicts - keep the develop version
-def resolve_conflicts(text):
-    # Pattern for merge conflicts
-    pattern = r'<<<<<<< HEAD\n(.*?)\n=======\n(.*?)\n>>>>>>> develop'
-    
-    def replacer(match):
-        # Keep the develop version (group 2)
-        return match.group(2)
-    
-    # Use DOTALL flag to match across lines
-    return re.sub(pattern, replacer, text, flags=re.DOTALL)
+import jsx_lexer
+from mapped_file import count_lines, find_line, git_dir, map_file, write_atomic
+from piece_table import PieceTable
+from resolution_cache import DEFAULT_MAX_ENTRIES, ResolutionCache, default_cache_dir
 
-resolved = resolve_conflicts(content)
+DEFAULT_FILE = 'src/components/KanbanBoard.jsx'
 
-# Check if conflicts were resolved
-if '<<<<<<' in resolved:
-    print("WARNING: Some conflicts may not be resolved")
-else:
-    print("✓ All merge conflicts resolved")
+# Heavier modules (argparse, subprocess, tempfile, concurrent.futures) are
+# imported inside the functions that need them so merge_driver.py, which git
+# launches once per file, only pays for the scanner and strategies.
 
-with open(file_path, 'w') as f:
-    f.write(resolved)
+# Git writes conflict markers as exactly seven characters at the start of a
+# line, optionally followed by a space and a label.
+MARKER_OURS = '<<<<<<<'
+MARKER_BASE = '|||||||'
+MARKER_SEP = '======='
+MARKER_THEIRS = '>>>>>>>'
 
-print("Done!")
+
+class ConflictError(ValueError):
+    """Raised when conflict markers are nested, stray or unterminated, or the
+    resolved text of a JS/JSX file does not parse."""
+
+    def __init__(self, path, line, message):
+        self.path = path
+        self.line = line
+        super().__init__(f'{path}:{line}: {message}')
+
+
+class Hunk:
+    """One conflict block, with 1-based line numbers of its opening/closing markers."""
+
+    def __init__(self, start, ours_label, offset=0):
+        self.start = start
+        self.end = None
+        # Character offsets of the whole block, closing marker line included
+        self.offset = offset
+        self.end_offset = None
+        self.ours_label = ours_label
+        self.theirs_label = ''
+        self.ours = []
+        self.base = None
+        self.theirs = []
+        # Raw marker lines, kept so an unresolved hunk can be written back as-is
+        self.markers = []
+        self.resolution = None
+        # The rule the hunk was resolved under; part of its cache key
+        self.rule = ''
+
+    def render(self):
+        """The hunk exactly as it appeared in the input, markers included."""
+        out = [self.markers[0], *self.ours]
+        if self.base is not None:
+            out += [self.markers[1], *self.base]
+        out += [self.markers[-2], *self.theirs, self.markers[-1]]
+        return out
+
+    def __repr__(self):
+        return f'<Hunk lines {self.start}-{self.end} {self.ours_label!r}/{self.theirs_label!r}>'
+
+
+def _marker(line):
+    """Return (marker, label) if the line is a conflict marker, else (None, None)."""
+    head = line[:7]
+    if head not in (MARKER_OURS, MARKER_BASE, MARKER_SEP, MARKER_THEIRS):
+        return None, None
+    rest = line[7:]
+    if rest and rest[0] not in ' \r\n':
+        return None, None
+    return head, rest.strip()
+
+
+def iter_lines(text):
+    """Yield the lines of a string, endings kept, splitting on \\n only as git does."""
+    pos = 0
+    size = len(text)
+    while pos < size:
+        nl = text.find('\n', pos)
+        end = size if nl == -1 else nl + 1
+        yield text[pos:end]
+        pos = end
+
+
+def scan_conflicts(lines, path='<stream>', first_line=1):
+    """Single pass over an iterable of lines, yielding plain lines and Hunk objects.
+
+    Each line is examined once, so the cost is linear in the file size no matter
+    how many hunks it holds. Nested, stray or unterminated markers raise
+    ConflictError instead of being passed through. Lines are numbered from
+    first_line.
+    """
+    hunk = None
+    section = None
+    lineno = 0
+    offset = 0
+    for lineno, line in enumerate(lines, first_line):
+        marker, label = _marker(line)
+        offset += len(line)
+        if hunk is None:
+            if marker == MARKER_OURS:
+                hunk = Hunk(lineno, label, offset - len(line))
+                hunk.markers.append(line)
+                section = hunk.ours
+            elif marker in (MARKER_BASE, MARKER_THEIRS):
+                raise ConflictError(path, lineno, f'stray {marker} outside a conflict')
+            else:
+                # A lone ======= outside a hunk is ordinary text (e.g. Markdown).
+                yield line
+            continue
+
+        if marker is None:
+            section.append(line)
+        elif marker == MARKER_OURS:
+            raise ConflictError(path, lineno, f'nested conflict inside hunk opened at line {hunk.start}')
+        elif marker == MARKER_BASE:
+            if section is not hunk.ours:
+                raise ConflictError(path, lineno, f'unexpected {marker} in hunk opened at line {hunk.start}')
+            hunk.base = []
+            hunk.markers.append(line)
+            section = hunk.base
+        elif marker == MARKER_SEP:
+            if section is hunk.theirs:
+                raise ConflictError(path, lineno, f'duplicate {marker} in hunk opened at line {hunk.start}')
+            hunk.markers.append(line)
+            section = hunk.theirs
+        else:
+            if section is not hunk.theirs:
+                raise ConflictError(path, lineno, f'{marker} before {MARKER_SEP} in hunk opened at line {hunk.start}')
+            hunk.end = lineno
+            hunk.end_offset = offset
+            hunk.theirs_label = label
+            hunk.markers.append(line)
+            yield hunk
+            hunk = None
+            section = None
+
+    if hunk is not None:
+        raise ConflictError(path, lineno, f'unterminated conflict opened at line {hunk.start}')
+
+
+def _keep_ours(hunk):
+    return hunk.ours
+
+
+def _keep_theirs(hunk):
+    return hunk.theirs
+
+
+def _keep_union(hunk):
+    return hunk.ours + hunk.theirs
+
+
+# Each strategy maps a hunk to its replacement lines, or None to leave it
+STRATEGIES = {
+    'ours': _keep_ours,
+    'theirs': _keep_theirs,
+    'union': _keep_union,
+}
+
+
+def keep_label(label, hunk):
+    """Strategy keeping whichever side carries the given branch label."""
+    if hunk.theirs_label == label:
+        return hunk.theirs
+    if hunk.ours_label == label:
+        return hunk.ours
+    return None
+
+
+def auto_merge(hunk):
+    """Trivially merge a hunk where the two sides agree or only one side changed.
+
+    Returns (lines, side) or None when both sides made different changes.
+    """
+    if hunk.ours == hunk.theirs:
+        return hunk.ours, 'ours'
+    if hunk.base is None:
+        return None
+    if hunk.ours == hunk.base:
+        return hunk.theirs, 'theirs'
+    if hunk.theirs == hunk.base:
+        return hunk.ours, 'ours'
+    return None
+
+
+def resolve_hunk(hunk, strategy='theirs', keep=None, auto=True, cache=None):
+    """Return the replacement lines for a hunk, recording how it was resolved.
+
+    A resolution remembered in `cache` under the same rule (auto-merge on or
+    off plus the strategy, or the side `keep` selects) is replayed first.
+    `keep` names a branch label whose side wins and takes precedence over
+    `strategy`. Unresolved hunks come back as their original text, markers
+    included.
+    """
+    hunk.rule = _rule(hunk, strategy, keep, auto)
+    if cache is not None:
+        lines = cache.get(hunk, hunk.rule)
+        if lines is not None:
+            hunk.resolution = 'cached'
+            return lines
+    lines = _decide(hunk, strategy, keep, auto)
+    if lines is None:
+        return hunk.render()
+    if cache is not None:
+        cache.put(hunk, lines, hunk.rule)
+    return lines
+
+
+def _rule(hunk, strategy, keep, auto):
+    """What decides a hunk, so a cached resolution is only replayed under it."""
+    if keep:
+        # Labels are not part of the key, so record the side the label picks
+        side = 'theirs' if hunk.theirs_label == keep else 'ours' if hunk.ours_label == keep else '-'
+        rule = f'keep {side}'
+    else:
+        rule = strategy
+    return f'auto {rule}' if auto else rule
+
+
+def _decide(hunk, strategy, keep, auto):
+    """Pick the lines for a hunk without consulting the cache."""
+    if auto:
+        merged = auto_merge(hunk)
+        if merged is not None:
+            lines, side = merged
+            hunk.resolution = f'auto {side}'
+            return lines
+    if keep:
+        lines = keep_label(keep, hunk)
+        hunk.resolution = f'kept {keep}'
+    else:
+        lines = STRATEGIES[strategy](hunk)
+        hunk.resolution = strategy
+    if lines is None:
+        hunk.resolution = None
+    return lines
+
+
+def resolve_conflicts(text, path='<text>', hunks=None, strategy='theirs', keep=None, auto=True,
+                      cache=None, first_line=1, profile=None):
+    """Resolve every hunk in text and return the result as a PieceTable.
+
+    Each hunk becomes one span replacement over the original string, so the
+    output is never assembled in memory; stream it with PieceTable.write_to()
+    or call str() on it. Hunks are appended to `hunks` when a list is given.
+    With a profiling.Profile, each hunk is recorded as one lap together with
+    the scan of the lines before it.
+    """
+    replacements = []
+    if profile is not None:
+        profile.mark()
+    for item in scan_conflicts(iter_lines(text), path, first_line):
+        if isinstance(item, Hunk):
+            if hunks is not None:
+                hunks.append(item)
+            lines = resolve_hunk(item, strategy, keep, auto, cache)
+            replacement = ''.join(lines)
+            if profile is not None:
+                scanned = item.end_offset - (replacements[-1][1] if replacements else 0)
+                profile.lap('hunk', f'{path}:{item.start}-{item.end}', scanned=scanned,
+                            copied=len(replacement), matches=1, detail=item.resolution or 'unresolved')
+            replacements.append((item.offset, item.end_offset, replacement))
+    if profile is not None:
+        profile.lap('scan', f'{path} after the last hunk',
+                    scanned=len(text) - (replacements[-1][1] if replacements else 0))
+    return PieceTable.from_replacements(text, replacements)
+
+
+def _find_marker(buf, marker, start=0):
+    """Offset of the next line in a bytes buffer holding marker, or -1."""
+    pos = find_line(buf, marker, start)
+    while pos != -1 and buf[pos + 7:pos + 8] not in (b'', b' ', b'\r', b'\n'):
+        pos = find_line(buf, marker, pos + 1)
+    return pos
+
+
+def resolve_buffer(buf, path='<bytes>', hunks=None, strategy='theirs', keep=None, auto=True,
+                   cache=None, profile=None):
+    """Resolve the conflicts in a bytes buffer such as an mmap.
+
+    Markers are found with bytes searches and only the hunks themselves are
+    decoded (UTF-8 with surrogateescape, so any byte round-trips); the text
+    between them is never copied. Returns a PieceTable over memoryview(buf)
+    whose chunks are bytes-like, or None if there are no markers. The
+    options are those of resolve_conflicts().
+    """
+    view = memoryview(buf)
+    try:
+        markers = [m.encode() for m in (MARKER_OURS, MARKER_BASE, MARKER_THEIRS)]
+        # Next occurrence of each marker, refreshed once a hunk has passed it
+        found = [_find_marker(buf, marker) for marker in markers]
+        replacements = []
+        pos = 0
+        line = 1
+        if profile is not None:
+            profile.mark()
+        while True:
+            start, base, theirs = found
+            stray = min((p for p in (base, theirs) if p != -1), default=-1)
+            if stray != -1 and (start == -1 or stray < start):
+                marker = MARKER_BASE if stray == base else MARKER_THEIRS
+                raise ConflictError(path, line + count_lines(buf, stray, pos), f'stray {marker} outside a conflict')
+            if start == -1:
+                break
+            line += count_lines(buf, start, pos)
+            if theirs == -1:
+                # Let the scanner report the first problem from here to the end
+                region = str(view[start:], 'utf-8', 'surrogateescape')
+                deque(scan_conflicts(iter_lines(region), path, line), maxlen=0)
+            nl = buf.find(b'\n', theirs)
+            end = len(buf) if nl == -1 else nl + 1
+            region = str(view[start:end], 'utf-8', 'surrogateescape')
+            # Nested, misplaced or duplicate markers inside the hunk are caught here
+            hunk, = scan_conflicts(iter_lines(region), path, line)
+            if hunks is not None:
+                hunks.append(hunk)
+            data = ''.join(resolve_hunk(hunk, strategy, keep, auto, cache)).encode('utf-8', 'surrogateescape')
+            if profile is not None:
+                profile.lap('hunk', f'{path}:{hunk.start}-{hunk.end}', scanned=end - pos, copied=len(data),
+                            matches=1, detail=hunk.resolution or 'unresolved')
+            replacements.append((start, end, data))
+            line = hunk.end + 1
+            pos = end
+            found = [p if p >= end or p == -1 else _find_marker(buf, marker, end)
+                     for p, marker in zip(found, markers)]
+        if not replacements:
+            view.release()
+            return None
+        if profile is not None:
+            profile.lap('scan', f'{path} after the last hunk', scanned=len(buf) - pos)
+    except BaseException:
+        # Let map_file() close the mapping under the view
+        view.release()
+        raise
+    return PieceTable.from_replacements(view, replacements)
+
+
+def check_resolved(resolved, path, hunks, cache=None, chunks=None):
+    """Raise ConflictError if a fully resolved JS/JSX file no longer parses.
+
+    The hunks' resolutions are then dropped from `cache` so the broken
+    result is not replayed next time. chunks is a chunk_cache.ChunkCache
+    for skipping the parts of the file that were validated before.
+    """
+    if not jsx_lexer.is_source(path) or any(h.resolution is None for h in hunks):
+        # Leftover markers are expected not to parse
+        return
+    if isinstance(resolved.original, str):
+        text = str(resolved)
+    else:
+        text = bytes(resolved).decode('utf-8', 'surrogateescape')
+    try:
+        jsx_lexer.validate(text, chunks)
+    except jsx_lexer.LexError as e:
+        if cache is not None:
+            for hunk in hunks:
+                cache.forget(hunk, hunk.rule)
+        raise ConflictError(path, e.line, f'resolved file does not parse: {e.message}') from None
+
+
+def resolve_file(file_path, validate=True, chunks=None, **options):
+    """Resolve a file in place. Nothing is written if a marker is malformed
+    or, with validate, if the resolved JS/JSX is structurally broken.
+
+    Keyword options are passed through to resolve_conflicts().
+    """
+    hunks = []
+    profile = options.get('profile')
+    with map_file(file_path) as buf:
+        resolved = resolve_buffer(buf, file_path, hunks, **options)
+        if not hunks:
+            return hunks
+        try:
+            if validate:
+                check_resolved(resolved, file_path, hunks, options.get('cache'), chunks)
+                if profile is not None and jsx_lexer.is_source(file_path):
+                    profile.lap('validate', file_path, scanned=len(resolved))
+            write_atomic(file_path, resolved.chunks(), prefix='.resolve-')
+            if profile is not None:
+                profile.lap('write', file_path, copied=len(resolved))
+        finally:
+            resolved.release()
+    return hunks
+
+
+def unmerged_paths(cwd=None):
+    """List every unmerged path in the working tree, relative to its top level."""
+    import subprocess
+
+    top = subprocess.run(
+        ['git', 'rev-parse', '--show-toplevel'],
+        cwd=cwd, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+    out = subprocess.run(
+        ['git', 'diff', '--name-only', '--diff-filter=U', '-z'],
+        cwd=top, check=True, capture_output=True, text=True,
+    ).stdout
+    return top, [p for p in out.split('\0') if p]
+
+
+def index_stages(file_path):
+    """(base, ours, theirs) blob names for an unmerged path, None for a
+    missing stage, or None if the path is not unmerged."""
+    import subprocess
+
+    out = subprocess.run(
+        ['git', 'ls-files', '-u', '-z', '--', os.path.basename(file_path)],
+        cwd=os.path.dirname(os.path.abspath(file_path)), check=True, capture_output=True, text=True,
+    ).stdout
+    stages = [None, None, None]
+    for entry in filter(None, out.split('\0')):
+        info = entry.split('\t', 1)[0].split()
+        stages[int(info[2]) - 1] = info[1]
+    return stages if any(stages) else None
+
+
+def _merge_label(git_dir):
+    """Branch being merged, from MERGE_MSG ('Merge branch 'develop''), or 'theirs'."""
+    import re
+
+    try:
+        with open(os.path.join(git_dir, 'MERGE_MSG'), encoding='utf-8', errors='replace') as f:
+            first = f.readline()
+    except FileNotFoundError:
+        return 'theirs'
+    match = re.match(r"Merge (?:remote-tracking )?(?:branch|tag|commit) '([^']+)'", first)
+    return match.group(1) if match else 'theirs'
+
+
+def remerge_file(file_path, algorithm='histogram'):
+    """Merge an unmerged path again from its index stages with merge3.py.
+
+    The file is rewritten with the new (usually fewer) conflict markers, ready
+    for resolve_file(). Returns (conflicts, conflicts git left), or None if
+    the path is not unmerged.
+    """
+    from git_objects import Repository
+    from merge3 import merge
+
+    stages = index_stages(file_path)
+    if stages is None:
+        return None
+    if stages[1] is None or stages[2] is None:
+        raise ConflictError(file_path, 0, 'deleted on one side; nothing to re-merge')
+    worktree_dir = git_dir(os.path.dirname(os.path.abspath(file_path)), common=False)
+    repo = Repository(worktree_dir)
+    base, ours, theirs = (repo.read(sha)[1] if sha else b'' for sha in stages)
+    with open(file_path, 'rb') as f:
+        before = sum(1 for line in f if line.startswith(MARKER_OURS.encode()))
+    data, conflicts = merge(base, ours, theirs, ('HEAD', 'base', _merge_label(worktree_dir)), algorithm)
+    write_atomic(file_path, [data], prefix='.resolve-')
+    return conflicts, before
+
+
+def _resolve_job(file_path, options):
+    """Worker entry point: resolve one file and return a picklable summary."""
+    try:
+        hunks = resolve_file(file_path, **options)
+    except (ConflictError, OSError, UnicodeDecodeError) as e:
+        return file_path, None, str(e)
+    return file_path, [(h.start, h.end, h.resolution) for h in hunks], None
+
+
+def resolve_many(paths, jobs=None, **options):
+    """Resolve files concurrently in a process pool, yielding results in order."""
+    job = partial(_resolve_job, options=options)
+    if len(paths) <= 1 or jobs == 1:
+        yield from map(job, paths)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(job, paths)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('files', nargs='*', help=f'files to resolve (default: {DEFAULT_FILE})')
+    parser.add_argument('--all', action='store_true',
+                        help="resolve every unmerged path reported by git")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='worker processes for --all or several files (default: all cores)')
+    parser.add_argument('-s', '--strategy', choices=sorted(STRATEGIES), default='theirs',
+                        help='side to keep when a hunk cannot be auto-merged (default: theirs)')
+    parser.add_argument('--keep', metavar='LABEL',
+                        help='keep the side whose marker carries LABEL, e.g. --keep develop')
+    parser.add_argument('--no-auto', dest='auto', action='store_false',
+                        help='apply the strategy even where the diff3 base allows a clean merge')
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help='neither replay nor record remembered resolutions (nor validated chunks)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES,
+                        help=f'resolutions to remember (default: {DEFAULT_MAX_ENTRIES})')
+    parser.add_argument('--no-validate', dest='validate', action='store_false',
+                        help='write resolved JS/JSX even if its brackets or tags no longer balance')
+    parser.add_argument('--remerge', action='store_true',
+                        help='merge each unmerged path again from the index stages first (see merge3.py)')
+    parser.add_argument('--diff', choices=('histogram', 'patience'), default='histogram',
+                        help='diff algorithm for --remerge (default: histogram)')
+    parser.add_argument('--profile', metavar='REPORT',
+                        help='record per-hunk timings and memory to a JSON report (runs in one process)')
+    args = parser.parse_args(argv)
+
+    cache = chunks = None
+    if args.cache:
+        cache_dir = default_cache_dir()
+        if cache_dir:
+            from chunk_cache import CACHE_NAME, ChunkCache
+
+            cache = ResolutionCache(cache_dir, args.cache_size)
+            chunks = ChunkCache(os.path.join(os.path.dirname(cache_dir), CACHE_NAME))
+    options = {'strategy': args.strategy, 'keep': args.keep, 'auto': args.auto, 'cache': cache,
+               'validate': args.validate, 'chunks': chunks}
+    profile = None
+    if args.profile:
+        from profiling import Profile
+
+        # The records live in this process, so the files are not farmed out
+        profile = options['profile'] = Profile('resolve_conflicts.py')
+        args.jobs = 1
+
+    if args.all:
+        top, paths = unmerged_paths()
+        paths = [os.path.join(top, p) for p in paths]
+        if not paths:
+            print("✓ No unmerged paths")
+            return 0
+    else:
+        paths = args.files or [DEFAULT_FILE]
+
+    if args.remerge:
+        for file_path in paths:
+            try:
+                result = remerge_file(file_path, args.diff)
+            except (ConflictError, OSError) as e:
+                print(f"WARNING: {e}; resolving git's conflicts instead")
+                continue
+            if result is not None:
+                print(f"{file_path}: re-merged from the index, {result[0]} conflicts (git left {result[1]})")
+
+    resolved = failed = total_hunks = remaining = 0
+    for file_path, hunks, error in resolve_many(paths, args.jobs, **options):
+        if error:
+            failed += 1
+            print(f"ERROR: {error}")
+            print(f"  {file_path} left unchanged")
+            continue
+        resolved += 1
+        print(f"{file_path}: {len(hunks)} conflicts")
+        for start, end, resolution in hunks:
+            if resolution is None:
+                remaining += 1
+                print(f"  lines {start}-{end}: left unresolved")
+            else:
+                total_hunks += 1
+                print(f"  lines {start}-{end}: {resolution}")
+
+    if cache is not None:
+        cache.prune()
+    if profile is not None:
+        print()
+        profile.save(args.profile)
+
+    print()
+    print(f"Files: {resolved} processed, {failed} failed; "
+          f"hunks resolved: {total_hunks}, left: {remaining}")
+    if failed or remaining:
+        print("WARNING: Some conflicts were not resolved")
+    else:
+        print("✓ All merge conflicts resolved")
+
+    print("Done!")
+    return 1 if failed or remaining else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
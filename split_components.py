@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""Move the top-level components of KanbanBoard.jsx into their own modules.
+
+The file's top-level statements are found with jsx_lexer: a statement starts
+on a line at bracket depth 0 with import, export, const, let, var, function
+or class, and owns the comment lines directly above it, except a heading
+that names the declaration after it (`// Admin Feedback Panel Component`
+above a constant the panel uses), which goes with that declaration. Its
+components are
+the capitalised top-level definitions in symbol_index. For every component
+moved out, the names its code uses are resolved against the file's imports
+and top-level declarations:
+
+  - imports are copied with only the specifiers it uses, relative paths
+    rewritten for the new directory;
+  - constants and helpers that only it uses move into its module;
+  - ones also used elsewhere move to kanban/shared.jsx and are imported
+    from there;
+  - components it renders are moved too, since importing them back from
+    the monolith would be circular.
+
+Modules follow the layout already under src/components/kanban/ (*Modal in
+modals/, *View and *Dashboard in views/, the rest in ui/) and default-export
+the component. If a module there already defines the component with
+identical source, it is imported from that module instead of being written
+again; a different file in the way keeps the component (and whatever renders
+it) in the monolith. The monolith gets imports for what it still uses and
+loses the import specifiers it no longer needs. Every output is checked with
+jsx_lexer.validate() before anything is written.
+
+    python split_components.py --list
+    python split_components.py --dry-run TaskCard Column
+    python split_components.py              # everything but KanbanBoard
+"""
+
+import os
+import re
+import sys
+from bisect import bisect_left
+
+import jsx_lexer
+from mapped_file import write_atomic
+from symbol_index import SymbolIndex
+
+DEFAULT_FILE = 'src/components/KanbanBoard.jsx'
+DEFAULT_DEST = 'src/components/kanban'
+SHARED_MODULE = 'shared.jsx'
+# Name suffix -> subdirectory, as the existing modules are laid out
+CATEGORIES = (('Modal', 'modals'), ('View', 'views'), ('Dashboard', 'views'))
+DEFAULT_CATEGORY = 'ui'
+
+STATEMENT = re.compile(r'^(?:export\b|import\b|const\b|let\b|var\b|(?:async\s+)?function\b|class\b)', re.M)
+DECLARATION = re.compile(r'''
+    (?P<export>export\s+(?:default\s+)?)?
+    (?:
+        (?P<binding>const|let|var)\s+(?P<name>[A-Za-z_$][\w$]*)\s*=
+      | (?:async\s+)?(?P<function>function)\s*\*?\s*(?P<fname>[A-Za-z_$][\w$]*)
+      | (?P<class>class)\s+(?P<cname>[A-Za-z_$][\w$]*)
+    )
+''', re.X)
+IMPORT = re.compile(r'''
+    import\s+
+    (?:(?P<default>[A-Za-z_$][\w$]*)\s*,?\s*)?
+    (?:\*\s*as\s+(?P<namespace>[A-Za-z_$][\w$]*)\s*)?
+    (?:\{(?P<named>[^}]*)\}\s*)?
+    (?:from\s*)?(?P<quote>['"])(?P<source>[^'"]+)(?P=quote)
+''', re.X)
+# A name that is not a property access (obj.name / obj?.name)
+IDENTIFIER = re.compile(r'(?<![\w$.])[A-Za-z_$][\w$]*')
+COMMENT_LINE = re.compile(r'[ \t]*(?://|/\*|\*)')
+# Longer import lines are wrapped inside the braces, as in the monolith
+IMPORT_WIDTH = 90
+
+
+class SplitError(ValueError):
+    """Raised when the file cannot be split as asked."""
+
+
+class Statement:
+    """One top-level statement: its span (leading comments included) and the names it uses.
+
+    kind is 'import', 'declaration' or 'other'. Imports carry `source` and
+    `specifiers` as (imported, local) pairs, with 'default' and '*' for
+    default and namespace imports; declarations carry `name` and `binding`
+    (const, let, var, function or class). header is the (start, end) of a
+    heading comment naming the declaration that sits above the statement
+    before it, or None.
+    """
+
+    __slots__ = ('start', 'code', 'end', 'kind', 'name', 'binding', 'exported',
+                 'source', 'specifiers', 'uses', 'header')
+
+    def __init__(self, start, code, end):
+        self.start = start
+        self.code = code
+        self.end = end
+        self.kind = 'other'
+        self.name = None
+        self.binding = None
+        self.exported = False
+        self.source = None
+        self.specifiers = []
+        self.uses = set()
+        self.header = None
+
+    def __repr__(self):
+        return f'<Statement {self.kind} {self.name or self.source or self.start}>'
+
+
+def _lead_start(text, pos):
+    """Start of the comment lines directly above pos (pos itself if none)."""
+    while pos > 0:
+        prev = text.rfind('\n', 0, pos - 1) + 1
+        if not COMMENT_LINE.match(text, prev, pos):
+            break
+        pos = prev
+    return pos
+
+
+def _heading_for(comment, name):
+    """Whether a comment block is a heading naming name, e.g. `// Task Card Component`."""
+    words = re.sub(r'[^a-z0-9]', '', comment.lower())
+    return words.removesuffix('component') == name.lower()
+
+
+def _parse_specifiers(match):
+    specifiers = []
+    if match.group('default'):
+        specifiers.append(('default', match.group('default')))
+    if match.group('namespace'):
+        specifiers.append(('*', match.group('namespace')))
+    for part in (match.group('named') or '').split(','):
+        words = part.split()
+        if len(words) == 1:
+            specifiers.append((words[0], words[0]))
+        elif len(words) == 3 and words[1] == 'as':
+            specifiers.append((words[0], words[2]))
+    return specifiers
+
+
+def top_level(text):
+    """The top-level Statements of a JS/JSX text, in order. Raises LexError."""
+    lexer = jsx_lexer.Lexer(text)
+    starts = []
+    uses = []
+    for kind, pos, value in lexer.events():
+        if kind == 'code':
+            if not lexer.stack:
+                starts.extend(m.start() for m in STATEMENT.finditer(text, pos, value))
+            uses.extend((m.start(), m.group()) for m in IDENTIFIER.finditer(text, pos, value))
+        elif kind == 'tag' and value:
+            uses.append((pos, value.split('.', 1)[0]))
+    lexer.finish()
+
+    bounds = [0] + [_lead_start(text, start) for start in starts[1:]] + [len(text)]
+    positions = [pos for pos, _ in uses]
+    statements = []
+    for index, code in enumerate(starts):
+        stmt = Statement(bounds[index] if index else code, code, bounds[index + 1])
+        first = bisect_left(positions, code)
+        last = bisect_left(positions, stmt.end)
+        stmt.uses = {name for _, name in uses[first:last]}
+        m = IMPORT.match(text, code)
+        if m:
+            stmt.kind = 'import'
+            stmt.source = m.group('source')
+            stmt.specifiers = _parse_specifiers(m)
+        elif m := DECLARATION.match(text, code):
+            stmt.kind = 'declaration'
+            stmt.name = m.group('name') or m.group('fname') or m.group('cname')
+            stmt.binding = m.group('binding') or m.group('function') or m.group('class')
+            stmt.exported = bool(m.group('export'))
+            stmt.uses.discard(stmt.name)
+        statements.append(stmt)
+    # A heading for the next declaration is not the comment of this one
+    for stmt, after in zip(statements[1:], statements[2:]):
+        if (stmt.start < stmt.code and after.kind == 'declaration' and stmt.name != after.name
+                and _heading_for(text[stmt.start:stmt.code], after.name)):
+            after.header = (stmt.start, stmt.code)
+            stmt.start = stmt.code
+    return statements
+
+
+def category(name):
+    for suffix, directory in CATEGORIES:
+        if name.endswith(suffix):
+            return directory
+    return DEFAULT_CATEGORY
+
+
+def _module_path(path, from_dir):
+    """Import specifier for path from a module in from_dir, without the extension."""
+    rel = os.path.relpath(os.path.splitext(path)[0], from_dir).replace(os.sep, '/')
+    return rel if rel.startswith('.') else './' + rel
+
+
+def _rebase(source, old_dir, new_dir):
+    """Rewrite a relative import source written in old_dir for a module in new_dir."""
+    if not source.startswith('.'):
+        return source
+    return _module_path(os.path.normpath(os.path.join(old_dir, source)), new_dir)
+
+
+def render_import(source, specifiers):
+    """An import statement in the monolith's style."""
+    default = [local for imported, local in specifiers if imported == 'default']
+    namespace = [local for imported, local in specifiers if imported == '*']
+    named = [local if imported == local else f'{imported} as {local}'
+             for imported, local in specifiers if imported not in ('default', '*')]
+    parts = default + [f'* as {local}' for local in namespace]
+    if named:
+        parts.append('{ ' + ', '.join(named) + ' }')
+    line = f"import {', '.join(parts)} from '{source}'\n"
+    if len(line) <= IMPORT_WIDTH or not named:
+        return line
+    rows = ['']
+    for name in named:
+        if rows[-1] and len(rows[-1]) + len(name) > IMPORT_WIDTH - 6:
+            rows[-1] += ','
+            rows.append('')
+        rows[-1] += f', {name}' if rows[-1] else name
+    head = ''.join(part + ', ' for part in parts[:-1])
+    return f"import {head}{{\n" + ''.join(f'  {row}\n' for row in rows) + f"}} from '{source}'\n"
+
+
+def _declaration_text(text, stmt):
+    """A statement's text with any export keyword dropped, ending in one newline."""
+    body = text[stmt.code:stmt.end].rstrip() + '\n'
+    body = re.sub(r'^export\s+(?:default\s+)?', '', body, count=1)
+    header = text[stmt.header[0]:stmt.header[1]] if stmt.header else ''
+    return header + text[stmt.start:stmt.code] + body
+
+
+def _find_module(dest, name):
+    """A module named after name anywhere under dest, or None."""
+    for root, _, files in os.walk(dest):
+        for ext in jsx_lexer.SOURCE_EXTENSIONS:
+            if name + ext in files:
+                return os.path.join(root, name + ext)
+    return None
+
+
+def find_existing(dest, name, source):
+    """(path, 'default' or name) of a module under dest exporting an identical
+    definition of name, or None.
+    """
+    pattern = re.compile(rf'^(?:export\s+(?:default\s+)?)?(?:const|let|var|function|class)\s+{re.escape(name)}\b', re.M)
+    wanted = re.sub(r'^export\s+(?:default\s+)?', '', source.strip())
+    for root, _, files in os.walk(dest):
+        for file_name in sorted(files):
+            if not jsx_lexer.is_source(file_name):
+                continue
+            path = os.path.join(root, file_name)
+            with open(path, encoding='utf-8', errors='surrogateescape') as f:
+                text = f.read()
+            if not pattern.search(text):
+                continue
+            try:
+                statements = top_level(text)
+            except jsx_lexer.LexError:
+                continue
+            for stmt in statements:
+                if stmt.name != name:
+                    continue
+                body = re.sub(r'^export\s+(?:default\s+)?', '', text[stmt.code:stmt.end].strip())
+                if body != wanted:
+                    continue
+                if re.search(rf'^export\s+default\s+(?:function\s+)?{re.escape(name)}\b', text, re.M):
+                    return path, 'default'
+                exports = re.findall(r'^export\s*\{([^}]*)\}', text, re.M)
+                if stmt.exported or any(name in re.split(r'[\s,]+', e) for e in exports):
+                    return path, name
+    return None
+
+
+class Plan:
+    """What a split would do: new module texts, the new monolith and notes."""
+
+    def __init__(self):
+        self.modules = {}      # path -> text, for files to write
+        self.moved = {}        # component -> module path (written or reused)
+        self.reused = set()
+        self.helpers = {}      # component (or SHARED_MODULE) -> helper names moved with it
+        self.kept = {}         # component -> reason it stays
+        self.notes = []
+        self.monolith = None
+
+
+def plan_split(text, file_path, names=None, dest=DEFAULT_DEST, components=None):
+    """Work out how to move names (default: every component but the file's
+    own) into modules under dest. components is the set of top-level
+    component names; by default it comes from symbol_index.
+    """
+    statements = top_level(text)
+    decls = {s.name: s for s in statements if s.kind == 'declaration'}
+    imported = {}
+    for stmt in statements:
+        if stmt.kind == 'import':
+            for spec in stmt.specifiers:
+                imported[spec[1]] = (stmt, spec)
+    main = os.path.splitext(os.path.basename(file_path))[0]
+    if components is None:
+        index = SymbolIndex(file_path).load()
+        components = {e['name'] for e in index.entries if e['parent'] is None and e['name'][:1].isupper()}
+    components = {name for name in components if name in decls}
+    helpers = set(decls) - components
+
+    def needs(name):
+        """Helpers and components reachable from a declaration through helpers."""
+        found_helpers, found_components = set(), set()
+        pending = [name]
+        while pending:
+            for used in decls[pending.pop()].uses:
+                if used in helpers and used not in found_helpers:
+                    found_helpers.add(used)
+                    pending.append(used)
+                elif used in components and used != name:
+                    found_components.add(used)
+        return found_helpers, found_components
+
+    plan = Plan()
+    selected = set(names) if names else components - {main}
+    for name in sorted(selected):
+        if name not in components:
+            raise SplitError(f'{name} is not a top-level component of {file_path}')
+        if name == main:
+            raise SplitError(f'{name} is the file\'s own component')
+    graph = {name: needs(name) for name in components}
+
+    pending = sorted(selected)
+    while pending:
+        for used in sorted(graph[pending.pop()][1]):
+            if used != main and used not in selected:
+                selected.add(used)
+                pending.append(used)
+                plan.notes.append(f'also moving {used}, which a moved component renders')
+
+    old_dir = os.path.dirname(file_path)
+    for name in sorted(selected):
+        stmt = decls[name]
+        if stmt.exported:
+            plan.kept[name] = f'it is exported from {os.path.basename(file_path)}'
+            continue
+        if main in graph[name][1]:
+            plan.kept[name] = f'it renders {main}'
+            continue
+        existing = find_existing(dest, name, text[stmt.code:stmt.end])
+        if existing:
+            plan.moved[name] = existing
+            plan.reused.add(name)
+            continue
+        clash = _find_module(dest, name)
+        if clash:
+            plan.kept[name] = f'{clash} already exists with different code'
+            continue
+        path = os.path.join(dest, category(name), name + '.jsx')
+        plan.moved[name] = (path, 'default')
+    # A component that renders one that stays would import the monolith
+    changed = True
+    while changed:
+        changed = False
+        for name in sorted(plan.moved):
+            blocked = sorted(graph[name][1] & set(plan.kept))
+            if blocked:
+                del plan.moved[name]
+                plan.reused.discard(name)
+                plan.kept[name] = f'it renders {blocked[0]}, which stays'
+                changed = True
+
+    written = [name for name in plan.moved if name not in plan.reused]
+    staying = [s for s in statements if s.kind == 'other'
+               or (s.kind == 'declaration' and s.name in components and s.name not in plan.moved)]
+    kept_helpers = set()
+    for stmt in staying:
+        pending = [u for u in stmt.uses if u in helpers]
+        while pending:
+            used = pending.pop()
+            if used not in kept_helpers:
+                kept_helpers.add(used)
+                pending.extend(u for u in decls[used].uses if u in helpers)
+
+    owners = {}
+    for name in written:
+        for helper in graph[name][0]:
+            owners.setdefault(helper, set()).add(name)
+    home = {}                   # helper -> component whose module gets it, or SHARED_MODULE
+    removed = set()
+    for helper in helpers:
+        users = owners.get(helper, set())
+        if helper in kept_helpers and not users:
+            continue
+        if not users:
+            if any(helper in graph[name][0] for name in plan.reused):
+                removed.add(helper)
+            continue
+        if len(users) == 1 and helper not in kept_helpers:
+            home[helper] = next(iter(users))
+        elif decls[helper].binding in ('let', 'var'):
+            raise SplitError(f'{helper} is a module-level {decls[helper].binding} used by '
+                             f'{", ".join(sorted(users | ({main} if helper in kept_helpers else set())))}; '
+                             'it cannot be shared through an import')
+        else:
+            home[helper] = SHARED_MODULE
+        removed.add(helper)
+
+    shared_path = os.path.join(dest, SHARED_MODULE)
+    shared = [s for s in statements if home.get(s.name) == SHARED_MODULE]
+    if shared and os.path.exists(shared_path):
+        raise SplitError(f'{shared_path} already exists')
+
+    def imports_for(uses, new_dir, own=(), copy=True):
+        """Import lines for uses in a module in new_dir; with copy, including
+        the monolith's own imports.
+        """
+        lines = []
+        for stmt in statements:
+            if not copy or stmt.kind != 'import':
+                continue
+            specs = [spec for spec in stmt.specifiers if spec[1] in uses]
+            if specs:
+                lines.append(render_import(_rebase(stmt.source, old_dir, new_dir), specs))
+        shared_names = sorted(u for u in uses if home.get(u) == SHARED_MODULE and u not in own)
+        if shared_names:
+            lines.append(render_import(_module_path(shared_path, new_dir), [(n, n) for n in shared_names]))
+        for name in sorted(uses & set(plan.moved)):
+            if name in own:
+                continue
+            path, export = plan.moved[name]
+            lines.append(render_import(_module_path(path, new_dir), [(export, name)]))
+        return lines
+
+    for name in written:
+        path = plan.moved[name][0]
+        body = [s for s in statements if home.get(s.name) == name] + [decls[name]]
+        uses = set().union(*(s.uses for s in body)) - {s.name for s in body}
+        plan.helpers[name] = [s.name for s in body[:-1]]
+        parts = imports_for(uses, os.path.dirname(path))
+        parts = [''.join(parts)] if parts else []
+        parts += [_declaration_text(text, s) for s in body]
+        plan.modules[path] = '\n'.join(parts) + f'\nexport default {name}\n'
+    if shared:
+        plan.helpers[SHARED_MODULE] = [s.name for s in shared]
+        names_here = {s.name for s in shared}
+        uses = set().union(*(s.uses for s in shared))
+        parts = imports_for(uses, dest, names_here)
+        parts = [''.join(parts)] if parts else []
+        parts += [_declaration_text(text, s) for s in shared]
+        plan.modules[shared_path] = '\n'.join(parts) + '\nexport { ' + ', '.join(sorted(names_here)) + ' }\n'
+
+    # The monolith: drop what moved, prune its imports, add the new ones
+    gone = set(plan.moved) | removed
+    remaining = [s for s in statements if not (s.kind == 'declaration' and s.name in gone)]
+    uses = set().union(*(s.uses for s in remaining if s.kind != 'import'))
+    out = [text[:statements[0].start]] if statements else [text]
+    last_import = max((i for i, s in enumerate(remaining) if s.kind == 'import'), default=-1)
+    new_imports = imports_for(uses, old_dir, copy=False)
+    # Headings of remaining declarations stay where they were: above the
+    # statement before their declaration, or above the declaration if that moved
+    kept = set(remaining)
+    headers = {}
+    for before, stmt in zip(statements, statements[1:]):
+        if stmt.header and stmt in kept:
+            headers[before if before in kept else stmt] = stmt.header
+    for index, stmt in enumerate(remaining):
+        if stmt in headers:
+            out.append(text[headers[stmt][0]:headers[stmt][1]])
+        if stmt.kind == 'import' and stmt.specifiers:
+            specs = [spec for spec in stmt.specifiers if spec[1] in uses]
+            if len(specs) < len(stmt.specifiers):
+                if specs:
+                    out.append(text[stmt.start:stmt.code] + render_import(stmt.source, specs))
+                if index == last_import:
+                    out.extend(new_imports)
+                continue
+        out.append(text[stmt.start:stmt.end])
+        if index == last_import:
+            out.extend(new_imports)
+    plan.monolith = ''.join(out)
+    return plan
+
+
+def validate(plan, file_path):
+    """Raise SplitError if any output of the plan does not lex."""
+    for path, source in [(file_path, plan.monolith), *plan.modules.items()]:
+        try:
+            jsx_lexer.validate(source)
+        except jsx_lexer.LexError as e:
+            raise SplitError(f'{path} would not parse: {e}') from None
+
+
+def describe(plan, file_path, text, out=sys.stdout):
+    """Print the plan: one line per component plus each new module's imports."""
+    for name in sorted(plan.moved):
+        path, _ = plan.moved[name]
+        if name in plan.reused:
+            out.write(f"  = {name}: identical copy in {path}, imported from there\n")
+            continue
+        helpers = plan.helpers.get(name)
+        extra = f" with {', '.join(helpers)}" if helpers else ''
+        out.write(f"  + {name} -> {path}{extra}\n")
+    if SHARED_MODULE in plan.helpers:
+        out.write(f"  + shared -> {', '.join(plan.helpers[SHARED_MODULE])}\n")
+    for name in sorted(plan.kept):
+        out.write(f"  ✗ {name} stays: {plan.kept[name]}\n")
+    for note in plan.notes:
+        out.write(f"  note: {note}\n")
+    for path, source in plan.modules.items():
+        out.write(f"\n--- {path} ({source.count(chr(10))} lines)\n")
+        if source.startswith('import '):
+            out.write(source.split('\n\n', 1)[0] + '\n')
+    out.write(f"\n{file_path}: {text.count(chr(10))} -> {plan.monolith.count(chr(10))} lines\n")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Move top-level components into their own modules.')
+    parser.add_argument('names', nargs='*', help='components to move (default: all but the main one)')
+    parser.add_argument('--file', default=DEFAULT_FILE, help=f'file to split (default: {DEFAULT_FILE})')
+    parser.add_argument('--dest', default=DEFAULT_DEST, help=f'module directory (default: {DEFAULT_DEST})')
+    parser.add_argument('--list', action='store_true', help='list the top-level components and exit')
+    parser.add_argument('--dry-run', action='store_true', help='show the plan without writing anything')
+    args = parser.parse_args(argv)
+
+    with open(args.file, 'r', newline='', encoding='utf-8', errors='surrogateescape') as f:
+        text = f.read()
+    index = SymbolIndex(args.file).load()
+    components = {e['name']: e for e in index.entries if e['parent'] is None and e['name'][:1].isupper()}
+    if args.list:
+        for entry in sorted(components.values(), key=lambda e: e['line']):
+            print(f"{entry['line']}-{entry['end_line']}: {entry['name']} "
+                  f"({entry['byte_end'] - entry['byte_start']} bytes)")
+        return 0
+
+    try:
+        plan = plan_split(text, args.file, args.names, args.dest, set(components))
+        validate(plan, args.file)
+    except (SplitError, jsx_lexer.LexError) as e:
+        print(f"ERROR: {e}")
+        return 1
+    describe(plan, args.file, text)
+    if args.dry_run:
+        print("Dry run: no files written")
+        return 0
+    if not plan.moved:
+        print("Nothing to move")
+        return 1 if plan.kept else 0
+
+    for path, source in plan.modules.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, [source.encode('utf-8', 'surrogateescape')], prefix='.split-')
+    write_atomic(args.file, [plan.monolith.encode('utf-8', 'surrogateescape')], prefix='.split-')
+    print(f"✓ Moved {len(plan.moved)} components, wrote {len(plan.modules)} modules")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
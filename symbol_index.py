@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""Persistent index of the functions and components defined in a JSX file.
+
+Replaces the hand-made grep dumps in `Addtl Files/` (gettasks_func.txt,
+dragend_lines.txt, ...). Every `const X = (...) =>`, `function X(`,
+`const X = memo(...)` / `useCallback(...)` definition, top-level or nested,
+is recorded with its character and byte extents and line numbers.
+
+The index lives in .git/trackli-symbols/ together with a compressed snapshot
+of the text it was built from. When the file changes, only the changed
+region is re-lexed: the lexer state is checkpointed every few KB, scanning
+restarts from the last checkpoint before the change, and stops as soon as it
+reaches an old checkpoint after the change in the same state. Definitions
+past that point are shifted rather than rescanned.
+
+    python symbol_index.py list [PATTERN]
+    python symbol_index.py show KanbanBoard.getTasksByStatus
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import zlib
+
+from jsx_lexer import Lexer
+from mapped_file import common_prefix, common_suffix, git_dir, write_atomic
+
+DEFAULT_FILE = 'src/components/KanbanBoard.jsx'
+INDEX_DIR = 'trackli-symbols'
+FORMAT_VERSION = 2
+# Spacing of the lexer checkpoints an incremental update can restart or stop at
+CHECKPOINT_EVERY = 4096
+
+# Definitions are only recognised at the start of a line (after indentation)
+DEFINITION = re.compile(r'''
+    ^[ \t]*
+    (?P<def>
+        (?:export\s+(?:default\s+)?)?
+        (?:
+            (?:const|let|var)\s+(?P<name>[A-Za-z_$][\w$]*)\s*=\s*
+            (?:
+                (?P<arrow>(?:async\s+)?(?:\((?:[^()]|\([^()]*\))*\)|[A-Za-z_$][\w$]*)\s*=>)
+              | (?P<call>(?:React\.)?(?:memo|forwardRef|useCallback)\s*\()
+              | (?P<fexpr>(?:async\s+)?function\b\s*\*?\s*[\w$]*\s*\()
+            )
+          | (?:async\s+)?function\s*\*?\s*(?P<fname>[A-Za-z_$][\w$]*)\s*\(
+        )
+    )
+''', re.M | re.X)
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+class _Scan:
+    """One pass of the lexer over text[start:], collecting definitions.
+
+    `resume` is the checkpoint to start from: (operand, state) with state as
+    (kind, opened_at, name) triples. `pending` maps body opener offsets of
+    definitions opened before `start` to those definitions, so their ends are
+    updated if they close here. Every CHECKPOINT_EVERY chars, and at each of
+    the sorted line-start `targets`, a checkpoint is recorded, and
+    `resync(offset, checkpoint, scan)` may return True to stop there.
+    """
+
+    def __init__(self, text, start=0, resume=(False, ()), pending=None, resync=None, targets=()):
+        operand, state = resume
+        self.text = text
+        self.start = start
+        self.lexer = Lexer(text, [kind for kind, _, _ in state])
+        self.lexer.opened = [pos for _, pos, _ in state]
+        self.lexer.names = [name for _, _, name in state]
+        self.lexer.operand = operand
+        self.brackets = [pos for kind, pos, _ in state if kind in '([{']
+        self.bodies = dict(pending or {})
+        self.params = {}
+        # Function definitions whose parameters closed, by bracket depth,
+        # waiting for the '{' of their body
+        self.awaiting = {}
+        self.expressions = []
+        self.entries = []
+        self.checkpoints = []
+        self.resync = resync
+        self.targets = list(reversed(targets))
+        self.stopped_at = None
+
+    def run(self):
+        text = self.text
+        candidates = DEFINITION.finditer(text, self.start)
+        cand = next(candidates, None)
+        brackets = self.brackets
+        lexer = self.lexer
+        next_checkpoint = self.start + CHECKPOINT_EVERY
+        for kind, pos, value in lexer.events(self.start):
+            if kind == 'code':
+                if self.awaiting and text[pos:value].strip():
+                    # Only whitespace may separate a function's ')' and '{'
+                    self.awaiting.clear()
+                checkpoint = None
+                targets = self.targets
+                while targets and targets[-1] < pos:
+                    targets.pop()
+                if targets and targets[-1] <= value:
+                    checkpoint = targets.pop()
+                elif value >= next_checkpoint:
+                    nl = text.find('\n', max(pos, next_checkpoint - 1), value)
+                    if nl != -1:
+                        checkpoint = nl + 1
+                while cand is not None and cand.start('def') < pos:
+                    cand = next(candidates, None)
+                if checkpoint is not None:
+                    cand = self._define_until(cand, candidates, checkpoint)
+                    if self.expressions:
+                        self._check_expressions(pos, checkpoint)
+                    # A checkpoint must not leave half-seen definitions behind
+                    if not (self.params or self.awaiting or self.expressions):
+                        saved = [lexer.operand, [[k, p, n] for k, p, n in zip(
+                            lexer.stack, lexer.opened, lexer.names)]]
+                        if self.resync is not None and self.resync(checkpoint, saved, self):
+                            self.stopped_at = checkpoint
+                            return self
+                        self.checkpoints.append([checkpoint, *saved])
+                        next_checkpoint = checkpoint + CHECKPOINT_EVERY
+                cand = self._define_until(cand, candidates, value)
+                if self.expressions:
+                    self._check_expressions(pos, value)
+            elif kind == 'open':
+                for entry in self.awaiting.pop(len(brackets), ()):
+                    entry['body'] = pos
+                    self.bodies[pos] = entry
+                brackets.append(pos)
+            elif kind == 'close':
+                opener = brackets.pop()
+                entry = self.bodies.pop(opener, None)
+                if entry is not None:
+                    entry['end'] = pos + 1
+                entry = self.params.pop(opener, None)
+                if entry is not None:
+                    self.awaiting.setdefault(len(brackets), []).append(entry)
+                self._close_expressions(pos, len(brackets))
+        lexer.finish()
+        self._finish_expressions(len(text))
+        return self
+
+    def _define_until(self, cand, candidates, end):
+        while cand is not None and cand.start('def') < end:
+            self.entries.append(self._define(cand))
+            cand = next(candidates, None)
+        return cand
+
+    def _define(self, m):
+        name = m.group('name') or m.group('fname')
+        start = m.start('def')
+        entry = {
+            'name': name, 'kind': None, 'start': start, 'end': None, 'body': None,
+        }
+        if m.group('arrow'):
+            entry['kind'] = 'arrow'
+            body = m.end()
+            while body < len(self.text) and self.text[body] in ' \t\r\n':
+                body += 1
+            if self.text[body:body + 1] in ('{', '('):
+                entry['body'] = body
+                self.bodies[body] = entry
+            else:
+                entry['expr_depth'] = len(self.brackets)
+                entry['expr_from'] = m.end()
+                self.expressions.append(entry)
+        elif m.group('call'):
+            entry['kind'] = 'wrapped'
+            entry['body'] = m.end() - 1
+            self.bodies[m.end() - 1] = entry
+        else:
+            entry['kind'] = 'function'
+            self.params[m.end() - 1] = entry
+        return entry
+
+    def _check_expressions(self, start, end):
+        """Expression-bodied arrows end at the first newline back at their depth."""
+        depth = len(self.brackets)
+        remaining = []
+        for entry in self.expressions:
+            if entry['expr_depth'] == depth:
+                nl = self.text.find('\n', max(start, entry['expr_from']), end)
+                if nl != -1 and self.text[entry['expr_from']:nl].strip():
+                    entry['end'] = nl
+                    continue
+            remaining.append(entry)
+        self.expressions = remaining
+
+    def _close_expressions(self, pos, depth):
+        remaining = []
+        for entry in self.expressions:
+            if depth < entry['expr_depth']:
+                entry['end'] = pos
+            else:
+                remaining.append(entry)
+        self.expressions = remaining
+
+    def _finish_expressions(self, end):
+        for entry in self.expressions:
+            entry['end'] = end
+        self.expressions = []
+
+
+def _finalize(text, entries):
+    """Fill in lines, byte offsets and parents for entries sorted by start."""
+    offsets = sorted({e['start'] for e in entries} | {e['end'] for e in entries if e['end'] is not None})
+    positions = {}
+    line, byte, prev = 1, 0, 0
+    for offset in offsets:
+        line += text.count('\n', prev, offset)
+        byte += len(text[prev:offset].encode('utf-8', 'surrogateescape'))
+        positions[offset] = (line, byte)
+        prev = offset
+
+    stack = []
+    for index, entry in enumerate(entries):
+        entry.pop('expr_depth', None)
+        entry.pop('expr_from', None)
+        if entry['end'] is None:
+            entry['end'] = len(text)
+            positions.setdefault(len(text), (line + text.count('\n', prev), byte + len(
+                text[prev:].encode('utf-8', 'surrogateescape'))))
+        entry['line'], entry['byte_start'] = positions[entry['start']]
+        entry['end_line'], entry['byte_end'] = positions[entry['end']]
+        while stack and entries[stack[-1]]['end'] <= entry['start']:
+            stack.pop()
+        entry['parent'] = stack[-1] if stack else None
+        stack.append(index)
+    return entries
+
+
+def build(text):
+    """Index every definition in text from scratch; returns (entries, checkpoints)."""
+    scan = _Scan(text).run()
+    scan.entries.sort(key=lambda e: e['start'])
+    return _finalize(text, scan.entries), scan.checkpoints
+
+
+def update(old_text, old_entries, old_checkpoints, text):
+    """Re-index text, re-lexing only around the region that differs from old_text.
+
+    Returns (entries, checkpoints, rescanned_chars).
+    """
+    prefix = common_prefix(old_text, text)
+    suffix = common_suffix(old_text, text, min(len(old_text), len(text)) - prefix)
+    delta = len(text) - len(old_text)
+    old_change_end = len(old_text) - suffix
+    change_end = len(text) - suffix
+
+    # Restart from the last checkpoint at or before the change; the lexer
+    # state recorded there is still valid
+    restart, resume, keep = 0, (False, ()), 0
+    for index, (offset, operand, state) in enumerate(old_checkpoints):
+        if offset > prefix:
+            break
+        restart, resume, keep = offset, (operand, [tuple(s) for s in state]), index + 1
+
+    def shift(pos):
+        return pos + delta if pos is not None and pos >= old_change_end else pos
+
+    before = []
+    pending = {}
+    for entry in old_entries:
+        if entry['start'] >= restart:
+            break
+        entry = dict(entry)
+        if entry['end'] > restart:
+            # Still open at the restart point: the scan may see it close
+            if entry['body'] is not None and entry['body'] < restart:
+                pending[entry['body']] = entry
+            entry['end'] = shift(entry['end'])
+        before.append(entry)
+
+    by_offset = {c[0]: i for i, c in enumerate(old_checkpoints) if c[0] >= old_change_end}
+    old_ends = {e['body']: e['end'] for e in old_entries if e['body'] is not None}
+
+    def resync(offset, checkpoint, scan):
+        # The text ahead is unchanged, so a checkpoint whose context stack
+        # matches the old one structurally will see exactly the old events.
+        # Definitions still open must be on the stack, with an old
+        # counterpart to take their end from.
+        old = by_offset.get(offset - delta)
+        if offset < change_end or old is None:
+            return False
+        _, old_operand, old_state = old_checkpoints[old]
+        operand, state = checkpoint
+        if operand != old_operand or len(state) != len(old_state):
+            return False
+        if any(k != ok or n != on for (k, _, n), (ok, _, on) in zip(state, old_state)):
+            return False
+        moved = {p: op for (_, p, _), (_, op, _) in zip(state, old_state)}
+        return all(b in moved and moved[b] in old_ends for b in scan.bodies)
+
+    targets = [c[0] + delta for c in old_checkpoints if c[0] >= old_change_end]
+    scan = _Scan(text, restart, resume, pending, resync, targets).run()
+
+    after = []
+    checkpoints = old_checkpoints[:keep] + scan.checkpoints
+    if scan.stopped_at is not None:
+        old_stop = scan.stopped_at - delta
+        first = by_offset[old_stop]
+        stack = scan.lexer.opened
+        # Old positions of everything open at the stop, mapped to new ones;
+        # anything opened later is past the change and just shifts
+        moved = {op: p for p, (_, op, _) in zip(stack, old_checkpoints[first][2])}
+        back = {p: op for op, p in moved.items()}
+        for body, entry in scan.bodies.items():
+            entry['end'] = old_ends[back[body]] + delta
+        for entry in old_entries:
+            if entry['start'] >= old_stop:
+                entry = dict(entry)
+                entry['start'] += delta
+                entry['end'] += delta
+                entry['body'] = shift(entry['body'])
+                after.append(entry)
+        for offset, operand, state in old_checkpoints[first:]:
+            state = [[k, moved.get(p, p + delta), n] for k, p, n in state]
+            checkpoints.append([offset + delta, operand, state])
+    rescanned = (scan.stopped_at or len(text)) - restart
+
+    entries = before + sorted(scan.entries, key=lambda e: e['start']) + after
+    return _finalize(text, entries), checkpoints, rescanned
+
+
+class SymbolIndex:
+    """The on-disk index for one file, refreshed on load when the file changed."""
+
+    def __init__(self, file_path, index_dir=None):
+        self.file_path = os.path.abspath(file_path)
+        if index_dir is None:
+            root = git_dir(os.path.dirname(self.file_path))
+            index_dir = os.path.join(root, INDEX_DIR) if root else None
+        key = hashlib.sha1(os.path.realpath(self.file_path).encode()).hexdigest()[:16]
+        base = f'{os.path.basename(file_path)}-{key}'
+        self.index_path = os.path.join(index_dir, base + '.json') if index_dir else None
+        self.snapshot_path = os.path.join(index_dir, base + '.snap') if index_dir else None
+        self.data = None
+        self.status = None
+
+    def load(self, rebuild=False):
+        """Load the index, re-indexing incrementally (or fully) if the file changed."""
+        st = os.stat(self.file_path)
+        data = None if rebuild else self._read_index()
+        if data and (data['size'], data['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+            self.data, self.status = data, 'fresh'
+            return self
+
+        with open(self.file_path, 'r', newline='', encoding='utf-8', errors='surrogateescape') as f:
+            text = f.read()
+        digest = _digest(text)
+        if data and data['sha256'] == digest:
+            self.status = 'fresh'
+            entries, checkpoints = data['entries'], data['checkpoints']
+        elif data and (old_text := self._read_snapshot()) is not None:
+            entries, checkpoints, rescanned = update(old_text, data['entries'], data['checkpoints'], text)
+            self.status = f'updated ({rescanned} of {len(text)} chars re-lexed)'
+        else:
+            entries, checkpoints = build(text)
+            self.status = 'built'
+        self.data = {
+            'version': FORMAT_VERSION, 'path': self.file_path, 'sha256': digest,
+            'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'entries': entries,
+            'checkpoints': checkpoints,
+        }
+        self._save(text)
+        return self
+
+    def _read_index(self):
+        if not self.index_path:
+            return None
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return data if data.get('version') == FORMAT_VERSION else None
+
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                return zlib.decompress(f.read()).decode('utf-8', 'surrogateescape')
+        except (FileNotFoundError, zlib.error):
+            return None
+
+    def _save(self, text):
+        if not self.index_path:
+            return
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        for path, payload in (
+            (self.snapshot_path, zlib.compress(text.encode('utf-8', 'surrogateescape'), 1)),
+            (self.index_path, json.dumps(self.data, separators=(',', ':')).encode()),
+        ):
+            write_atomic(path, [payload], prefix='.symbol-index-')
+
+    @property
+    def entries(self):
+        return self.data['entries']
+
+    def qualified_name(self, entry):
+        parts = [entry['name']]
+        while entry['parent'] is not None:
+            entry = self.entries[entry['parent']]
+            parts.append(entry['name'])
+        return '.'.join(reversed(parts))
+
+    def find(self, name):
+        """Entries whose name or dotted qualified name matches."""
+        if '.' in name:
+            return [e for e in self.entries if self.qualified_name(e) == name]
+        return [e for e in self.entries if e['name'] == name]
+
+    def source(self, entry):
+        """The definition's text, read straight from its byte range."""
+        with open(self.file_path, 'rb') as f:
+            f.seek(entry['byte_start'])
+            data = f.read(entry['byte_end'] - entry['byte_start'])
+        return data.decode('utf-8', 'surrogateescape')
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Index and extract JSX definitions.')
+    parser.add_argument('--file', default=DEFAULT_FILE, help=f'file to index (default: {DEFAULT_FILE})')
+    parser.add_argument('--rebuild', action='store_true', help='ignore the stored index')
+    sub = parser.add_subparsers(dest='command')
+    list_cmd = sub.add_parser('list', help='list definitions, optionally filtered by a regex')
+    list_cmd.add_argument('pattern', nargs='?')
+    show_cmd = sub.add_parser('show', help='print a definition')
+    show_cmd.add_argument('name', help='plain or dotted name, e.g. KanbanBoard.getTasksByStatus')
+    args = parser.parse_args(argv)
+
+    index = SymbolIndex(args.file).load(rebuild=args.rebuild)
+    print(f"Index {index.status}: {len(index.entries)} definitions", file=sys.stderr)
+
+    if args.command == 'show':
+        matches = index.find(args.name)
+        if not matches:
+            print(f"ERROR: no definition named {args.name}")
+            return 1
+        for entry in matches:
+            print(f"// {index.qualified_name(entry)} (lines {entry['line']}-{entry['end_line']})")
+            print(index.source(entry))
+        return 0
+
+    pattern = re.compile(args.pattern) if args.command == 'list' and args.pattern else None
+    for entry in index.entries:
+        qualified = index.qualified_name(entry)
+        if pattern and not pattern.search(qualified):
+            continue
+        print(f"{entry['line']}-{entry['end_line']}: {qualified}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import os
+import stat
+
+import mapped_file
+from apply_patches import FAILED, PRESENT, apply_patches
+
+CREATE_AND_DELETE = '''\
+diff --git a/new.txt b/new.txt
+new file mode 100644
+--- /dev/null
++++ b/new.txt
+@@ -0,0 +1,2 @@
++one
++two
+diff --git a/old.txt b/old.txt
+deleted file mode 100644
+--- a/old.txt
++++ /dev/null
+@@ -1,2 +0,0 @@
+-three
+-four
+'''
+
+
+def _setup(tmp_path):
+    patch = tmp_path / 'change.patch'
+    patch.write_text(CREATE_AND_DELETE)
+    work = tmp_path / 'work'
+    work.mkdir()
+    (work / 'old.txt').write_text('three\nfour\n')
+    return str(patch), work
+
+
+def test_creates_and_deletes_files(tmp_path):
+    patch, work = _setup(tmp_path)
+    report = apply_patches([patch], root=str(work))
+
+    assert [deleted for _, _, _, deleted in report] == [None, True]
+    assert sorted(os.listdir(work)) == ['new.txt']
+    assert (work / 'new.txt').read_text() == 'one\ntwo\n'
+    assert stat.S_IMODE(os.stat(work / 'new.txt').st_mode) == 0o666 & ~mapped_file.UMASK
+
+    # Applying it again changes nothing
+    report = apply_patches([patch], root=str(work))
+    assert all(status is PRESENT for _, _, results, _ in report for _, status, *_ in results)
+    assert (work / 'new.txt').read_text() == 'one\ntwo\n'
+
+
+def test_dry_run_writes_and_deletes_nothing(tmp_path):
+    patch, work = _setup(tmp_path)
+    report = apply_patches([patch], root=str(work), dry_run=True)
+
+    assert report[1][3] is True
+    assert sorted(os.listdir(work)) == ['old.txt']
+
+
+def test_deletion_with_failed_hunk_keeps_file(tmp_path):
+    patch, work = _setup(tmp_path)
+    (work / 'old.txt').write_text('something else\n')
+    report = apply_patches([patch], root=str(work))
+
+    assert report[1][3] is False
+    assert report[1][2][0][1] is FAILED
+    assert (work / 'old.txt').read_text() == 'something else\n'
+    assert '+++ /dev/null' in (work / 'old.txt.rej').read_text()
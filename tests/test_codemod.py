@@ -0,0 +1,34 @@
+from codemod import Edit, run
+
+EDITS = [Edit('const a = 1', 'const a = 3')]
+
+
+def test_run_applies_and_reverts(tmp_path, capsys):
+    path = tmp_path / 't.js'
+    path.write_text('const a = 1;\nconst b = 2;\n')
+
+    assert run(str(path), EDITS, 'Applied', argv=[]) == 0
+    assert path.read_text() == 'const a = 3;\nconst b = 2;\n'
+    assert 'File updated' in capsys.readouterr().out
+
+    assert run(str(path), EDITS, argv=['--revert']) == 0
+    assert path.read_text() == 'const a = 1;\nconst b = 2;\n'
+    assert 'Reverted' in capsys.readouterr().out
+
+
+def test_run_dry_run_writes_nothing(tmp_path, capsys):
+    path = tmp_path / 't.js'
+    path.write_text('const a = 1;\n')
+
+    assert run(str(path), EDITS, argv=['--dry-run']) == 0
+    assert path.read_text() == 'const a = 1;\n'
+    assert 'Dry run: no files written' in capsys.readouterr().out
+
+
+def test_run_reports_missing_anchor(tmp_path, capsys):
+    path = tmp_path / 't.js'
+    path.write_text('const z = 1;\n')
+
+    assert run(str(path), EDITS, argv=[]) == 1
+    assert path.read_text() == 'const z = 1;\n'
+    assert 'ERROR' in capsys.readouterr().out
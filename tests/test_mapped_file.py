@@ -0,0 +1,54 @@
+import os
+import stat
+
+import pytest
+
+import mapped_file
+from mapped_file import find_line, map_file, write_atomic
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_write_atomic_creates_file_with_umask_mode(tmp_path):
+    path = tmp_path / 'new.txt'
+    write_atomic(str(path), [b'one\n', memoryview(b'two\n')])
+
+    assert path.read_bytes() == b'one\ntwo\n'
+    assert _mode(path) == 0o666 & ~mapped_file.UMASK
+    assert os.listdir(tmp_path) == ['new.txt']
+
+
+def test_write_atomic_keeps_existing_mode(tmp_path):
+    path = tmp_path / 'run.sh'
+    path.write_bytes(b'old\n')
+    os.chmod(path, 0o751)
+    write_atomic(str(path), [b'new\n'])
+
+    assert path.read_bytes() == b'new\n'
+    assert _mode(path) == 0o751
+
+
+def test_write_atomic_leaves_target_on_failure(tmp_path):
+    path = tmp_path / 'kept.txt'
+    path.write_bytes(b'kept\n')
+
+    def chunks():
+        yield b'partial'
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        write_atomic(str(path), chunks())
+    assert path.read_bytes() == b'kept\n'
+    assert os.listdir(tmp_path) == ['kept.txt']
+
+
+def test_find_line_on_str_bytes_and_mmap(tmp_path):
+    assert find_line('a<<\n<<b', '<<') == 4
+    assert find_line(b'a<<\n<<b', b'<<') == 4
+    assert find_line('a<<', '<<') == -1
+    path = tmp_path / 'f'
+    path.write_bytes(b'x <<\n<< y\n')
+    with map_file(str(path)) as buf:
+        assert find_line(buf, b'<<') == 5
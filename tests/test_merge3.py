@@ -0,0 +1,35 @@
+import shutil
+import subprocess
+
+import pytest
+
+from merge3 import merge
+
+BASE = b'a\nb\nc\nd\ne\nf\ng\n'
+CASES = {
+    'disjoint edits': (BASE, b'a\nB\nc\nd\ne\nf\ng\n', b'a\nb\nc\nd\ne\nF\ng\n'),
+    'one side only': (BASE, BASE, b'a\nb\nc\nd\ne\nf\ng\nh\n'),
+    'same change': (BASE, b'a\nb\nC\nd\ne\nf\ng\n', b'a\nb\nC\nd\ne\nf\ng\n'),
+    'conflict': (BASE, b'a\nb\nours\nd\ne\nf\ng\n', b'a\nb\ntheirs\nd\ne\nf\ng\n'),
+    'insert and delete': (BASE, b'x\na\nb\nc\nd\ne\nf\ng\n', b'a\nb\nc\ne\nf\ng\n'),
+}
+
+
+def _git_merge_file(tmp_path, base, ours, theirs):
+    paths = []
+    for name, data in (('ours', ours), ('base', base), ('theirs', theirs)):
+        path = tmp_path / name
+        path.write_bytes(data)
+        paths.append(str(path))
+    result = subprocess.run(['git', 'merge-file', '-p', '--diff3', '-L', 'ours', '-L', 'base', '-L', 'theirs',
+                             *paths], capture_output=True, check=False)
+    assert result.returncode >= 0
+    return result.stdout, result.returncode
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+@pytest.mark.parametrize('case', sorted(CASES))
+def test_merge_matches_git_merge_file(tmp_path, case):
+    base, ours, theirs = CASES[case]
+    expected, conflicts = _git_merge_file(tmp_path, base, ours, theirs)
+    assert merge(base, ours, theirs) == (expected, conflicts)
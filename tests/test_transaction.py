@@ -0,0 +1,26 @@
+import os
+import stat
+
+import mapped_file
+from transaction import Transaction
+
+
+def test_commit_creates_and_replaces_files(tmp_path):
+    existing = tmp_path / 'existing.txt'
+    existing.write_bytes(b'old\n')
+    os.chmod(existing, 0o640)
+    created = tmp_path / 'created.txt'
+    journal = tmp_path / 'journal.json'
+
+    txn = Transaction(str(journal))
+    txn.stage(str(existing), [b'new\n'])
+    txn.stage(str(created), [b'a\n', b'b\n'])
+    written = txn.commit()
+
+    assert sorted(written) == sorted([str(existing), str(created)])
+    assert existing.read_bytes() == b'new\n'
+    assert created.read_bytes() == b'a\nb\n'
+    assert stat.S_IMODE(os.stat(existing).st_mode) == 0o640
+    assert stat.S_IMODE(os.stat(created).st_mode) == 0o666 & ~mapped_file.UMASK
+    # No journal, temp or backup files are left behind
+    assert sorted(os.listdir(tmp_path)) == ['created.txt', 'existing.txt']
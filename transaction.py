@@ -0,0 +1,209 @@
+"""Replace several files together: all of them, or after any failure none.
+
+    txn = Transaction(journal_path)
+    txn.stage('src/components/KanbanBoard.jsx', doc.chunks())
+    txn.stage('src/components/kanban/constants.js', [data])
+    txn.commit()
+
+commit() runs in four steps:
+
+1. Every staged output is written to a temporary file next to its target by
+   a thread pool, and each one is fsynced there, in parallel.
+2. Each existing target is hard-linked to a backup name in its directory
+   (copied where links are not supported).
+3. A journal naming every target, temporary file and backup is written and
+   fsynced. This is the write-ahead record.
+4. The temporary files are renamed over the targets. Each directory is then
+   fsynced once, and the journal is marked committed before the backups and
+   the journal are removed.
+
+An exception at any step, KeyboardInterrupt included, puts back the targets
+already replaced and removes every temporary file before it propagates. If
+the process dies instead, recover() finishes the job from the journal on the
+next run: a committed journal only needs its backups removed, and anything
+else is rolled back.
+"""
+
+import json
+import os
+
+JOURNAL_NAME = 'trackli-journal.json'
+TEMP_PREFIX = '.txn-'
+BACKUP_PREFIX = '.txn-backup-'
+
+PREPARED = 'prepared'
+COMMITTED = 'committed'
+
+
+class Transaction:
+    """Outputs staged for a set of files, written by commit()."""
+
+    __slots__ = ('journal_path', 'workers', 'staged')
+
+    def __init__(self, journal_path, workers=None):
+        self.journal_path = journal_path
+        self.workers = workers
+        self.staged = {}
+
+    def __len__(self):
+        return len(self.staged)
+
+    def stage(self, path, chunks):
+        """Queue bytes-like chunks as the new content of path (last one wins)."""
+        self.staged[os.path.abspath(path)] = chunks
+
+    def commit(self):
+        """Write every staged file, or none of them; returns the paths written."""
+        if not self.staged:
+            return []
+        entries = [{'path': path, 'tmp': None, 'backup': None} for path in self.staged]
+        replaced = []
+        try:
+            self._write_temps(entries)
+            for entry in entries:
+                if os.path.exists(entry['path']):
+                    entry['backup'] = _backup(entry['path'])
+            _write_journal(self.journal_path, PREPARED, entries)
+            for entry in entries:
+                os.replace(entry['tmp'], entry['path'])
+                replaced.append(entry)
+            for directory in {os.path.dirname(entry['path']) for entry in entries}:
+                _fsync_dir(directory)
+            _write_journal(self.journal_path, COMMITTED, entries)
+        except BaseException:
+            _roll_back(entries, replaced)
+            _remove(self.journal_path)
+            raise
+        _clean(entries)
+        _remove(self.journal_path)
+        self.staged = {}
+        return [entry['path'] for entry in entries]
+
+    def _write_temps(self, entries):
+        jobs = [(entry, self.staged[entry['path']]) for entry in entries]
+        if len(jobs) == 1:
+            _write_temp(*jobs[0])
+            return
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(len(jobs), self.workers or os.cpu_count() or 1)) as pool:
+            # list() re-raises the first failure once every write has finished
+            list(pool.map(lambda job: _write_temp(*job), jobs))
+
+
+def _write_temp(entry, chunks):
+    import tempfile
+
+    from mapped_file import copy_mode
+
+    path = entry['path']
+    fd, entry['tmp'] = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as dst:
+        for chunk in chunks:
+            dst.write(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+    copy_mode(entry['tmp'], path)
+
+
+def _backup(path):
+    """A second name for path's current content that survives os.replace()."""
+    import tempfile
+
+    directory, name = os.path.split(path)
+    fd, backup = tempfile.mkstemp(prefix=f'{BACKUP_PREFIX}{name}-', dir=directory)
+    os.close(fd)
+    os.unlink(backup)
+    try:
+        os.link(path, backup)
+    except OSError:
+        import shutil
+
+        shutil.copy2(path, backup)
+    return backup
+
+
+def _fsync_dir(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened on some platforms (Windows)
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_journal(journal_path, state, entries):
+    tmp_path = journal_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'state': state, 'entries': entries}, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, journal_path)
+    _fsync_dir(os.path.dirname(os.path.abspath(journal_path)))
+
+
+def _remove(path):
+    if path:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _restore(backup, path):
+    """Move backup back over path."""
+    if os.path.exists(path) and os.path.samefile(backup, path):
+        # Never replaced: rename() between two links to one file does nothing
+        os.unlink(backup)
+    else:
+        os.replace(backup, path)
+
+
+def _roll_back(entries, replaced):
+    """Put back the targets in replaced and drop every temporary file."""
+    for entry in replaced:
+        if entry['backup']:
+            _restore(entry['backup'], entry['path'])
+            entry['backup'] = None
+        else:
+            _remove(entry['path'])
+    _clean(entries)
+
+
+def _clean(entries):
+    for entry in entries:
+        _remove(entry['tmp'])
+        _remove(entry['backup'])
+
+
+def recover(journal_path):
+    """Finish an interrupted commit from its journal.
+
+    Returns (state, paths): COMMITTED if the new contents were all in place
+    (only the backups are removed), PREPARED if the files were rolled back,
+    or (None, []) when there is no journal.
+    """
+    try:
+        with open(journal_path) as f:
+            journal = json.load(f)
+    except FileNotFoundError:
+        return None, []
+    entries = journal['entries']
+    if journal['state'] != COMMITTED:
+        for entry in entries:
+            tmp, backup = entry['tmp'], entry['backup']
+            if backup and os.path.exists(backup):
+                # The original content, whether or not it was replaced
+                _restore(backup, entry['path'])
+            elif not backup and tmp and not os.path.exists(tmp):
+                # A file the commit created; its temporary was renamed
+                _remove(entry['path'])
+            entry['backup'] = None
+    _clean(entries)
+    _remove(journal_path)
+    return journal['state'], [entry['path'] for entry in entries]
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""Keep recipes applied while the files they edit change.
+
+    python watch_recipes.py "Addtl Files/voice_feature.toml"
+
+Each recipe is loaded once (a script through codemod.load_recipe, a .toml or
+.json file through recipes.load) and each file it edits is read once and kept
+in memory, together with the positions of every edit's anchor and
+replacement. Changes are picked up with inotify on the
+files' directories (Linux, through ctypes) or, failing that, by polling size
+and mtime. On a change the old and new text are compared to find the region
+that differs: matches outside it are shifted, only the region (widened by
+the needle's length) is searched again, and a recipe none of whose matches
+moved in or out of it is not looked at any further.
+
+A recipe is applied when every anchor matches as often as it expects and its
+replacements are not all in place already, so one whose replacement contains
+its anchor is never applied twice. One with only some edits matching is
+reported as drifted and left alone. The edited text is checked with
+jsx_lexer.validate(), written atomically and fingerprinted in
+.git/trackli-recipes.json like a codemod.run; the watcher then sees its own
+write as a change with nothing left to do.
+"""
+
+import hashlib
+import os
+import sys
+import time
+
+import chunk_cache
+import jsx_lexer
+import recipes
+from codemod import AnchorError, RecipeState, find_all, load_recipe, recipe_hash
+from mapped_file import common_prefix, common_suffix, write_atomic
+from piece_table import PieceTable
+
+POLL_INTERVAL = 0.5
+# Events arriving this soon after the first are handled in the same batch
+# (a checkout or an editor's save writes several times)
+SETTLE = 0.05
+
+APPLIED = 'applied'
+PENDING = 'pending'
+DRIFTED = 'drifted'
+INVALID = 'invalid'
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+def _label(edits, index):
+    return edits[index].name or f'edit #{index + 1}'
+
+
+def update_matches(matches, needle, text, start, old_end, new_end):
+    """Follow text[start:old_end] becoming text[start:new_end]; returns
+    (matches, touched).
+
+    Matches clear of the region are kept (those after it shifted) and only
+    the region, widened by len(needle) - 1 on each side, is searched again.
+    touched says whether any match was in the region before or after.
+    """
+    size = len(needle)
+    delta = new_end - old_end
+    kept = [pos for pos in matches if pos + size <= start]
+    after = [pos + delta for pos in matches if pos >= old_end]
+    dropped = len(matches) - len(kept) - len(after)
+    limit = min(len(text), new_end + size - 1)
+    found = []
+    pos = text.find(needle, max(0, start - size + 1), limit)
+    while pos != -1:
+        if pos + size > start:
+            found.append(pos)
+        pos = text.find(needle, pos + size, limit)
+    return kept + found + after, bool(dropped or found)
+
+
+class Tracked:
+    """One recipe's anchor and replacement positions in one file's text."""
+
+    def __init__(self, name, edits):
+        self.name = name
+        self.edits = edits
+        self.recipe = recipe_hash(edits)
+        self.anchors = []
+        self.replacements = []
+        self.status = None
+        self.problem = None
+
+    def scan(self, text):
+        self.anchors = [list(find_all(text, edit.anchor)) for edit in self.edits]
+        self.replacements = [list(find_all(text, edit.replacement)) if edit.replacement else []
+                             for edit in self.edits]
+        self.evaluate()
+
+    def update(self, text, start, old_end, new_end):
+        """Follow a change; returns True if any match was in the changed region."""
+        touched = False
+        for index, edit in enumerate(self.edits):
+            self.anchors[index], hit = update_matches(
+                self.anchors[index], edit.anchor, text, start, old_end, new_end)
+            touched |= hit
+            if edit.replacement:
+                self.replacements[index], hit = update_matches(
+                    self.replacements[index], edit.replacement, text, start, old_end, new_end)
+                touched |= hit
+        if touched:
+            self.evaluate()
+        return touched
+
+    def evaluate(self):
+        """Set status from the match counts: applied, pending or drifted."""
+        def enough(count, edit):
+            return count == edit.expect if edit.expect is not None else count > 0
+
+        if all(enough(len(found), edit) if edit.replacement else not self.anchors[index]
+               for index, (edit, found) in enumerate(zip(self.edits, self.replacements))):
+            self.status, self.problem = APPLIED, None
+        elif all(enough(len(found), edit) for edit, found in zip(self.edits, self.anchors)):
+            self.status, self.problem = PENDING, None
+        else:
+            missing = [_label(self.edits, index) for index, edit in enumerate(self.edits)
+                       if not enough(len(self.anchors[index]), edit)]
+            self.status, self.problem = DRIFTED, f"anchors of {', '.join(missing)} do not match"
+
+    def replacement_spans(self):
+        """(start, end, text) for every anchor match, ordered; raises AnchorError on overlap."""
+        spans = sorted((pos, pos + len(edit.anchor), edit.replacement)
+                       for edit, found in zip(self.edits, self.anchors) for pos in found)
+        for (_, end, _), (start, _, _) in zip(spans, spans[1:]):
+            if start < end:
+                raise AnchorError(f'anchors overlap at offset {start}')
+        return spans
+
+
+class Target:
+    """A watched file: its last text and the recipes that edit it."""
+
+    def __init__(self, path):
+        self.path = path
+        self.text = None
+        self.recipes = []
+
+    def read(self):
+        """The file's current text, or None if it is missing."""
+        try:
+            with open(self.path, 'r', newline='', encoding='utf-8', errors='surrogateescape') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class Watcher:
+    """Keeps every tracked recipe applied to its target."""
+
+    def __init__(self, targets, validate=True, out=sys.stdout):
+        self.targets = {os.path.realpath(t.path): t for t in targets}
+        self.validate = validate
+        self.out = out
+
+    def log(self, message):
+        self.out.write(f"{time.strftime('%H:%M:%S')} {message}\n")
+        self.out.flush()
+
+    def sync(self, target, text):
+        """Bring target up to date with text and apply whatever became pending."""
+        started = time.perf_counter()
+        old = target.text
+        target.text = text
+        if old is None:
+            for tracked in target.recipes:
+                tracked.scan(text)
+            touched = target.recipes
+        else:
+            if text == old:
+                return
+            start = common_prefix(old, text)
+            tail = common_suffix(old, text, min(len(old), len(text)) - start)
+            touched = [tracked for tracked in target.recipes
+                       if tracked.update(text, start, len(old) - tail, len(text) - tail)]
+        name = os.path.basename(target.path)
+        for tracked in touched:
+            if tracked.status == DRIFTED:
+                self.log(f"{tracked.name}: drifted in {name}: {tracked.problem}")
+            elif tracked.status == APPLIED and old is None:
+                self.log(f"{tracked.name}: already applied to {name}")
+        if touched:
+            self.log(f"{name}: {len(touched)} of {len(target.recipes)} recipes re-checked "
+                     f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for tracked in target.recipes:
+            if tracked.status == PENDING:
+                self.apply(target, tracked)
+                return
+
+    def apply(self, target, tracked):
+        started = time.perf_counter()
+        text = target.text
+        try:
+            doc = PieceTable.from_replacements(text, tracked.replacement_spans())
+        except AnchorError as e:
+            tracked.status, tracked.problem = INVALID, str(e)
+            self.log(f"{tracked.name}: not applied: {e}")
+            return
+        output = str(doc)
+        if self.validate and jsx_lexer.is_source(target.path):
+            try:
+                jsx_lexer.validate(output, chunk_cache.for_file(target.path))
+            except jsx_lexer.LexError as e:
+                tracked.status, tracked.problem = INVALID, str(e)
+                self.log(f"{tracked.name}: not applied, the edited file would not parse: {e}")
+                return
+        write_atomic(target.path, [output.encode('utf-8', 'surrogateescape')], prefix='.watch-')
+        state = RecipeState.for_file(target.path)
+        if state is not None:
+            state.record(tracked.recipe, target.path, _digest(text), _digest(output))
+        self.log(f"{tracked.name}: applied to {os.path.basename(target.path)} "
+                 f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        self.sync(target, output)
+
+    def start(self):
+        for target in self.targets.values():
+            text = target.read()
+            if text is None:
+                self.log(f"ERROR: {target.path} does not exist")
+                continue
+            self.sync(target, text)
+
+    def changed(self, paths):
+        for path in paths:
+            target = self.targets.get(os.path.realpath(path))
+            if target is None:
+                continue
+            text = target.read()
+            if text is not None:
+                self.sync(target, text)
+
+
+class Inotify:
+    """Change notifications for files, from inotify watches on their directories."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+
+    def __init__(self, paths):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.dirs = {}
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        for directory in {os.path.dirname(os.path.realpath(p)) for p in paths}:
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f'cannot watch {directory}')
+            self.dirs[wd] = directory
+
+    def _drain(self):
+        import struct
+
+        paths = set()
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return paths
+            pos = 0
+            while pos < len(data):
+                wd, _, _, size = struct.unpack_from('iIII', data, pos)
+                name = data[pos + 16:pos + 16 + size].rstrip(b'\0')
+                pos += 16 + size
+                if wd in self.dirs and name:
+                    paths.add(os.path.join(self.dirs[wd], os.fsdecode(name)))
+
+    def wait(self, timeout=None):
+        """Paths written since the last call, waiting up to timeout seconds."""
+        import select
+
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        time.sleep(SETTLE)
+        return self._drain()
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Poller:
+    """The fallback: compare the files' size and mtime every interval."""
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.stamps = {path: self._stamp(path) for path in paths}
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, stamp in self.stamps.items():
+                now = self._stamp(path)
+                if now != stamp:
+                    self.stamps[path] = now
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return changed
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Keep recipe scripts applied while their files change.')
+    parser.add_argument('recipes', nargs='+', help='recipe scripts, e.g. "Addtl Files/add_voice_feature.py"')
+    parser.add_argument('--file', help="edit this file instead of the one each recipe names "
+                                       "(single-file recipes only)")
+    parser.add_argument('--poll', type=float, metavar='SECONDS',
+                        help=f'poll instead of using inotify (fallback interval: {POLL_INTERVAL}s)')
+    parser.add_argument('--once', action='store_true', help='apply what is pending and exit')
+    parser.add_argument('--no-validate', dest='validate', action='store_false',
+                        help='write JS/JSX output even if it no longer parses')
+    args = parser.parse_args(argv)
+
+    targets = {}
+    for script in args.recipes:
+        try:
+            if script.endswith(recipes.RECIPE_EXTENSIONS):
+                recipe, _ = recipes.load(script)
+                name = recipe.name
+                groups = [(recipe.target_path(target), edits) for target, edits, _ in recipe.groups]
+            else:
+                name = os.path.splitext(os.path.basename(script))[0]
+                groups = [load_recipe(script)]
+        except (AnchorError, recipes.RecipeError, OSError) as e:
+            print(f"ERROR: {e}")
+            return 2
+        if args.file and len(groups) > 1:
+            print(f"ERROR: {script} edits {len(groups)} files; --file only applies to single-file recipes")
+            return 2
+        for file_path, edits in groups:
+            path = os.path.abspath(args.file or file_path)
+            target = targets.setdefault(path, Target(path))
+            target.recipes.append(Tracked(name, edits))
+
+    watcher = Watcher(targets.values(), args.validate)
+    watcher.start()
+    if args.once:
+        return 0 if all(t.status == APPLIED for target in targets.values() for t in target.recipes) else 1
+
+    source = None
+    if args.poll is None:
+        try:
+            source = Inotify(targets)
+            how = 'inotify'
+        except (OSError, AttributeError):
+            source = None
+    if source is None:
+        source = Poller(targets, args.poll or POLL_INTERVAL)
+        how = f'polling every {source.interval}s'
+    watcher.log(f"watching {len(targets)} files with {how}; Ctrl-C to stop")
+    try:
+        while True:
+            watcher.changed(source.wait())
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        source.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())